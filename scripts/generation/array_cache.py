@@ -0,0 +1,127 @@
+"""
+Memory-mapped intermediate array cache for the Hortus Conclusus texture pipeline.
+
+Generation stages store raw arrays (albedo, height, masks) as .npy files
+keyed by a recipe hash, and later stages map them back zero-copy instead of
+decoding PNGs again.  The cache is bounded by total size; the least
+recently used entries are evicted first.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+# Default size limit of the cache directory
+DEFAULT_CACHE_LIMIT = 1024 * 1024 * 1024
+
+def recipe_key(*parts):
+    """Stable hash of a recipe (any JSON-serialisable description of how an array was made)"""
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+def file_hash(path):
+    """Content hash of a file, for keying arrays decoded from it"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ArrayCache:
+    """A directory of .npy arrays keyed by (recipe key, array name).
+
+    Reads return read-only memory maps.  Every read or write refreshes the
+    file's modification time, which serves as its last-access time for
+    eviction (access times are often disabled on the filesystem).  The
+    directory is created by the first write.  Writes keep a running total
+    of the cache size, so the directory is only scanned when the total
+    passes the limit (other processes sharing the directory are picked up
+    by that scan).
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_LIMIT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total = None
+
+    def path(self, key, name):
+        """File holding one cached array"""
+        return os.path.join(self.directory, f"{key}.{name}.npy")
+
+    def get(self, key, name):
+        """Return the cached array memory-mapped read-only, or None if it is not cached"""
+        path = self.path(key, name)
+        try:
+            array = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, evicted by another process, or partially written
+            return None
+        return array
+
+    def put(self, key, name, array):
+        """Store an array, then evict old entries if the cache is over its limit"""
+        if self._total is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._total = self.total_size()
+        path = self.path(key, name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        try:
+            self._total -= os.stat(path).st_size
+        except OSError:
+            pass
+        os.replace(temp_path, path)
+        self._total += os.stat(path).st_size
+        if self._total > self.max_bytes:
+            self.evict()
+        return path
+
+    def get_or_create(self, key, name, factory):
+        """Return the cached array, creating and storing it with factory() on a miss"""
+        array = self.get(key, name)
+        if array is None:
+            array = factory()
+            self.put(key, name, array)
+        return array
+
+    def total_size(self):
+        """Total size in bytes of the cached arrays"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".npy"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used arrays until the cache fits in max_bytes"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._total = total
+        return total
+
+    def clear(self):
+        """Delete every cached array"""
+        self.evict(0)
@@ -9,7 +9,7 @@ func _run():
     print("Generating illuminated manuscript borders...")
     
     # Call our border generator
-    var BorderGen = load("res://scripts/generate_illuminated_borders.gd")
+    var BorderGen = load("res://scripts/generation/generate_illuminated_borders.gd")
     
     # Generate the set of borders
     BorderGen.generate_border_set()
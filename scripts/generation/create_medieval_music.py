@@ -12,6 +12,14 @@ import random
 # Create directory if it doesn't exist
 os.makedirs("HortusConclusis/assets/music", exist_ok=True)
 
+# Samples per single-cycle wavetable
+WAVETABLE_SIZE = 2048
+
+# Oscillator phase is a 32-bit fixed-point table position that wraps by overflow;
+# the bits below the table index are the interpolation fraction
+PHASE_BITS = 32
+FRACTION_BITS = PHASE_BITS - int(np.log2(WAVETABLE_SIZE))
+
 class MedievalMusicGenerator:
     """Class to generate medieval-style music with different moods and scales"""
     
@@ -89,40 +97,91 @@ class MedievalMusicGenerator:
             "viol": [1.0, 0.8, 0.6, 0.4, 0.2, 0.1],
             "harp": [1.0, 0.4, 0.2, 0.1, 0.05]
         }
-    
-    def generate_note(self, frequency, duration, amplitude=0.3, instrument="flute"):
-        """Generate a single note with the given frequency, duration, and instrument timbre"""
-        # Create time array for this note
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
         
-        # Initialize the note signal
-        note_signal = np.zeros_like(t)
-        
-        # Add harmonics based on the instrument timbre
-        harmonics = self.instruments.get(instrument, self.instruments["flute"])
-        for i, harmonic_amp in enumerate(harmonics):
-            harmonic = (i + 1)
-            harmonic_signal = amplitude * harmonic_amp * np.sin(2 * np.pi * frequency * harmonic * t)
-            note_signal += harmonic_signal
+        # Synthesis caches: wavetables by harmonic content, envelope ramps by shape and length
+        self._wavetables = {}
+        self._envelope_ramps = {}
+        self._ramp = np.arange(0, dtype=np.uint32)
+    
+    def wavetable(self, harmonics, frequency):
+        """Band-limited single-cycle wavetable of a timbre played at `frequency`
+        
+        Harmonics at or above the Nyquist frequency are left out, so a timbre
+        has one table per audible harmonic count. Tables are built once and
+        cached; each has one extra sample (a copy of the first) for interpolation.
+        """
+        nyquist = self.sample_rate / 2
+        audible = tuple(amp for i, amp in enumerate(harmonics) if (i + 1) * frequency < nyquist)
+        table = self._wavetables.get(audible)
+        if table is None:
+            phase = np.arange(WAVETABLE_SIZE + 1) * (2 * np.pi / WAVETABLE_SIZE)
+            table = np.zeros(WAVETABLE_SIZE + 1)
+            for i, harmonic_amp in enumerate(audible):
+                table += harmonic_amp * np.sin((i + 1) * phase)
+            table = table.astype(np.float32)
+            self._wavetables[audible] = table
+        return table
+    
+    def oscillate(self, table, frequency, num_samples):
+        """Play a wavetable at `frequency` with a phase accumulator and linear interpolation"""
+        if len(self._ramp) < num_samples:
+            self._ramp = np.arange(max(num_samples, 2 * len(self._ramp)), dtype=np.uint32)
+        
+        # Phase of every sample, starting at zero like a sine; the multiply wraps modulo 2^32
+        increment = np.uint32(round(frequency * 2 ** PHASE_BITS / self.sample_rate) % 2 ** PHASE_BITS)
+        phase = self._ramp[:num_samples] * increment
+        index = phase >> FRACTION_BITS
+        phase &= (1 << FRACTION_BITS) - 1
+        fraction = phase.astype(np.float32)
+        fraction *= 1.0 / (1 << FRACTION_BITS)
+        
+        low = table[index]
+        signal = table[index + 1]
+        signal -= low
+        signal *= fraction
+        signal += low
+        return signal
+    
+    def envelope_ramp(self, start, end, length):
+        """Linear envelope segment from start to end over length samples, cached by shape and length"""
+        key = (start, end, length)
+        ramp = self._envelope_ramps.get(key)
+        if ramp is None:
+            ramp = np.linspace(start, end, length)
+            ramp.flags.writeable = False
+            self._envelope_ramps[key] = ramp
+        return ramp
+    
+    def apply_envelope(self, signal):
+        """Shape a note in place with its envelope (attack, decay, sustain, release)
         
-        # Create note envelope (attack, decay, sustain, release)
-        note_samples = len(t)
+        Only the attack, decay and release ramps are multiplied in; the
+        samples between them are left at full level.
+        """
+        note_samples = len(signal)
         attack = int(note_samples * 0.1)
         decay = int(note_samples * 0.1)
         release = int(note_samples * 0.2)
         sustain_level = 0.7
         
-        # Create envelope
-        envelope = np.ones(note_samples)
         # Attack
-        envelope[:attack] = np.linspace(0, 1, attack)
+        signal[:attack] *= self.envelope_ramp(0.0, 1.0, attack)
         # Decay
-        envelope[attack:attack+decay] = np.linspace(1, sustain_level, decay)
+        signal[attack:attack+decay] *= self.envelope_ramp(1.0, sustain_level, decay)
         # Release
-        envelope[-release:] = np.linspace(sustain_level, 0, release)
+        if release:
+            signal[-release:] *= self.envelope_ramp(sustain_level, 0.0, release)
+        return signal
+    
+    def generate_note(self, frequency, duration, amplitude=0.3, instrument="flute"):
+        """Generate a single note with the given frequency, duration, and instrument timbre"""
+        note_samples = int(self.sample_rate * duration)
         
-        # Apply envelope
-        note_signal *= envelope
+        # Play the instrument's wavetable, then shape it with the envelope
+        harmonics = self.instruments.get(instrument, self.instruments["flute"])
+        note_signal = self.oscillate(self.wavetable(harmonics, frequency), frequency, note_samples)
+        self.apply_envelope(note_signal)
+        note_signal *= amplitude
         
         return note_signal
     
@@ -175,11 +234,11 @@ class MedievalMusicGenerator:
         fifth_freq = scale[fifth_index % len(scale)]
         
         # Add drone to the audio signal
+        harmonics = self.instruments.get(instrument, self.instruments["viol"])
         for freq, amp in [(root_freq, 0.2), (fifth_freq, 0.1)]:
-            for i, harmonic_amp in enumerate(self.instruments.get(instrument, self.instruments["viol"])):
-                harmonic = (i + 1)
-                harmonic_signal = amp * harmonic_amp * np.sin(2 * np.pi * freq * harmonic * t)
-                audio_signal += harmonic_signal
+            drone_signal = self.oscillate(self.wavetable(harmonics, freq), freq, len(t))
+            drone_signal *= amp
+            audio_signal += drone_signal
         
         return audio_signal
     
@@ -553,9 +612,8 @@ class MedievalMusicGenerator:
         audio_signal += drone_signal
         
         # Add some harmonics for a richer sound
-        for i in range(2, 5):
-            harmonic_signal = (0.1 / i) * np.sin(2 * np.pi * i * scale[0] * t)
-            audio_signal += harmonic_signal
+        harmonics = [0.0] + [0.1 / i for i in range(2, 5)]
+        audio_signal += self.oscillate(self.wavetable(harmonics, scale[0]), scale[0], len(t))
         
         # Normalize and save
         audio_signal = audio_signal / np.max(np.abs(audio_signal))
@@ -4,183 +4,341 @@ Create UI assets for the Hortus Conclusus project
 """
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
+import numpy as np
 import os
+import argparse
+import json
 import random
 
+import msdf_font
+
+# Project root (this script lives in scripts/generation/)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UI_ASSET_DIR = os.path.join(PROJECT_ROOT, "assets", "ui", "medieval")
+FONT_DIR = os.path.join(PROJECT_ROOT, "assets", "fonts", "medieval")
+DEFAULT_FONT = os.path.join(FONT_DIR, "medieval_font.ttf")
+
+# Base parchment color
+PARCHMENT_COLOR = (230, 220, 180)
+
+# Display scales every UI asset is rendered at (name.png, name@2x.png, name@3x.png)
+UI_SCALES = (1, 2, 3)
+
+# Axis stretch mode of the StyleBoxTexture resources written for nine-patches:
+# 2 = AXIS_STRETCH_MODE_TILE_FIT, whole tiles only, so no tile is cut off at a seam
+STYLE_BOX_AXIS_STRETCH = 2
+
+# Resolution-independent description of the UI assets; sizes are in @1x pixels.
+# "scales" limits an asset to some of the display scales
+UI_ASSETS = {
+    # Plain textures of scenes/ambrose_interface.tscn, which only loads @1x
+    "parchment_bg": {"type": "parchment", "size": 512, "scales": (1,)},
+    "portrait_frame": {"type": "frame", "size": 256, "scales": (1,)},
+    "parchment_panel": {"type": "parchment_panel", "size": 192,
+                        "nine_patch": {"margin": 32, "draw_center": True, "content_margin": 8}},
+    # Narrow-bordered parchment for buttons and inputs, which are only 30-50
+    # units tall; the content margin pads the text drawn on it
+    "parchment_button": {"type": "parchment_panel", "size": 48,
+                         "nine_patch": {"margin": 8, "draw_center": True, "content_margin": 6}},
+    # 40 unit margins hold the corner ornaments; the 40 unit centre is a
+    # whole number of 20 unit gold accent periods, so the edges tile
+    "portrait_frame_panel": {"type": "frame", "size": 120,
+                             "nine_patch": {"margin": 40, "draw_center": False}},
+}
+
 # Create directories if they don't exist
-os.makedirs("HortusConclusis/assets/ui/medieval", exist_ok=True)
-os.makedirs("HortusConclusis/assets/fonts/medieval", exist_ok=True)
+os.makedirs(UI_ASSET_DIR, exist_ok=True)
+os.makedirs(FONT_DIR, exist_ok=True)
 
-def create_parchment_bg():
-    """Create a parchment background texture"""
-    width, height = 512, 512
-    
-    # Create base image with parchment color
-    image = Image.new("RGBA", (width, height), (230, 220, 180, 255))
-    draw = ImageDraw.Draw(image)
-    
-    # Add noise to create parchment texture
-    for y in range(height):
-        for x in range(width):
-            noise = random.randint(-15, 15)
-            r, g, b, a = image.getpixel((x, y))
-            r = max(0, min(255, r + noise))
-            g = max(0, min(255, g + noise))
-            b = max(0, min(255, b + noise))
-            image.putpixel((x, y), (r, g, b, a))
-    
-    # Add some darker spots randomly
-    for _ in range(100):
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        radius = random.randint(5, 20)
-        darkness = random.randint(20, 50)
-        
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                if x + dx >= 0 and x + dx < width and y + dy >= 0 and y + dy < height:
-                    dist = (dx**2 + dy**2)**0.5
-                    if dist <= radius:
-                        factor = 1.0 - (dist / radius)
-                        r, g, b, a = image.getpixel((x + dx, y + dy))
-                        r = max(0, r - int(darkness * factor))
-                        g = max(0, g - int(darkness * factor))
-                        b = max(0, b - int(darkness * factor))
-                        image.putpixel((x + dx, y + dy), (r, g, b, a))
-    
-    # Add a vignette effect
-    for y in range(height):
-        for x in range(width):
-            # Calculate distance from center
-            dx = x - width / 2
-            dy = y - height / 2
-            distance = (dx**2 + dy**2)**0.5
-            max_distance = (width / 2)**2 + (height / 2)**2
-            
-            # Darken edges
-            if distance > width / 3:
-                factor = (distance - width / 3) / (width / 2)
-                factor = min(factor, 0.7)  # Max darkening
-                
-                r, g, b, a = image.getpixel((x, y))
-                r = max(0, int(r * (1 - factor)))
-                g = max(0, int(g * (1 - factor)))
-                b = max(0, int(b * (1 - factor)))
-                image.putpixel((x, y), (r, g, b, a))
+def godot_resource_path(path):
+    """res:// path of a file inside the project"""
+    return "res://" + os.path.relpath(path, PROJECT_ROOT).replace(os.sep, "/")
+
+def variant_filename(name, scale, extension):
+    """File name of one display scale variant: name.png at @1x, name@2x.png at @2x"""
+    suffix = "" if scale == 1 else f"@{scale:g}x"
+    return f"{name}{suffix}.{extension}"
+
+def _upsample_tileable(base, width, height):
+    """Bilinearly resize a 2D array, interpolating across its edges so the result still tiles"""
+    def axis(size, base_size):
+        position = (np.arange(size, dtype=np.float32) + 0.5) * (base_size / size) - 0.5
+        lower = np.floor(position).astype(np.int64)
+        return lower % base_size, (lower + 1) % base_size, position - lower
     
-    # Apply slight blur
-    image = image.filter(ImageFilter.GaussianBlur(1))
+    top, bottom, row_weight = axis(height, base.shape[0])
+    left, right, column_weight = axis(width, base.shape[1])
+    rows = base[top] * (1.0 - row_weight[:, None]) + base[bottom] * row_weight[:, None]
+    return rows[:, left] * (1.0 - column_weight) + rows[:, right] * column_weight
+
+def parchment_shade(width, height, rng, scale=1.0, tileable=False):
+    """Brightness offsets of the parchment: blurred grain minus darker spots
+
+    `scale` is the display scale (pixels per @1x pixel), so the grain and
+    spots look the same at every resolution.  With tileable=True the field
+    wraps around at its edges.
+    """
+    # Per-pixel noise, slightly blurred, at the @1x resolution and scaled
+    # up, so the grain keeps its size at every resolution
+    base_width, base_height = max(1, round(width / max(scale, 1))), max(1, round(height / max(scale, 1)))
+    grain = Image.fromarray((rng.integers(-15, 16, (base_height, base_width)) + 128).astype(np.uint8), "L")
+    if tileable:
+        # Blur a wrapped copy so the grain stays continuous across the seams
+        pad = 3
+        grain = Image.fromarray(np.pad(np.asarray(grain), pad, mode='wrap'))
+        grain = grain.filter(ImageFilter.GaussianBlur(1)).crop((pad, pad, pad + base_width, pad + base_height))
+        shade = _upsample_tileable(np.asarray(grain, dtype=np.float32), width, height).astype(np.float32)
+    else:
+        grain = grain.filter(ImageFilter.GaussianBlur(1)).resize((width, height), Image.BILINEAR)
+        shade = np.asarray(grain, dtype=np.float32)
+    shade -= 128.0
     
-    # Save the image
-    image.save("HortusConclusis/assets/ui/medieval/parchment_bg.png")
-    print("Created parchment background")
+    # Add some darker spots randomly (100 per 512x512 at @1x): each
+    # spot's linear falloff is evaluated over a shared window of offsets
+    # and all of them are summed at once
+    count = max(1, round(100 * width * height / (512 * scale) ** 2))
+    xs = rng.integers(0, width, count)
+    ys = rng.integers(0, height, count)
+    radii = (rng.integers(5, 21, count) * scale).astype(np.float32)
+    darkness = rng.integers(20, 51, count).astype(np.float32)
+    reach = int(np.ceil(radii.max()))
+    offsets = np.arange(-reach, reach + 1)
+    distance = np.hypot(offsets[None, :], offsets[:, None]).astype(np.float32)
+    falloff = np.clip(1.0 - distance[None] / radii[:, None, None], 0.0, None) * darkness[:, None, None]
+    rows = ys[:, None, None] + offsets[None, :, None]
+    columns = xs[:, None, None] + offsets[None, None, :]
+    if tileable:
+        # Spots crossing an edge continue on the opposite side
+        rows, columns, padding = rows % height, columns % width, 0
+    else:
+        # Accumulate into a canvas padded by the window reach, then crop
+        rows, columns, padding = rows + reach, columns + reach, reach
+    canvas_width = width + 2 * padding
+    spots = np.bincount((rows * canvas_width + columns).ravel(), weights=falloff.ravel(),
+                        minlength=(height + 2 * padding) * canvas_width)
+    spots = spots.reshape(height + 2 * padding, canvas_width)[padding:padding + height, padding:padding + width]
+    shade -= spots.astype(np.float32)
+    return shade
+
+def parchment_pixels(shade, shading):
+    """RGBA parchment pixels from brightness offsets and a multiplicative shading field"""
+    height, width = shade.shape
+    pixels = np.empty((height, width, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    channel_values = np.empty_like(shade)
+    for channel, value in enumerate(PARCHMENT_COLOR):
+        np.add(shade, value, out=channel_values)
+        np.clip(channel_values, 0, 255, out=channel_values)
+        channel_values *= shading
+        pixels[..., channel] = channel_values
+    return pixels
 
-def create_portrait_frame():
-    """Create a medieval portrait frame"""
-    width, height = 256, 256
+def _resample(field, width, height, wrap=False):
+    """Area-resample a float field to another size; with wrap=True across its edges, so it still tiles"""
+    if field.shape == (height, width):
+        return field
+    source_height, source_width = field.shape
+    pad = 4 if wrap else 0
+    # The filter reads the wrapped padding outside the box at the edges
+    padded = np.pad(field, pad, mode='wrap') if wrap else field
+    image = Image.fromarray(np.ascontiguousarray(padded, dtype=np.float32), "F")
+    box = (pad, pad, pad + source_width, pad + source_height)
+    return np.asarray(image.resize((width, height), Image.BOX, box=box), dtype=np.float32)
+
+def render_parchment(size, scales, rng):
+    """Parchment background at each display scale, from one field rendered at the largest"""
+    top = max(scales)
+    shade = parchment_shade(round(size * top), round(size * top), rng, top)
     
-    # Create base image with transparency
-    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(image)
+    images = {}
+    for scale in scales:
+        width = height = round(size * scale)
+        # Add a vignette effect from the distance to the center, darkening the edges
+        # (1 - min((distance - width / 3) / (width / 2), 0.7) beyond a third of the width)
+        dx = np.arange(width, dtype=np.float32) - width / 2
+        dy = np.arange(height, dtype=np.float32) - height / 2
+        vignette = np.sqrt(dx[None, :] ** 2 + dy[:, None] ** 2)
+        vignette -= width / 3
+        vignette *= -2.0 / width
+        vignette += 1.0
+        np.clip(vignette, 0.3, 1.0, out=vignette)
+        images[scale] = Image.fromarray(parchment_pixels(_resample(shade, width, height), vignette), "RGBA")
+    return images
+
+def render_parchment_panel(size, margin, scales, rng):
+    """Nine-patch parchment panel at each display scale: tileable centre and edges, darkened towards the border
+
+    The grain is one periodic field the size of the centre, sampled so the
+    edges continue it and tile along their length.
+    """
+    center = size - 2 * margin
+    top = max(scales)
+    field = parchment_shade(round(center * top), round(center * top), rng, top, tileable=True)
     
+    images = {}
+    for scale in scales:
+        scaled_margin, scaled_center = round(margin * scale), round(center * scale)
+        scaled_size = 2 * scaled_margin + scaled_center
+        wrapped = (np.arange(scaled_size) - scaled_margin) % scaled_center
+        shade = _resample(field, scaled_center, scaled_center, wrap=True)[wrapped[:, None], wrapped[None, :]]
+        
+        # Darken within the margins, by the distance to the nearest border on each axis
+        distance = np.minimum(np.arange(scaled_size), np.arange(scaled_size)[::-1]).astype(np.float32)
+        edge = 1.0 - 0.35 * np.clip(1.0 - distance / scaled_margin, 0.0, 1.0) ** 2
+        images[scale] = Image.fromarray(parchment_pixels(shade, edge[:, None] * edge[None, :]), "RGBA")
+    return images
+
+def portrait_frame_shapes(width, height):
+    """Rectangles of the medieval portrait frame as ((left, top, right, bottom), fill), in @1x units"""
     # Frame parameters
     border_width = 20
-    inner_width = width - 2 * border_width
-    inner_height = height - 2 * border_width
-    
-    # Draw outer frame (dark brown)
-    draw.rectangle(
-        [(0, 0), (width - 1, height - 1)],
-        fill=(80, 50, 20, 255),
-        outline=None
-    )
-    
-    # Draw inner frame (lighter brown)
-    draw.rectangle(
-        [(border_width, border_width), (width - border_width - 1, height - border_width - 1)],
-        fill=(120, 80, 40, 255),
-        outline=None
-    )
-    
-    # Draw inner cutout (transparent)
-    draw.rectangle(
-        [(border_width + 5, border_width + 5), 
-         (width - border_width - 6, height - border_width - 6)],
-        fill=(0, 0, 0, 0),
-        outline=None
-    )
-    
-    # Add decorative elements to the corners
     corner_size = 30
     
-    # Top-left corner
-    draw.rectangle(
-        [(5, 5), (corner_size, corner_size)],
-        fill=(150, 120, 50, 255),
-        outline=None
-    )
-    
-    # Top-right corner
-    draw.rectangle(
-        [(width - corner_size - 5, 5), (width - 6, corner_size)],
-        fill=(150, 120, 50, 255),
-        outline=None
-    )
-    
-    # Bottom-left corner
-    draw.rectangle(
-        [(5, height - corner_size - 5), (corner_size, height - 6)],
-        fill=(150, 120, 50, 255),
-        outline=None
-    )
+    shapes = [
+        # Outer frame (dark brown)
+        ((0, 0, width, height), (80, 50, 20, 255)),
+        # Inner frame (lighter brown)
+        ((border_width, border_width, width - border_width, height - border_width), (120, 80, 40, 255)),
+        # Inner cutout (transparent)
+        ((border_width + 5, border_width + 5, width - border_width - 5, height - border_width - 5), (0, 0, 0, 0)),
+    ]
     
-    # Bottom-right corner
-    draw.rectangle(
-        [(width - corner_size - 5, height - corner_size - 5), (width - 6, height - 6)],
-        fill=(150, 120, 50, 255),
-        outline=None
-    )
+    # Add decorative elements to the corners
+    corner = (150, 120, 50, 255)
+    shapes += [
+        ((5, 5, corner_size + 1, corner_size + 1), corner),
+        ((width - corner_size - 5, 5, width - 5, corner_size + 1), corner),
+        ((5, height - corner_size - 5, corner_size + 1, height - 5), corner),
+        ((width - corner_size - 5, height - corner_size - 5, width - 5, height - 5), corner),
+    ]
     
     # Add some gold accents
+    gold = (200, 170, 50, 255)
     for i in range(0, width, 20):
-        draw.rectangle(
-            [(i, 10), (i + 10, 15)],
-            fill=(200, 170, 50, 255),
-            outline=None
-        )
-        draw.rectangle(
-            [(i, height - 15), (i + 10, height - 10)],
-            fill=(200, 170, 50, 255),
-            outline=None
-        )
-    
+        shapes += [((i, 10, i + 11, 16), gold), ((i, height - 15, i + 11, height - 9), gold)]
     for i in range(0, height, 20):
+        shapes += [((10, i, 16, i + 11), gold), ((width - 15, i, width - 9, i + 11), gold)]
+    return shapes
+
+def rasterize_shapes(shapes, width, height, scale):
+    """Draw rectangles given in @1x units at a display scale; later shapes replace earlier ones"""
+    image = Image.new("RGBA", (round(width * scale), round(height * scale)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for (left, top, right, bottom), fill in shapes:
         draw.rectangle(
-            [(10, i), (15, i + 10)],
-            fill=(200, 170, 50, 255),
-            outline=None
-        )
-        draw.rectangle(
-            [(width - 15, i), (width - 10, i + 10)],
-            fill=(200, 170, 50, 255),
+            [(round(left * scale), round(top * scale)), (round(right * scale) - 1, round(bottom * scale) - 1)],
+            fill=fill,
             outline=None
         )
+    return image
+
+def render_ui_asset(description, scales, rng):
+    """Render one described UI asset at each display scale; returns {scale: image}"""
+    size = description["size"]
+    if description["type"] == "parchment":
+        return render_parchment(size, scales, rng)
+    if description["type"] == "parchment_panel":
+        return render_parchment_panel(size, description["nine_patch"]["margin"], scales, rng)
+    if description["type"] == "frame":
+        shapes = portrait_frame_shapes(size, size)
+        return {scale: rasterize_shapes(shapes, size, size, scale) for scale in scales}
+    raise ValueError(f"Unknown UI asset type: {description['type']}")
+
+def write_style_box(path, texture_path, margin, draw_center=True, content_margin=None):
+    """Write a StyleBoxTexture resource for a nine-patch texture, with tiling edges and centre"""
+    with open(path, "w") as f:
+        f.write('[gd_resource type="StyleBoxTexture" load_steps=2 format=3]\n\n')
+        f.write(f'[ext_resource type="Texture2D" path="{texture_path}" id="1_texture"]\n\n')
+        f.write('[resource]\n')
+        if content_margin is not None:
+            for side in ("left", "top", "right", "bottom"):
+                f.write(f'content_margin_{side} = {float(content_margin)}\n')
+        f.write('texture = ExtResource("1_texture")\n')
+        for side in ("left", "top", "right", "bottom"):
+            f.write(f'texture_margin_{side} = {float(margin)}\n')
+        f.write(f'axis_stretch_horizontal = {STYLE_BOX_AXIS_STRETCH}\n')
+        f.write(f'axis_stretch_vertical = {STYLE_BOX_AXIS_STRETCH}\n')
+        if not draw_center:
+            f.write('draw_center = false\n')
+
+def create_ui_assets(scales=UI_SCALES, names=None):
+    """Render the UI assets (all, or those in `names`) at every display scale in one run
+
+    Nine-patch assets also get a StyleBoxTexture resource per scale, and
+    nine_patches.json lists their margins in @1x units as
+    [left, top, right, bottom] (patch_margin_* for a NinePatchRect), with
+    the texture and resource of each scale.
+    """
+    scales = sorted(set(scales))
+    rng = np.random.default_rng(random.getrandbits(32))
+    nine_patches = {}
+    
+    for name, description in UI_ASSETS.items():
+        if names is not None and name not in names:
+            continue
+        asset_scales = [scale for scale in scales if scale in description.get("scales", scales)]
+        if not asset_scales:
+            continue
+        images = render_ui_asset(description, asset_scales, rng)
+        nine_patch = description.get("nine_patch")
+        variants = {}
+        for scale, image in images.items():
+            texture = os.path.join(UI_ASSET_DIR, variant_filename(name, scale, "png"))
+            image.save(texture)
+            variants[f"{scale:g}"] = {"texture": godot_resource_path(texture), "size": list(image.size)}
+            if nine_patch:
+                resource = os.path.join(UI_ASSET_DIR, variant_filename(name, scale, "tres"))
+                content_margin = nine_patch.get("content_margin")
+                write_style_box(resource, godot_resource_path(texture), round(nine_patch["margin"] * scale),
+                                nine_patch["draw_center"],
+                                None if content_margin is None else round(content_margin * scale))
+                variants[f"{scale:g}"]["resource"] = godot_resource_path(resource)
+        if nine_patch:
+            nine_patches[name] = {"margins": [nine_patch["margin"]] * 4, "axis_stretch": "tile_fit",
+                                  "draw_center": nine_patch["draw_center"], "variants": variants}
+        print(f"Created {name} at {', '.join(f'@{scale:g}x' for scale in asset_scales)}")
     
-    # Save the image
-    image.save("HortusConclusis/assets/ui/medieval/portrait_frame.png")
-    print("Created portrait frame")
-
-def create_placeholder_font():
-    """Create a placeholder font file"""
-    # Create a simple text file as a placeholder
-    with open("HortusConclusis/assets/fonts/medieval/medieval_font.ttf", "w") as f:
-        f.write("This is a placeholder for a medieval font file.\n")
-        f.write("In a real project, you would use an actual TTF font file here.\n")
+    if nine_patches:
+        index_path = os.path.join(UI_ASSET_DIR, "nine_patches.json")
+        if names is not None and os.path.exists(index_path):
+            with open(index_path) as f:
+                nine_patches = dict(json.load(f), **nine_patches)
+        with open(index_path, "w") as f:
+            json.dump(nine_patches, f, indent=2)
+
+def create_font_atlas(font_path=DEFAULT_FONT, size=msdf_font.DEFAULT_GLYPH_SIZE, initials=False, workers=None):
+    """Bake a TTF/OTF font into an MSDF glyph atlas with BMFont metrics (medieval_font_msdf.png/.fnt)
+
+    With initials=True the capitals are also baked as framed, illuminated
+    initials at twice the size (medieval_initials_msdf.png/.fnt).
+    """
+    try:
+        ImageFont.truetype(font_path, size)
+    except OSError:
+        print(f"{font_path} is not a usable TTF/OTF font; supply one with --font (see {FONT_DIR}/README.txt)")
+        return None
     
-    print("Created placeholder font file")
+    fnt_path = msdf_font.bake_msdf_font(font_path, FONT_DIR, "medieval_font_msdf", size=size, workers=workers)
+    print(f"Created font atlas {fnt_path}")
+    if initials:
+        initials_path = msdf_font.bake_msdf_font(font_path, FONT_DIR, "medieval_initials_msdf",
+                                                 charset="ABCDEFGHIJKLMNOPQRSTUVWXYZ", size=size * 2,
+                                                 decorated=True, workers=workers)
+        print(f"Created initials atlas {initials_path}")
+    return fnt_path
 
 if __name__ == "__main__":
-    create_parchment_bg()
-    create_portrait_frame()
-    create_placeholder_font()
+    parser = argparse.ArgumentParser(description='Create UI assets for Hortus Conclusus')
+    parser.add_argument('--scales', type=float, nargs='+', default=list(UI_SCALES),
+                        help='Display scales to render (default: 1 2 3)')
+    parser.add_argument('--only', nargs='+', choices=sorted(UI_ASSETS), help='Only create these assets')
+    parser.add_argument('--font', help=f'TTF/OTF font to bake into the MSDF font atlas (default: {DEFAULT_FONT})')
+    parser.add_argument('--font-size', type=int, default=msdf_font.DEFAULT_GLYPH_SIZE,
+                        help='Em size of the glyphs in the font atlas, in pixels')
+    parser.add_argument('--initials', action='store_true', help='Also bake decorated initial capitals')
+    args = parser.parse_args()
+    
+    create_ui_assets(args.scales, args.only)
+    if args.only is None or args.font:
+        create_font_atlas(args.font or DEFAULT_FONT, args.font_size, args.initials)
     print("All UI assets created successfully!")
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Bake a whole medieval garden into one virtual texture for Hortus Conclusus.
+
+A garden layout (quarters, bed rectangles, path network and fountain) is
+composed from the medieval texture generator's elements into a single large
+texture, stored as a quadtree tile pyramid on disk.  Tiles are generated
+lazily on request, so the local tile server can stream them to the terrain
+without baking the full-resolution texture up front.
+"""
+
+import os
+import json
+import math
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+import medieval_texture_generator as medieval_generator
+
+# Base directory for baked virtual textures
+BASE_DIR = os.path.join(os.path.dirname(medieval_generator.BASE_DIR), "virtual_gardens")
+
+# Tile size of the pyramid; level 0 is a single tile covering the whole garden
+TILE_SIZE = 256
+
+# Number of encoded tiles kept in memory by the tile server
+TILE_CACHE_LIMIT = 256
+
+# Tiles share a fixed pool of generation locks, picked by tile coordinates
+TILE_LOCK_STRIPES = 64
+
+# Largest element texture rendered for a single quarter or fountain
+MAX_ELEMENT_TEXTURE_SIZE = 2048
+
+# A classic cloister garth: four quarters divided by crossing paths, a
+# perimeter walk and a fountain at the crossing.  All positions and widths
+# are normalised to the garden size.
+DEFAULT_LAYOUT = {
+    "name": "cloister_garth",
+    "size": 8192,
+    "seed": 1,
+    "ground": "earth",
+    "quarters": [
+        {"rect": [0.06, 0.06, 0.475, 0.475], "pattern": "knot_garden"},
+        {"rect": [0.525, 0.06, 0.94, 0.475], "pattern": "square_grid"},
+        {"rect": [0.06, 0.525, 0.475, 0.94], "pattern": "square_grid"},
+        {"rect": [0.525, 0.525, 0.94, 0.94], "pattern": "knot_garden"},
+    ],
+    "beds": [
+        {"rect": [0.1, 0.1, 0.25, 0.25], "plant_type": "herbs"},
+        {"rect": [0.29, 0.29, 0.44, 0.44], "plant_type": "flowers"},
+        {"rect": [0.56, 0.1, 0.9, 0.2], "plant_type": "vegetables"},
+        {"rect": [0.1, 0.8, 0.44, 0.9], "plant_type": "mixed"},
+        {"rect": [0.75, 0.75, 0.9, 0.9], "plant_type": "herbs"},
+    ],
+    "paths": [
+        {"points": [[0.5, 0.03], [0.5, 0.97]], "width": 0.05, "material": "gravel"},
+        {"points": [[0.03, 0.5], [0.97, 0.5]], "width": 0.05, "material": "gravel"},
+        {"points": [[0.03, 0.03], [0.97, 0.03], [0.97, 0.97], [0.03, 0.97], [0.03, 0.03]],
+         "width": 0.04, "material": "stone_dust"},
+    ],
+    "fountain": {"position": [0.5, 0.5], "radius": 0.07, "style": "ornate"},
+}
+
+def load_layout(path=None):
+    """Load a garden layout description from JSON, falling back to the default cloister garth"""
+    layout = dict(DEFAULT_LAYOUT)
+    if path:
+        with open(path) as f:
+            layout.update(json.load(f))
+    return layout
+
+def layout_hash(layout):
+    """Stable hash of a layout, used to key its baked tiles on disk"""
+    encoded = json.dumps(layout, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+def _build_mips(image):
+    """Return a float32 mip chain (full size down to 1px) for an element texture"""
+    mips = [np.asarray(image.convert("RGB"), dtype=np.float32)]
+    while min(image.size) > 1:
+        image = image.reduce(2)
+        mips.append(np.asarray(image.convert("RGB"), dtype=np.float32))
+    return mips
+
+def _mip_for_footprint(mips, texels_per_pixel):
+    """Pick the mip level whose texel size best matches one output pixel"""
+    level = int(math.floor(math.log2(max(texels_per_pixel, 1.0))))
+    level = min(level, len(mips) - 1)
+    return mips[level], 2 ** level
+
+def _rect_distance(xs, ys, rect):
+    """Signed distance (world pixels, negative inside) to an axis-aligned rectangle"""
+    x0, y0, x1, y1 = rect
+    dx = np.maximum(x0 - xs, xs - x1)[None, :]
+    dy = np.maximum(y0 - ys, ys - y1)[:, None]
+    outside = np.sqrt(np.maximum(dx, 0.0) ** 2 + np.maximum(dy, 0.0) ** 2)
+    return outside + np.minimum(np.maximum(dx, dy), 0.0)
+
+def _segment_distance(xs, ys, start, end):
+    """Unsigned distance (world pixels) to a line segment"""
+    ax, ay = start
+    bx, by = end
+    abx = bx - ax
+    aby = by - ay
+    length_sq = max(abx * abx + aby * aby, 1e-9)
+    px = (xs - ax)[None, :]
+    py = (ys - ay)[:, None]
+    t = np.clip((px * abx + py * aby) / length_sq, 0.0, 1.0)
+    return np.sqrt((px - t * abx) ** 2 + (py - t * aby) ** 2)
+
+class VirtualGardenTexture:
+    """A garden layout baked lazily into a quadtree tile pyramid.
+
+    Tiles are addressed by (level, x, y): level 0 is one tile covering the
+    whole garden and each level doubles the resolution, up to the layout's
+    full size.  Every tile is evaluated directly from the layout at its own
+    resolution, so any tile can be produced without its neighbours or
+    children.
+    """
+
+    def __init__(self, layout=None, output_dir=None, tile_size=TILE_SIZE):
+        self.layout = layout or load_layout()
+        self.tile_size = tile_size
+        self.size = int(self.layout["size"])
+        self.levels = max(0, int(math.ceil(math.log2(self.size / tile_size)))) + 1
+        self.hash = layout_hash(self.layout)
+        self.output_dir = output_dir or os.path.join(BASE_DIR, f"{self.layout['name']}_{self.hash}")
+
+        self._lock = threading.Lock()
+        self._tile_locks = [threading.Lock() for _ in range(TILE_LOCK_STRIPES)]
+        self._tile_cache = OrderedDict()
+
+        self._build_elements()
+        self._write_metadata()
+
+    def _build_elements(self):
+        """Generate every element texture the layout needs, once, with the layout's seed"""
+        layout = self.layout
+        seed = layout.get("seed", 0)
+
+        # The element generators draw from the shared random module, so seed it
+        # for this build only and hand the caller's state back afterwards
+        state = random.getstate()
+        random.seed(seed)
+        try:
+            self._generate_elements(layout, np.random.default_rng(seed))
+        finally:
+            random.setstate(state)
+
+    def _generate_elements(self, layout, rng):
+        """Generate the ground, layer and fountain textures from a seeded generator"""
+        # Element textures are shared by every bed, quarter or path that uses them
+        self.materials = {}
+        def material(kind, variation, size=None):
+            key = (kind, variation, size)
+            if key not in self.materials:
+                if kind == "bed":
+                    image = medieval_generator.generate_medieval_garden_bed(variation)
+                elif kind == "pattern":
+                    image = medieval_generator.generate_geometric_pattern(variation, size=size)
+                else:
+                    image = medieval_generator.generate_medieval_path(variation)
+                self.materials[key] = _build_mips(image)
+            return self.materials[key]
+
+        scale = self.size
+        def to_world(rect):
+            return [value * scale for value in rect]
+
+        def texture_size(side):
+            return int(min(MAX_ELEMENT_TEXTURE_SIZE, 2 ** math.ceil(math.log2(max(side, 16)))))
+
+        self.ground = material("path", layout.get("ground", "earth"))
+
+        # Layers are composited in order: quarters, then beds, then paths.
+        # Each layer carries its texture placement as (origin, texels per world
+        # pixel); beds and paths tile their texture across the garden, while a
+        # quarter's pattern is rendered at the quarter's size and laid over it once
+        self.layers = []
+        for quarter in layout.get("quarters", []):
+            rect = to_world(quarter["rect"])
+            side = max(rect[2] - rect[0], rect[3] - rect[1])
+            size = texture_size(side)
+            mips = material("pattern", quarter.get("pattern", "square_grid"), size)
+            self.layers.append(("rect", rect, rect, mips, ((rect[0], rect[1]), size / side)))
+        for bed in layout.get("beds", []):
+            rect = to_world(bed["rect"])
+            self.layers.append(("rect", rect, rect, material("bed", bed.get("plant_type", "mixed")), None))
+        for path in layout.get("paths", []):
+            points = [(x * scale, y * scale) for x, y in path["points"]]
+            half_width = path.get("width", 0.04) * scale / 2.0
+            xs = [x for x, _ in points]
+            ys = [y for _, y in points]
+            bounds = [min(xs) - half_width, min(ys) - half_width, max(xs) + half_width, max(ys) + half_width]
+            self.layers.append(("path", bounds, (points, half_width), material("path", path.get("material", "gravel")), None))
+
+        # The fountain texture is rendered once at roughly its footprint on the garden
+        self.fountain = None
+        fountain = layout.get("fountain")
+        if fountain:
+            radius = fountain.get("radius", 0.07) * scale
+            cx, cy = (value * scale for value in fountain["position"])
+            # Fountain rims sit at a third of the generated texture
+            side = radius * 3.0
+            maps = medieval_generator.generate_fountain_maps(fountain.get("style", "simple"), texture_size(side), rng=rng)
+            self.fountain = {
+                "center": (cx, cy),
+                "radius": radius * 1.1,
+                "origin": (cx - side / 2.0, cy - side / 2.0),
+                "side": side,
+                "mips": _build_mips(Image.fromarray(maps["albedo"], "RGB")),
+            }
+
+    def _write_metadata(self):
+        """Record the pyramid layout next to its tiles so consumers can address them"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        metadata = {
+            "size": self.size,
+            "tile_size": self.tile_size,
+            "levels": self.levels,
+            "format": "png",
+            "layout_hash": self.hash,
+            "layout": self.layout,
+        }
+        with open(os.path.join(self.output_dir, "pyramid.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def tiles_per_side(self, level):
+        """Number of tiles along each axis at a pyramid level"""
+        return 2 ** level
+
+    def tile_path(self, level, x, y):
+        """On-disk location of a tile"""
+        return os.path.join(self.output_dir, str(level), f"{x}_{y}.png")
+
+    def _check_tile(self, level, x, y):
+        if not 0 <= level < self.levels:
+            raise ValueError(f"Level {level} outside pyramid (0-{self.levels - 1})")
+        count = self.tiles_per_side(level)
+        if not (0 <= x < count and 0 <= y < count):
+            raise ValueError(f"Tile ({x}, {y}) outside level {level} ({count}x{count} tiles)")
+
+    def render_tile(self, level, x, y):
+        """Evaluate one tile of the virtual texture (uint8 RGB array), without touching the disk"""
+        self._check_tile(level, x, y)
+        size = self.tile_size
+        # World pixels covered by one tile pixel at this level
+        scale = self.size / (self.tiles_per_side(level) * size)
+        x0 = x * size * scale
+        y0 = y * size * scale
+        xs = x0 + (np.arange(size, dtype=np.float32) + 0.5) * scale
+        ys = y0 + (np.arange(size, dtype=np.float32) + 0.5) * scale
+        tile_bounds = (x0, y0, x0 + size * scale, y0 + size * scale)
+
+        def sample_wrapped(mips, placement=None):
+            origin, texels_per_world = placement or ((0.0, 0.0), 1.0)
+            texture, step = _mip_for_footprint(mips, scale * texels_per_world)
+            height, width = texture.shape[:2]
+            columns = ((xs - origin[0]) * texels_per_world // step).astype(np.int64) % width
+            rows = ((ys - origin[1]) * texels_per_world // step).astype(np.int64) % height
+            return texture[np.ix_(rows, columns)]
+
+        def overlaps(bounds):
+            return not (bounds[2] < tile_bounds[0] or bounds[0] > tile_bounds[2] or
+                        bounds[3] < tile_bounds[1] or bounds[1] > tile_bounds[3])
+
+        def composite(pixels, coverage, color):
+            pixels += (color - pixels) * coverage[..., None]
+
+        pixels = sample_wrapped(self.ground).copy()
+
+        for kind, bounds, shape, mips, placement in self.layers:
+            if not overlaps(bounds):
+                continue
+            if kind == "rect":
+                distance = _rect_distance(xs, ys, shape)
+            else:
+                points, half_width = shape
+                distance = np.full((size, size), np.inf, dtype=np.float32)
+                for start, end in zip(points[:-1], points[1:]):
+                    np.minimum(distance, _segment_distance(xs, ys, start, end), out=distance)
+                distance -= half_width
+            # Anti-alias edges over one output pixel
+            coverage = np.clip(0.5 - distance / scale, 0.0, 1.0)
+            if coverage.any():
+                composite(pixels, coverage, sample_wrapped(mips, placement))
+
+        fountain = self.fountain
+        if fountain:
+            cx, cy = fountain["center"]
+            radius = fountain["radius"]
+            if overlaps((cx - radius, cy - radius, cx + radius, cy + radius)):
+                distance = np.sqrt(((xs - cx) ** 2)[None, :] + ((ys - cy) ** 2)[:, None]) - radius
+                coverage = np.clip(0.5 - distance / scale, 0.0, 1.0)
+                texels_per_world = fountain["mips"][0].shape[0] / fountain["side"]
+                texture, step = _mip_for_footprint(fountain["mips"], scale * texels_per_world)
+                extent = texture.shape[0] - 1
+                columns = np.clip(((xs - fountain["origin"][0]) * texels_per_world // step).astype(np.int64), 0, extent)
+                rows = np.clip(((ys - fountain["origin"][1]) * texels_per_world // step).astype(np.int64), 0, extent)
+                composite(pixels, coverage, texture[np.ix_(rows, columns)])
+
+        return np.clip(pixels + 0.5, 0, 255).astype(np.uint8)
+
+    def tile(self, level, x, y):
+        """Return a tile as a PIL image, generating and caching it on disk if needed"""
+        self._check_tile(level, x, y)
+        path = self.tile_path(level, x, y)
+
+        # Concurrent requests for a tile share its lock, so it is only generated once
+        tile_lock = self._tile_locks[hash((level, x, y)) % TILE_LOCK_STRIPES]
+        with tile_lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                image = Image.fromarray(self.render_tile(level, x, y), "RGB")
+                # Write to a temporary name first so readers never see partial tiles
+                temp_path = path + ".tmp"
+                image.save(temp_path, "PNG")
+                os.replace(temp_path, path)
+                return image
+        return Image.open(path)
+
+    def tile_bytes(self, level, x, y):
+        """Return a tile's encoded PNG bytes, keeping recently served tiles in memory"""
+        key = (level, x, y)
+        with self._lock:
+            data = self._tile_cache.get(key)
+            if data is not None:
+                self._tile_cache.move_to_end(key)
+        if data is None:
+            self.tile(level, x, y)
+            with open(self.tile_path(level, x, y), "rb") as f:
+                data = f.read()
+            with self._lock:
+                # Keep the cache bounded, dropping the least recently used entry first
+                if key not in self._tile_cache and len(self._tile_cache) >= TILE_CACHE_LIMIT:
+                    self._tile_cache.popitem(last=False)
+                self._tile_cache[key] = data
+        return data
+
+    def bake(self, max_level=None):
+        """Eagerly generate every tile up to max_level (all levels by default)"""
+        if max_level is None:
+            max_level = self.levels - 1
+        for level in range(min(max_level, self.levels - 1) + 1):
+            count = self.tiles_per_side(level)
+            for y in range(count):
+                for x in range(count):
+                    self.tile(level, x, y)
+            print(f"Baked level {level} ({count}x{count} tiles)")
+
+def serve_tiles(texture, host="127.0.0.1", port=8765):
+    """Serve a virtual texture over HTTP.
+
+    Endpoints:
+        /pyramid.json                 pyramid metadata
+        /tiles/<level>/<x>/<y>.png    one tile, generated on first request
+    """
+    class TileRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status, content_type, data):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts == ["pyramid.json"]:
+                with open(os.path.join(texture.output_dir, "pyramid.json"), "rb") as f:
+                    self._send(200, "application/json", f.read())
+                return
+
+            if len(parts) == 4 and parts[0] == "tiles" and parts[3].endswith(".png"):
+                try:
+                    level, x, y = int(parts[1]), int(parts[2]), int(parts[3][:-4])
+                    data = texture.tile_bytes(level, x, y)
+                except ValueError as e:
+                    self._send(404, "text/plain", str(e).encode("utf-8"))
+                    return
+                self._send(200, "image/png", data)
+                return
+
+            self._send(404, "text/plain", b"Unknown endpoint")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), TileRequestHandler)
+    print(f"Serving {texture.output_dir} at http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bake a whole medieval garden into a virtual texture tile pyramid')
+    parser.add_argument('--layout', help='Garden layout JSON file (defaults to a cloister garth)')
+    parser.add_argument('--output', help='Output directory for the tile pyramid')
+    parser.add_argument('--bake', action='store_true', help='Generate all tiles up front')
+    parser.add_argument('--max-level', type=int, help='Deepest level to bake')
+    parser.add_argument('--serve', action='store_true', help='Serve tiles lazily over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Tile server host')
+    parser.add_argument('--port', type=int, default=8765, help='Tile server port')
+    args = parser.parse_args()
+
+    texture = VirtualGardenTexture(load_layout(args.layout), args.output)
+    print(f"Virtual garden texture: {texture.size}px, {texture.levels} levels, tiles in {texture.output_dir}")
+
+    if args.bake:
+        texture.bake(args.max_level)
+    if args.serve:
+        serve_tiles(texture, args.host, args.port)
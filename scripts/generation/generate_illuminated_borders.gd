@@ -15,6 +15,25 @@ enum BorderPattern {
     CELTIC_KNOT
 }
 
+# Frames baked offline by illuminated_border_baker.py (<style>_<size>_frame.tres)
+const BAKED_BORDER_DIR = "res://assets/ui/illuminated_borders/"
+const BAKED_BORDER_STYLES = ["vine", "knotwork"]
+const BAKED_BORDER_SIZES = [32, 64]
+
+# Load a baked nine-patch border frame, or null if that style and size was not baked
+static func load_baked_border(style: String, size: int) -> StyleBoxTexture:
+    var path = BAKED_BORDER_DIR + "%s_%d_frame.tres" % [style, size]
+    if ResourceLoader.exists(path):
+        return load(path)
+    return null
+
+# Gilding mask of a baked border frame (white where the gold is leaf), for shaders
+static func load_baked_gilding(style: String, size: int) -> Texture2D:
+    var path = BAKED_BORDER_DIR + "%s_%d_gilding.png" % [style, size]
+    if ResourceLoader.exists(path):
+        return load(path)
+    return null
+
 # Utility functions for generating borders
 static func generate_corner_flourish(size: Vector2, color: Color = Color(0.9, 0.7, 0.2, 1.0)) -> Texture2D:
     var image = Image.create(int(size.x), int(size.y), false, Image.FORMAT_RGBA8)
@@ -194,11 +213,16 @@ static func generate_border_set() -> void:
     if !dir.dir_exists("assets/ui/illuminated_borders"):
         dir.make_dir_recursive("assets/ui/illuminated_borders")
     
-    # Generate different border types
+    # Vine and knotwork frames are baked offline; check they are all present
+    for style in BAKED_BORDER_STYLES:
+        for size in BAKED_BORDER_SIZES:
+            if load_baked_border(style, size) == null or load_baked_gilding(style, size) == null:
+                push_warning("Missing baked %s border at %d px; run illuminated_border_baker.py" % [style, size])
+    
+    # Generate the ornaments that have no baked equivalent
     var border_types = {
         "corner_flourish": Vector2(128, 128),
-        "sacred_geometry": Vector2(128, 128),
-        "vine_border": Vector2(128, 128)
+        "sacred_geometry": Vector2(128, 128)
     }
     
     var gold_color = Color(0.9, 0.78, 0.25, 0.9)
@@ -211,8 +235,6 @@ static func generate_border_set() -> void:
             texture = generate_corner_flourish(size, gold_color)
         elif border_name == "sacred_geometry":
             texture = generate_sacred_geometry(size, gold_color)
-        elif border_name == "vine_border":
-            texture = generate_vine_border(size, gold_color)
         
         # Save the texture as an image
         var image = texture.get_image()
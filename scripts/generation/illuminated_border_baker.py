@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Illuminated manuscript border baker for Hortus Conclusus
+
+Renders border motifs (vine scrolls, two-strand knotwork, corner medallions)
+from analytic distance fields and bakes each (style, size) once into a
+nine-patch frame texture with a matching gilding mask.  The parchment
+pipeline composites the cached pieces onto its textures, and Godot loads the
+frame as a StyleBoxTexture, so neither draws borders at load time.
+
+A frame of size T is (2T + P) pixels square: T x T corner medallions, edge
+strips T deep and one motif period P long, and an empty centre.
+"""
+
+from PIL import Image
+import numpy as np
+import os
+import argparse
+import json
+from functools import lru_cache
+
+import array_cache
+import create_ui_assets as ui_assets
+
+BORDER_DIR = os.path.join(ui_assets.PROJECT_ROOT, "assets", "ui", "illuminated_borders")
+BORDER_INDEX = os.path.join(BORDER_DIR, "borders.json")
+
+# Bump when the motif drawing changes so cached bakes are redone
+BORDER_VERSION = 1
+
+# Border depths (T) baked by default
+DEFAULT_BORDER_SIZES = (32, 64)
+
+# Pigments of the period (see texture_generator.PALETTES)
+INK = (60, 30, 10)
+GOLD = (230, 199, 64)
+VERDIGRIS = (44, 85, 40)
+SAP_GREEN = (80, 125, 42)
+VERMILION = (180, 30, 30)
+AZURITE = (40, 60, 140)
+LEAD_WHITE = (240, 235, 220)
+
+# Motif parameters; lengths are fractions of the border depth T
+BORDER_STYLES = {
+    "vine": {"period": 2.0, "amplitude": 0.18, "stem_width": 0.04,
+             "stem": VERDIGRIS, "leaf": SAP_GREEN, "berry": GOLD,
+             "ground": AZURITE, "rosette": GOLD, "petals": 6},
+    "knotwork": {"period": 1.0, "amplitude": 0.22, "strand_width": 0.06,
+                 "strands": (AZURITE, VERMILION), "eye": GOLD,
+                 "ground": VERMILION, "rosette": LEAD_WHITE, "petals": 4},
+}
+
+# Gold rules along both long edges of every strip
+RULE_OFFSET = 0.1
+RULE_WIDTH = 0.025
+
+# Ink outline width in pixels
+OUTLINE = 1.0
+
+os.makedirs(BORDER_DIR, exist_ok=True)
+
+class _Layer:
+    """Premultiplied RGBA canvas with a gilding mask, painted back to front"""
+
+    def __init__(self, width, height):
+        self.rgb = np.zeros((height, width, 3), dtype=np.float32)
+        self.alpha = np.zeros((height, width), dtype=np.float32)
+        self.gilding = np.zeros((height, width), dtype=np.float32)
+
+    def paint(self, distance, color, gilded=False, outline=True):
+        """Paint the region where `distance` (pixels, negative inside) is below zero"""
+        if outline:
+            self._over(np.clip(0.5 - distance + OUTLINE, 0.0, 1.0), INK, False)
+        self._over(np.clip(0.5 - distance, 0.0, 1.0), color, gilded)
+
+    def _over(self, coverage, color, gilded):
+        keep = 1.0 - coverage
+        self.rgb *= keep[..., None]
+        self.rgb += coverage[..., None] * (np.asarray(color, dtype=np.float32) / 255.0)
+        self.alpha = self.alpha * keep + coverage
+        self.gilding = self.gilding * keep + (coverage if gilded else 0.0)
+
+    def rgba(self):
+        """Straight-alpha float RGBA array"""
+        rgb = self.rgb / np.maximum(self.alpha, 1e-6)[..., None]
+        return np.dstack([rgb, self.alpha])
+
+def _wave(x, period, amplitude, phase=0.0):
+    """Sine curve and its slope"""
+    k = 2.0 * np.pi / period
+    return amplitude * np.sin(k * x + phase), amplitude * k * np.cos(k * x + phase)
+
+def _curve_distance(y, curve, slope, half_width):
+    """Approximate signed distance to a thick curve y = curve(x)"""
+    return np.abs(y - curve) / np.sqrt(1.0 + slope * slope) - half_width
+
+def _ellipse_distance(x, y, cx, cy, a, b, angle):
+    """Approximate signed distance to a rotated ellipse"""
+    c, s = np.cos(angle), np.sin(angle)
+    u = (x - cx) * c + (y - cy) * s
+    v = (y - cy) * c - (x - cx) * s
+    return (np.sqrt((u / a) ** 2 + (v / b) ** 2) - 1.0) * min(a, b)
+
+def _wrapped(x, period):
+    """x folded into [-period/2, period/2)"""
+    return (x + period / 2) % period - period / 2
+
+def _paint_rules(layer, y, size):
+    for offset in (RULE_OFFSET, 1.0 - RULE_OFFSET):
+        layer.paint(np.abs(y - offset * size) - RULE_WIDTH * size, GOLD, gilded=True, outline=False)
+
+def render_vine_strip(size, style):
+    """One period of a scrolling vine: an undulating stem with alternating leaves and gilt berries"""
+    period = int(round(style["period"] * size))
+    y, x = np.mgrid[0:size, 0:period].astype(np.float32) + 0.5
+    layer = _Layer(period, size)
+    _paint_rules(layer, y, size)
+
+    centre = size / 2
+    curve, slope = _wave(x, period, style["amplitude"] * size)
+    layer.paint(_curve_distance(y, centre + curve, slope, style["stem_width"] * size), style["stem"])
+
+    # Leaves spring from the stem where it crosses the centre line, alternating sides
+    length, breadth, angle = 0.17 * size, 0.07 * size, 0.8
+    for position, side in ((0.0, -1.0), (0.5, 1.0)):
+        base_x = position * period
+        base_y = centre + _wave(base_x, period, style["amplitude"] * size)[0]
+        cx = base_x + 0.9 * length * np.cos(angle)
+        cy = base_y + side * 0.9 * length * np.sin(angle)
+        dx = _wrapped(x - cx, period)
+        layer.paint(_ellipse_distance(dx, y, 0.0, cy, length, breadth, side * angle), style["leaf"])
+
+    # Berries fill the bays on the far side of each swing
+    for position, side in ((0.25, -1.0), (0.75, 1.0)):
+        dx = _wrapped(x - position * period, period)
+        distance = np.hypot(dx, y - (centre + side * 0.17 * size)) - 0.055 * size
+        layer.paint(distance, style["berry"], gilded=True)
+    return layer
+
+def render_knotwork_strip(size, style):
+    """One period of a two-strand plait; the strands pass over and under at alternate crossings"""
+    period = int(round(style["period"] * size))
+    y, x = np.mgrid[0:size, 0:period].astype(np.float32) + 0.5
+    layer = _Layer(period, size)
+    _paint_rules(layer, y, size)
+
+    centre = size / 2
+    half_width = style["strand_width"] * size
+    curve, slope = _wave(x, period, style["amplitude"] * size)
+    distances = (_curve_distance(y, centre + curve, slope, half_width),
+                 _curve_distance(y, centre - curve, -slope, half_width))
+
+    # Crossings are at x = 0 and period/2; the first strand is on top at x = 0
+    first_on_top = (np.round(2.0 * x / period) % 2 == 0)
+    far = np.float32(size)
+    for on_top in (False, True):
+        for strand, distance in enumerate(distances):
+            selected = first_on_top if (strand == 0) == on_top else ~first_on_top
+            layer.paint(np.where(selected, distance, far), style["strands"][strand])
+
+    # Gilt dots in the eyes between crossings
+    for position in (0.25, 0.75):
+        dx = _wrapped(x - position * period, period)
+        layer.paint(np.hypot(dx, y - centre) - 0.06 * size, style["eye"], gilded=True)
+    return layer
+
+STRIP_RENDERERS = {
+    "vine": render_vine_strip,
+    "knotwork": render_knotwork_strip,
+}
+
+def render_corner_medallion(size, style):
+    """Roundel with a gilt rim, a coloured ground and a rosette of `petals` petals"""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) + 0.5
+    layer = _Layer(size, size)
+    radius = np.hypot(x - size / 2, y - size / 2)
+    theta = np.arctan2(y - size / 2, x - size / 2)
+
+    layer.paint(radius - 0.45 * size, GOLD, gilded=True)
+    layer.paint(radius - 0.37 * size, style["ground"])
+    petal_radius = 0.3 * size * np.sqrt(np.abs(np.cos(style["petals"] * theta / 2)))
+    layer.paint(radius - np.maximum(petal_radius, 0.08 * size), style["rosette"],
+                gilded=style["rosette"] == GOLD)
+    layer.paint(radius - 0.07 * size, GOLD, gilded=True)
+    return layer
+
+def assemble_frame(strip, corner, width, height):
+    """Lay strips and corners around a width x height frame (arrays of shape (T, P, C) and (T, T, C))
+
+    Each edge repeats the strip a whole number of times and resamples it to
+    fit, so the motif stays continuous along the edge.  The top strip is
+    rotated onto the other edges with its outer side facing out.
+    """
+    depth = corner.shape[0]
+    frame = np.zeros((height, width, strip.shape[2]), dtype=np.float32)
+    for rotation in range(4):
+        length = (width if rotation % 2 == 0 else height) - 2 * depth
+        if length > 0:
+            edge = _fit_strip(strip, length)
+            # Build the top edge of the rotated frame, then rotate it back
+            target = np.rot90(frame, -rotation)
+            target[:depth, depth:depth + length] = edge
+    for y, x in ((0, 0), (0, width - depth), (height - depth, 0), (height - depth, width - depth)):
+        frame[y:y + depth, x:x + depth] = corner
+    return frame
+
+def _fit_strip(strip, length):
+    """Tile a strip a whole number of periods and resample it to `length` pixels"""
+    period = strip.shape[1]
+    repeats = max(1, int(round(length / period)))
+    tiled = np.tile(strip, (1, repeats, 1))
+    if tiled.shape[1] == length:
+        return tiled
+    channels = [np.asarray(Image.fromarray(np.ascontiguousarray(tiled[..., c]), "F")
+                           .resize((length, strip.shape[0]), Image.BILINEAR))
+                for c in range(strip.shape[2])]
+    return np.dstack(channels)
+
+def border_recipe(style, size):
+    """Cache key of one bake; includes the style box stretch mode, so a change to it rewrites the resources"""
+    return array_cache.recipe_key(BORDER_VERSION, style, size, BORDER_STYLES[style],
+                                  ui_assets.STYLE_BOX_AXIS_STRETCH)
+
+def border_name(style, size):
+    return f"{style}_{size}"
+
+def _load_index():
+    try:
+        with open(BORDER_INDEX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _render_pieces(style, size):
+    """(strip, corner) float RGBA arrays, with the gilding mask as a fifth channel"""
+    params = BORDER_STYLES[style]
+    pieces = []
+    for layer in (STRIP_RENDERERS[style](size, params), render_corner_medallion(size, params)):
+        pieces.append(np.dstack([layer.rgba(), layer.gilding]))
+    return pieces
+
+def bake_border(style, size, force=False):
+    """Bake a (style, size) frame and gilding mask unless an up to date bake is cached
+
+    Returns the border's entry in borders.json.
+    """
+    if style not in BORDER_STYLES:
+        raise ValueError(f"Unknown border style: {style}")
+    name = border_name(style, size)
+    index = _load_index()
+    key = border_recipe(style, size)
+    entry = index.get(name)
+    if (not force and entry and entry["key"] == key and
+            all(os.path.exists(os.path.join(BORDER_DIR, entry[field]))
+                for field in ("texture", "gilding", "resource"))):
+        return entry
+
+    strip, corner = _render_pieces(style, size)
+    frame_size = 2 * size + strip.shape[1]
+    frame = assemble_frame(strip, corner, frame_size, frame_size)
+    pixels = np.round(np.clip(frame, 0.0, 1.0) * 255).astype(np.uint8)
+
+    texture_path = os.path.join(BORDER_DIR, f"{name}_frame.png")
+    gilding_path = os.path.join(BORDER_DIR, f"{name}_gilding.png")
+    resource_path = os.path.join(BORDER_DIR, f"{name}_frame.tres")
+    Image.fromarray(pixels[..., :4], "RGBA").save(texture_path)
+    Image.fromarray(pixels[..., 4], "L").save(gilding_path)
+    ui_assets.write_style_box(resource_path, ui_assets.godot_resource_path(texture_path), size,
+                              draw_center=False)
+
+    entry = {
+        "key": key,
+        "style": style,
+        "size": size,
+        "period": strip.shape[1],
+        "texture": os.path.basename(texture_path),
+        "gilding": os.path.basename(gilding_path),
+        "resource": os.path.basename(resource_path),
+    }
+    index = _load_index()
+    index[name] = entry
+    with open(BORDER_INDEX, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    load_border_pieces.cache_clear()
+    print(f"Baked border: {texture_path}")
+    return entry
+
+@lru_cache(maxsize=8)
+def load_border_pieces(style, size):
+    """Cached (strip, corner) float arrays of a baked border, RGBA plus gilding, baking on first use"""
+    entry = bake_border(style, size)
+    frame = np.asarray(Image.open(os.path.join(BORDER_DIR, entry["texture"])).convert("RGBA"),
+                       dtype=np.float32)
+    gilding = np.asarray(Image.open(os.path.join(BORDER_DIR, entry["gilding"])).convert("L"),
+                         dtype=np.float32)
+    pieces = np.dstack([frame, gilding]) / 255.0
+    strip = pieces[:size, size:size + entry["period"]]
+    corner = pieces[:size, :size]
+    strip.flags.writeable = False
+    corner.flags.writeable = False
+    return strip, corner
+
+def composite_border(image, style="vine", size=32, gild=1.0):
+    """Composite a baked illuminated border around a PIL image
+
+    `gild` scales the gilding mask, which brightens the gold towards leaf.
+    """
+    strip, corner = load_border_pieces(style, size)
+    width, height = image.size
+    frame = assemble_frame(strip, corner, width, height)
+    rgb = frame[..., :3] * (1.0 + 0.15 * gild * frame[..., 4:5])
+    alpha = frame[..., 3:4]
+    base = np.asarray(image.convert("RGB"), dtype=np.float32) / 255.0
+    result = base * (1.0 - alpha) + np.clip(rgb, 0.0, 1.0) * alpha
+    return Image.fromarray(np.round(result * 255).astype(np.uint8), "RGB")
+
+def bake_all_borders(styles=None, sizes=DEFAULT_BORDER_SIZES, force=False):
+    """Bake every style at every size"""
+    return [bake_border(style, size, force)
+            for style in (styles or BORDER_STYLES) for size in sizes]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bake illuminated manuscript borders")
+    parser.add_argument("--styles", nargs="+", choices=sorted(BORDER_STYLES),
+                        help="Border styles to bake (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_BORDER_SIZES),
+                        help="Border depths in pixels")
+    parser.add_argument("--force", action="store_true", help="Rebake even if cached")
+    args = parser.parse_args()
+    bake_all_borders(args.styles, args.sizes, args.force)
@@ -1,8 +1,13 @@
 import os
+import json
 import random
 import math
+import functools
+from collections import OrderedDict
+import numpy as np
 from PIL import Image, ImageDraw, ImageFilter, ImageEnhance, ImageChops
 import texture_generator as base_generator
+import array_cache
 
 # Base directory for saving textures
 BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
@@ -12,6 +17,12 @@ BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__
 for subdir in ["garden_elements", "ornamental", "symbolic", "materials"]:
     os.makedirs(os.path.join(BASE_DIR, subdir), exist_ok=True)
 
+# Saved texture maps as raw arrays, keyed by the content hash of the texture's
+# PNG, so the shader integrator maps them instead of decoding the PNGs again.
+# The cache lives in the user's cache directory, outside the Godot project
+ARRAY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hortus_conclusus", "arrays")
+texture_cache = array_cache.ArrayCache(ARRAY_CACHE_DIR)
+
 # Texture size
 TEXTURE_SIZE = 512
 
@@ -54,111 +65,339 @@ add_noise = base_generator.add_noise
 add_texture_variation = base_generator.add_texture_variation
 add_medieval_border = base_generator.add_medieval_border
 
-def generate_geometric_pattern(pattern_type="square_grid", color1=(30, 100, 40), color2=(150, 170, 100)):
+def soft_ellipse_mask(width, height, angle=0.0, softness=0.35):
+    """Build a rotated, soft-edged ellipse mask cropped to its own bounding box.
+
+    Returns the float32 coverage mask (0-1) and the offset of its top-left
+    corner relative to the ellipse centre.
+    """
+    semi_x = max(width / 2.0, 0.5)
+    semi_y = max(height / 2.0, 0.5)
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+
+    # Half extents of the rotated ellipse's axis-aligned bounding box
+    half_w = int(math.ceil(math.sqrt((semi_x * cos_a) ** 2 + (semi_y * sin_a) ** 2))) + 1
+    half_h = int(math.ceil(math.sqrt((semi_x * sin_a) ** 2 + (semi_y * cos_a) ** 2))) + 1
+
+    y, x = np.mgrid[-half_h:half_h + 1, -half_w:half_w + 1].astype(np.float32)
+
+    # Rotate the sample grid into the ellipse frame and measure normalised radius
+    u = (x * cos_a + y * sin_a) / semi_x
+    v = (-x * sin_a + y * cos_a) / semi_y
+    radius = np.sqrt(u * u + v * v)
+
+    # Smoothstep falloff over the outer `softness` fraction of the radius
+    t = np.clip((1.0 - radius) / max(softness, 1e-3), 0.0, 1.0)
+    mask = t * t * (3.0 - 2.0 * t)
+
+    return mask.astype(np.float32), (-half_w, -half_h)
+
+def blend_mask_in_place(pixels, mask, x, y, color, opacity=1.0):
+    """Blend a flat colour into a float pixel array through a local mask placed at (x, y)"""
+    height, width = pixels.shape[:2]
+    mask_h, mask_w = mask.shape
+
+    # Clip the mask's footprint against the image bounds
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + mask_w, width), min(y + mask_h, height)
+    if x0 >= x1 or y0 >= y1:
+        return pixels
+
+    weight = mask[y0 - y:y1 - y, x0 - x:x1 - x, None] * opacity
+    region = pixels[y0:y1, x0:x1]
+    region += (np.asarray(color, dtype=np.float32) - region) * weight
+
+    return pixels
+
+# Plant sprite atlas used by the garden bed renderer
+# Each sprite is stored as three layers: coverage (alpha), shading and an
+# accent mask marking where the secondary colour (flower centre, leaf tuft) goes
+PLANT_SPRITE_SIZE = 64
+PLANT_SPRITES = ["leaf_rosette", "flower_head", "root_top"]
+PLANT_ROTATION_STEPS = 8
+
+# Scaled and rotated sprite variants kept at once (least recently used are dropped)
+PLANT_SPRITE_VARIANT_CACHE_LIMIT = 1024
+
+_plant_sprite_atlas = None
+_plant_sprite_variants = OrderedDict()
+
+def _render_plant_sprite(kind, size=PLANT_SPRITE_SIZE):
+    """Render a single top-down plant silhouette as (alpha, shade, accent) layers"""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32)
+    center = (size - 1) / 2.0
+    dx = (x - center) / center
+    dy = (y - center) / center
+    radius = np.sqrt(dx * dx + dy * dy)
+    theta = np.arctan2(dy, dx)
+
+    # Anti-aliased coverage of everything inside a radial edge function
+    pixel = 2.0 / size
+    def coverage(edge):
+        return np.clip((edge - radius) / pixel + 0.5, 0.0, 1.0)
+
+    accent = np.zeros_like(radius)
+
+    if kind == "leaf_rosette":
+        # Six pointed leaves radiating from the crown
+        lobe = np.abs(np.cos(theta * 3.0))
+        alpha = coverage(0.3 + 0.65 * lobe ** 1.5)
+        # Leaves brighten towards their tips, with a darker midrib along each leaf
+        midrib = np.clip(1.0 - (1.0 - lobe) * 25.0, 0.0, 1.0) * (radius > 0.15)
+        shade = 0.7 + 0.4 * radius - 0.2 * midrib
+
+    elif kind == "flower_head":
+        # Ring of eight rounded petals around a contrasting centre
+        lobe = np.abs(np.cos(theta * 4.0))
+        alpha = coverage(0.55 + 0.4 * lobe ** 0.6)
+        shade = 0.75 + 0.35 * lobe * np.clip(radius * 1.5, 0.0, 1.0)
+        accent = coverage(0.28)
+
+    elif kind == "root_top":
+        # Domed root shoulder with a tuft of narrow leaves spreading beyond it
+        shoulder = coverage(0.5)
+        lobe = np.abs(np.cos(theta * 1.5)) ** 6
+        leaves = coverage(0.25 + 0.7 * lobe)
+        alpha = np.maximum(shoulder, leaves)
+        accent = leaves * (1.0 - shoulder) + leaves * shoulder * (radius < 0.15)
+        shade = np.where(shoulder > 0, 1.1 - 0.6 * radius * radius, 0.8 + 0.3 * radius)
+
+    else:
+        raise ValueError(f"Unknown plant sprite: {kind}")
+
+    return np.stack([alpha, np.clip(shade, 0.0, 1.5), np.clip(accent, 0.0, 1.0)], axis=-1).astype(np.float32)
+
+def get_plant_sprite_atlas():
+    """Return the cached plant sprite atlas, rendering it on first use"""
+    global _plant_sprite_atlas
+    if _plant_sprite_atlas is None:
+        _plant_sprite_atlas = np.stack([_render_plant_sprite(kind) for kind in PLANT_SPRITES])
+    return _plant_sprite_atlas
+
+def _plant_sprite_variant(sprite_index, size, rotation_step):
+    """Return the covered texels of a scaled and rotated atlas sprite, cached per transform
+
+    The variant is returned as (rows, columns, layers), where layers holds
+    coverage, shading and shaded accent weight for each covered texel.
+    """
+    key = (sprite_index, size, rotation_step)
+    variant = _plant_sprite_variants.get(key)
+    if variant is None:
+        sprite = get_plant_sprite_atlas()[sprite_index]
+        angle = 360.0 * rotation_step / PLANT_ROTATION_STEPS
+        layers = []
+        for channel in range(sprite.shape[-1]):
+            layer = Image.fromarray(sprite[..., channel], "F")
+            layer = layer.rotate(angle, resample=Image.BILINEAR)
+            layer = layer.resize((size, size), resample=Image.BILINEAR, reducing_gap=2.0)
+            layers.append(np.asarray(layer, dtype=np.float32))
+        alpha, shade, accent = layers
+        rows, columns = np.nonzero(alpha > 0)
+        variant = (rows, columns, np.stack([alpha[rows, columns], shade[rows, columns],
+                                            (accent * shade)[rows, columns]], axis=-1))
+
+        # Keep the cache bounded, dropping the least recently used entry first
+        if len(_plant_sprite_variants) >= PLANT_SPRITE_VARIANT_CACHE_LIMIT:
+            _plant_sprite_variants.popitem(last=False)
+        _plant_sprite_variants[key] = variant
+    else:
+        _plant_sprite_variants.move_to_end(key)
+    return variant
+
+def _disjoint_waves(xs, ys, size):
+    """Split sprite instances into waves whose footprints never overlap
+
+    Instances are binned by their top-left corner into size x size cells,
+    where `size` is at least every footprint's width; cells of equal (x, y)
+    parity are then a whole cell apart, so a wave takes one instance from
+    each cell of a parity class.  Returns a wave number per instance;
+    within a cell, earlier instances land in earlier waves.
+    """
+    cell_x, cell_y = xs // size, ys // size
+    cells = cell_y * (int(cell_x.max()) + 1) + cell_x
+    order = np.argsort(cells, kind="stable")
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    rank = np.empty(len(xs), dtype=np.int64)
+    rank[order] = np.arange(len(xs)) - np.repeat(starts, np.diff(np.r_[starts, len(xs)]))
+    return rank * 4 + (cell_y % 2) * 2 + cell_x % 2
+
+def stamp_plant_sprites(pixels, sprite_indices, xs, ys, sizes, rotation_steps, primary_colors, accent_colors):
+    """Alpha-blend a batch of tinted plant sprites into a float pixel array
+
+    Each distinct (sprite, size, rotation) variant is fetched once as its
+    covered texels.  The instances are split into waves of non-overlapping
+    footprints, and the texels of a whole wave are tinted and blended with
+    array operations instead of one instance at a time.
+    """
+    height, width = pixels.shape[:2]
+    sprite_indices, xs, ys, sizes, rotation_steps = (
+        np.asarray(values, dtype=np.int64) for values in (sprite_indices, xs, ys, sizes, rotation_steps))
+    if not len(sizes):
+        return pixels
+
+    # Sprites are centred on their instance position; order instances by wave
+    # so that each wave's texels end up contiguous
+    left = xs - sizes // 2
+    top = ys - sizes // 2
+    footprint = int(sizes.max())
+    waves = _disjoint_waves(left + footprint, top + footprint, footprint)
+    order = np.argsort(waves, kind="stable")
+    waves = waves[order]
+    left, top = left[order], top[order]
+    primary_colors = np.asarray(primary_colors, dtype=np.float32)[order]
+    accent_colors = np.asarray(accent_colors, dtype=np.float32)[order]
+
+    # Gather the covered texels of every instance, in instance order
+    variants, variant_of = np.unique(np.stack((sprite_indices, sizes, rotation_steps), axis=1)[order],
+                                     axis=0, return_inverse=True)
+    variants = [_plant_sprite_variant(int(sprite_index), int(size), int(rotation_step))
+                for sprite_index, size, rotation_step in variants]
+    variant_of = variant_of.reshape(-1)
+    counts = np.array([len(variant[0]) for variant in variants])[variant_of]
+    rows = np.concatenate([variants[index][0] for index in variant_of]) + np.repeat(top, counts)
+    columns = np.concatenate([variants[index][1] for index in variant_of]) + np.repeat(left, counts)
+    layers = np.concatenate([variants[index][2] for index in variant_of])
+
+    # Tint each texel: primary colour, accent colour where the accent mask is set, then shading
+    primary = np.repeat(primary_colors, counts, axis=0)
+    accent_shift = np.repeat(accent_colors - primary_colors, counts, axis=0)
+    colors = primary * layers[:, 1:2] + accent_shift * layers[:, 2:3]
+
+    # Clip to the bed, then blend wave by wave; within a wave no two texels
+    # land on the same pixel
+    inside = (rows >= 0) & (rows < height) & (columns >= 0) & (columns < width)
+    targets = (rows * width + columns)[inside]
+    colors, alpha = colors[inside], layers[inside, 0:1]
+    bounds = np.searchsorted(np.repeat(waves, counts)[inside], np.unique(waves)[1:])
+    bounds = np.r_[0, bounds, len(targets)]
+    flat = pixels.reshape(-1, pixels.shape[-1])
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        wave = slice(start, stop)
+        target = targets[wave]
+        region = np.take(flat, target, axis=0)
+        region += (colors[wave] - region) * alpha[wave]
+        flat[target] = region
+
+    return pixels
+
+# Geometric pattern masks are evaluated analytically over normalised
+# coordinates, so any output size is equally crisp; results are cached per
+# (pattern, parameters, size) as 8-bit coverage
+PATTERN_MASK_CACHE_LIMIT = 16
+
+_pattern_mask_cache = OrderedDict()
+
+def _coverage_from_distance(distance, size):
+    """Convert a signed distance (normalised units, negative inside) into anti-aliased coverage"""
+    return np.clip(0.5 - distance * size, 0.0, 1.0)
+
+def _distance_to_lines(coord, period, half_width):
+    """Signed distance to a family of parallel lines spaced `period` apart"""
+    return np.abs(coord - np.round(coord / period) * period) - half_width
+
+def _evaluate_pattern_mask(pattern_type, size, params):
+    """Evaluate a geometric pattern's coverage over a size x size pixel grid"""
+    coords = (np.arange(size, dtype=np.float32) + 0.5) / size
+    u = coords[None, :]
+    v = coords[:, None]
+    pixel = 1.0 / size
+
+    if pattern_type == "square_grid":
+        # Checkerboard of grid_size cells, filled where (x + y) is odd
+        grid_size = params["grid_size"]
+        fu = u * grid_size
+        fv = v * grid_size
+        odd = (np.floor(fu) + np.floor(fv)) % 2 == 1
+        edge = np.minimum(np.abs(fu - np.round(fu)), np.abs(fv - np.round(fv))) / grid_size
+        half = np.clip(edge / pixel, 0.0, 0.5)
+        return np.where(odd, 0.5 + half, 0.5 - half)
+
+    if pattern_type == "cross":
+        # Two crossing paths with a central circle (often a fountain or feature) left open
+        path_width = 1.0 / 8.0
+        paths = np.minimum(np.abs(v - 0.5), np.abs(u - 0.5)) - path_width / 2.0
+        circle = np.sqrt((u - 0.5) ** 2 + (v - 0.5) ** 2) - path_width
+        return _coverage_from_distance(np.maximum(paths, -circle), size)
+
+    if pattern_type == "radial":
+        # Alternating pie segments inside the inscribed circle
+        num_segments = params["num_segments"]
+        segment = 2.0 * math.pi / num_segments
+        du = u - 0.5
+        dv = v - 0.5
+        radius = np.sqrt(du * du + dv * dv)
+        theta = np.mod(np.arctan2(dv, du), 2.0 * math.pi)
+
+        filled = np.floor(theta / segment) % 2 == 0
+        boundary = np.round(theta / segment)
+        edge = radius * np.abs(np.sin(theta - boundary * segment))
+        # With an odd segment count the last and first segments are both filled
+        if num_segments % 2:
+            edge = np.where(np.mod(boundary, num_segments) == 0, np.inf, edge)
+        half = np.clip(edge / pixel, 0.0, 0.5)
+        angular = np.where(filled, 0.5 + half, 0.5 - half)
+        return angular * _coverage_from_distance(radius - 0.5, size)
+
+    if pattern_type == "knot_garden":
+        # Interlaced hedges: a quarter lattice with diagonals and a ring in each cell
+        period = 0.25
+        half_width = 1.0 / 64.0
+        straight = np.minimum(_distance_to_lines(u, period, half_width),
+                              _distance_to_lines(v, period, half_width))
+        diagonal = np.minimum(_distance_to_lines(u + v, period, half_width * math.sqrt(2.0)),
+                              _distance_to_lines(u - v, period, half_width * math.sqrt(2.0))) / math.sqrt(2.0)
+        cu = u - (np.floor(u / period) + 0.5) * period
+        cv = v - (np.floor(v / period) + 0.5) * period
+        rings = np.abs(np.sqrt(cu * cu + cv * cv) - period * 0.3) - half_width
+        return _coverage_from_distance(np.minimum(np.minimum(straight, diagonal), rings), size)
+
+    # Unknown patterns are left plain
+    return np.zeros((size, size), dtype=np.float32)
+
+def geometric_pattern_mask(pattern_type, size=TEXTURE_SIZE, **params):
+    """Return the cached coverage mask (float32, 0-1) for a geometric pattern"""
+    key = (pattern_type, tuple(sorted(params.items())), size)
+    mask = _pattern_mask_cache.get(key)
+    if mask is None:
+        coverage = np.broadcast_to(_evaluate_pattern_mask(pattern_type, size, params), (size, size))
+        mask = np.round(coverage * 255).astype(np.uint8)
+
+        # Keep the cache bounded, dropping the least recently used entry first
+        if len(_pattern_mask_cache) >= PATTERN_MASK_CACHE_LIMIT:
+            _pattern_mask_cache.popitem(last=False)
+        _pattern_mask_cache[key] = mask
+    else:
+        _pattern_mask_cache.move_to_end(key)
+    return mask.astype(np.float32) / 255.0
+
+def add_array_noise(pixels, intensity, rng):
+    """Add uniform per-channel noise to a float pixel array in place"""
+    amount = int(255 * intensity)
+    pixels += rng.integers(-amount, amount + 1, pixels.shape, dtype=np.int16)
+    return pixels
+
+def generate_geometric_pattern(pattern_type="square_grid", color1=(30, 100, 40), color2=(150, 170, 100), size=TEXTURE_SIZE):
     """Generate a geometric pattern common in medieval gardens"""
-    img = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE))
-    draw = ImageDraw.Draw(img)
-    
-    # Fill with base color
-    draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=color1)
-    
+    params = {}
     if pattern_type == "square_grid":
         # Create a square grid pattern (common in medieval garden beds)
-        grid_size = random.randint(4, 8)
-        cell_size = TEXTURE_SIZE // grid_size
-        
-        for y in range(grid_size):
-            for x in range(grid_size):
-                # Alternate colors in a checkerboard pattern
-                if (x + y) % 2 == 0:
-                    continue
-                
-                # Draw the square
-                draw.rectangle(
-                    (x * cell_size, y * cell_size, (x + 1) * cell_size, (y + 1) * cell_size),
-                    fill=color2
-                )
-    
-    elif pattern_type == "cross":
-        # Create a cross pattern (common in monastery gardens)
-        path_width = TEXTURE_SIZE // 8
-        
-        # Horizontal path
-        draw.rectangle(
-            (0, TEXTURE_SIZE // 2 - path_width // 2, TEXTURE_SIZE, TEXTURE_SIZE // 2 + path_width // 2),
-            fill=color2
-        )
-        
-        # Vertical path
-        draw.rectangle(
-            (TEXTURE_SIZE // 2 - path_width // 2, 0, TEXTURE_SIZE // 2 + path_width // 2, TEXTURE_SIZE),
-            fill=color2
-        )
-        
-        # Central circle (often a fountain or feature)
-        center = TEXTURE_SIZE // 2
-        radius = path_width
-        draw.ellipse(
-            (center - radius, center - radius, center + radius, center + radius),
-            fill=color1
-        )
-    
+        params["grid_size"] = random.randint(4, 8)
     elif pattern_type == "radial":
         # Create a radial pattern (common in some formal gardens)
-        center = TEXTURE_SIZE // 2
-        num_segments = random.randint(6, 12)
-        
-        for i in range(num_segments):
-            angle1 = 2 * math.pi * i / num_segments
-            angle2 = 2 * math.pi * (i + 1) / num_segments
-            
-            # Calculate points for a pie segment
-            points = [
-                (center, center),
-                (center + int(center * math.cos(angle1)), center + int(center * math.sin(angle1))),
-            ]
-            
-            # Add points along the arc
-            steps = 10
-            for j in range(1, steps):
-                angle = angle1 + (angle2 - angle1) * j / steps
-                points.append((
-                    center + int(center * math.cos(angle)),
-                    center + int(center * math.sin(angle))
-                ))
-            
-            # Add the final point
-            points.append((center + int(center * math.cos(angle2)), center + int(center * math.sin(angle2))))
-            
-            # Draw the segment
-            if i % 2 == 0:
-                draw.polygon(points, fill=color2)
+        params["num_segments"] = random.randint(6, 12)
     
-    elif pattern_type == "knot_garden":
-        # Create a simplified knot garden pattern
-        # This is a very simplified version of the complex knot gardens
-        line_width = TEXTURE_SIZE // 32
-        
-        # Draw the background
-        draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=color1)
-        
-        # Draw the knot pattern
-        for i in range(0, TEXTURE_SIZE, TEXTURE_SIZE // 4):
-            # Horizontal lines
-            draw.line([(0, i), (TEXTURE_SIZE, i)], fill=color2, width=line_width)
-            # Vertical lines
-            draw.line([(i, 0), (i, TEXTURE_SIZE)], fill=color2, width=line_width)
-            
-            # Diagonal lines
-            draw.line([(0, i), (i, 0)], fill=color2, width=line_width)
-            draw.line([(TEXTURE_SIZE - i, 0), (TEXTURE_SIZE, i)], fill=color2, width=line_width)
-            draw.line([(0, TEXTURE_SIZE - i), (i, TEXTURE_SIZE)], fill=color2, width=line_width)
-            draw.line([(TEXTURE_SIZE - i, TEXTURE_SIZE), (TEXTURE_SIZE, TEXTURE_SIZE - i)], fill=color2, width=line_width)
+    # Blend the two colors through the pattern's coverage mask
+    mask = geometric_pattern_mask(pattern_type, size, **params)[..., None]
+    base = np.asarray(color1, dtype=np.float32)
+    pixels = base + (np.asarray(color2, dtype=np.float32) - base) * mask
     
     # Add some noise and texture
-    img = add_noise(img, intensity=0.05)
+    rng = np.random.default_rng(random.getrandbits(32))
+    add_array_noise(pixels, 0.05, rng)
     
-    return img
+    return Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), "RGB")
 
 def generate_medieval_garden_bed(plant_type="herbs", density=0.7):
     """Generate a medieval garden bed texture with the specified plant type"""
@@ -169,88 +408,69 @@ def generate_medieval_garden_bed(plant_type="herbs", density=0.7):
     soil_color = random.choice(base_generator.PALETTES["earth_tones"])
     draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=soil_color)
     
-    # Determine plant colors based on type
+    # Determine plant sprites and colors based on type
+    # Each entry is (sprite, primary color, accent color)
     if plant_type == "herbs":
         # Herbs were common in medieval gardens for medicinal and culinary use
-        plant_colors = [
-            random.choice(MEDIEVAL_PALETTES["garden_greens"]),
-            random.choice(MEDIEVAL_PALETTES["garden_greens"]),
-            random.choice(MEDIEVAL_PALETTES["flower_colors"]),
+        plant_kinds = [
+            ("leaf_rosette", random.choice(MEDIEVAL_PALETTES["garden_greens"]), MEDIEVAL_PALETTES["garden_greens"][0]),
+            ("leaf_rosette", random.choice(MEDIEVAL_PALETTES["garden_greens"]), MEDIEVAL_PALETTES["garden_greens"][0]),
+            ("flower_head", random.choice(MEDIEVAL_PALETTES["flower_colors"]), MEDIEVAL_PALETTES["flower_colors"][2]),
         ]
         plant_size_range = (10, 25)
         num_plants = int(300 * density)
         
     elif plant_type == "flowers":
         # Flowers for decoration and symbolism
-        plant_colors = [
-            random.choice(MEDIEVAL_PALETTES["flower_colors"]),
-            random.choice(MEDIEVAL_PALETTES["flower_colors"]),
-            random.choice(MEDIEVAL_PALETTES["flower_colors"]),
+        plant_kinds = [
+            ("flower_head", random.choice(MEDIEVAL_PALETTES["flower_colors"]), MEDIEVAL_PALETTES["flower_colors"][2]),
+            ("flower_head", random.choice(MEDIEVAL_PALETTES["flower_colors"]), MEDIEVAL_PALETTES["flower_colors"][2]),
+            ("flower_head", random.choice(MEDIEVAL_PALETTES["flower_colors"]), MEDIEVAL_PALETTES["flower_colors"][6]),
+            ("leaf_rosette", random.choice(MEDIEVAL_PALETTES["garden_greens"]), MEDIEVAL_PALETTES["garden_greens"][0]),
         ]
         plant_size_range = (15, 30)
         num_plants = int(200 * density)
         
     elif plant_type == "vegetables":
         # Vegetables for sustenance
-        plant_colors = [
-            random.choice(MEDIEVAL_PALETTES["garden_greens"]),
-            (150, 100, 50),  # Brown for root vegetables
-            (180, 150, 30),  # Yellow for some vegetables
+        plant_kinds = [
+            ("leaf_rosette", random.choice(MEDIEVAL_PALETTES["garden_greens"]), MEDIEVAL_PALETTES["garden_greens"][0]),
+            ("root_top", (150, 100, 50), random.choice(MEDIEVAL_PALETTES["garden_greens"])),  # Brown for root vegetables
+            ("root_top", (180, 150, 30), random.choice(MEDIEVAL_PALETTES["garden_greens"])),  # Yellow for some vegetables
         ]
         plant_size_range = (20, 40)
         num_plants = int(150 * density)
         
     else:  # Mixed garden
-        plant_colors = [
-            random.choice(MEDIEVAL_PALETTES["garden_greens"]),
-            random.choice(MEDIEVAL_PALETTES["flower_colors"]),
-            random.choice(MEDIEVAL_PALETTES["garden_greens"]),
+        plant_kinds = [
+            ("leaf_rosette", random.choice(MEDIEVAL_PALETTES["garden_greens"]), MEDIEVAL_PALETTES["garden_greens"][0]),
+            ("flower_head", random.choice(MEDIEVAL_PALETTES["flower_colors"]), MEDIEVAL_PALETTES["flower_colors"][2]),
+            ("root_top", (150, 100, 50), random.choice(MEDIEVAL_PALETTES["garden_greens"])),
         ]
         plant_size_range = (15, 35)
         num_plants = int(200 * density)
     
-    # Draw plants
-    for _ in range(num_plants):
-        x = random.randint(0, TEXTURE_SIZE - 1)
-        y = random.randint(0, TEXTURE_SIZE - 1)
-        size = random.randint(*plant_size_range)
-        plant_color = random.choice(plant_colors)
-        
-        # Vary plant color slightly
-        r_offset = random.randint(-20, 20)
-        g_offset = random.randint(-20, 20)
-        b_offset = random.randint(-20, 20)
-        
-        plant_color = (
-            max(0, min(255, plant_color[0] + r_offset)),
-            max(0, min(255, plant_color[1] + g_offset)),
-            max(0, min(255, plant_color[2] + b_offset))
-        )
-        
-        # Draw different plant shapes
-        shape_type = random.choice(["circle", "oval", "cluster"])
-        
-        if shape_type == "circle":
-            # Simple circular plant
-            draw.ellipse((x - size // 2, y - size // 2, x + size // 2, y + size // 2), fill=plant_color)
-            
-        elif shape_type == "oval":
-            # Oval/elongated plant
-            height = size
-            width = size // 2
-            draw.ellipse((x - width // 2, y - height // 2, x + width // 2, y + height // 2), fill=plant_color)
-            
-        elif shape_type == "cluster":
-            # Cluster of smaller plants
-            for _ in range(3):
-                cluster_x = x + random.randint(-size // 3, size // 3)
-                cluster_y = y + random.randint(-size // 3, size // 3)
-                cluster_size = size // 2
-                draw.ellipse(
-                    (cluster_x - cluster_size // 2, cluster_y - cluster_size // 2, 
-                     cluster_x + cluster_size // 2, cluster_y + cluster_size // 2), 
-                    fill=plant_color
-                )
+    # Draw plants by stamping atlas sprites in one batch
+    # Instance positions, transforms and tints are drawn up front as arrays
+    rng = np.random.default_rng(random.getrandbits(32))
+    kinds = rng.integers(0, len(plant_kinds), num_plants)
+    xs = rng.integers(0, TEXTURE_SIZE, num_plants)
+    ys = rng.integers(0, TEXTURE_SIZE, num_plants)
+    sizes = rng.integers(plant_size_range[0], plant_size_range[1] + 1, num_plants)
+    rotation_steps = rng.integers(0, PLANT_ROTATION_STEPS, num_plants)
+    
+    sprite_lookup = np.array([PLANT_SPRITES.index(kind[0]) for kind in plant_kinds])
+    primary_lookup = np.array([kind[1] for kind in plant_kinds], dtype=np.float32)
+    accent_lookup = np.array([kind[2] for kind in plant_kinds], dtype=np.float32)
+    
+    # Vary plant color slightly
+    primary_colors = np.clip(primary_lookup[kinds] + rng.integers(-20, 21, (num_plants, 3)), 0, 255)
+    accent_colors = np.clip(accent_lookup[kinds] + rng.integers(-10, 11, (num_plants, 3)), 0, 255)
+    
+    pixels = np.asarray(img, dtype=np.float32).copy()
+    stamp_plant_sprites(pixels, sprite_lookup[kinds], xs, ys, sizes, rotation_steps,
+                        primary_colors.astype(np.float32), accent_colors.astype(np.float32))
+    img = Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), "RGB")
     
     # Add some soil texture
     img = add_texture_variation(img, variation_type="spots", intensity=0.3)
@@ -306,643 +526,773 @@ def generate_medieval_path(material="gravel"):
         img = add_noise(img, intensity=0.1)
         
     # Add some footprints or wear patterns
+    # Each patch is rasterised only within its own bounding box and blended
+    # in place, so the cost no longer scales with the full texture area
+    pixels = np.asarray(img.convert("RGB"), dtype=np.float32).copy()
+
+    # Darker for worn areas
+    wear_color = (
+        int(base_color[0] * 0.85),
+        int(base_color[1] * 0.85),
+        int(base_color[2] * 0.85)
+    )
+
     num_wear_patterns = random.randint(5, 15)
     for _ in range(num_wear_patterns):
         x = random.randint(0, TEXTURE_SIZE - 1)
         y = random.randint(0, TEXTURE_SIZE - 1)
         size = random.randint(20, 60)
-        
-        # Darker for worn areas
-        wear_color = (
-            int(base_color[0] * 0.85),
-            int(base_color[1] * 0.85),
-            int(base_color[2] * 0.85)
-        )
-        
+
         # Oval shape for footprints/wear
         width = size
         height = size // 2
         angle = random.uniform(0, math.pi)
-        
-        # Create a rotated ellipse by using an affine transform
-        ellipse_img = Image.new("RGBA", (TEXTURE_SIZE, TEXTURE_SIZE), (0, 0, 0, 0))
-        ellipse_draw = ImageDraw.Draw(ellipse_img)
-        ellipse_draw.ellipse((x - width // 2, y - height // 2, x + width // 2, y + height // 2), fill=wear_color)
-        
-        # Rotate the ellipse
-        rotated = ellipse_img.rotate(angle * 180 / math.pi, resample=Image.BICUBIC, expand=False)
-        
-        # Composite with the main image
-        img = Image.alpha_composite(img.convert("RGBA"), rotated)
-    
-    # Convert back to RGB
-    img = img.convert("RGB")
-    
+
+        # Soft-edged rotated ellipse, blended into the path around (x, y)
+        mask, (offset_x, offset_y) = soft_ellipse_mask(width, height, angle)
+        blend_mask_in_place(pixels, mask, x + offset_x, y + offset_y, wear_color)
+
+    img = Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), "RGB")
+
     return img
 
-def generate_medieval_wall(material="stone", moss_amount=0.3):
-    """Generate a medieval wall texture"""
-    img = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE))
-    draw = ImageDraw.Draw(img)
-    
-    if material == "stone":
-        # Generate a stone wall
-        # Base stone color
-        stone_color = random.choice(base_generator.PALETTES["stone"])
-        mortar_color = (180, 175, 165)  # Light gray for mortar
-        
-        # Fill with mortar color first
-        draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=mortar_color)
-        
-        # Draw stones
-        stone_size_range = (30, 80)
-        stone_height_range = (20, 40)
-        
-        # Create rows of stones
-        y = 0
-        while y < TEXTURE_SIZE:
-            row_height = random.randint(*stone_height_range)
-            x = random.randint(-20, 0)  # Start with some randomness
-            
-            while x < TEXTURE_SIZE:
-                stone_width = random.randint(*stone_size_range)
-                
-                # Stone color variation
-                r_offset = random.randint(-20, 20)
-                g_offset = random.randint(-20, 20)
-                b_offset = random.randint(-20, 20)
-                
-                this_stone_color = (
-                    max(0, min(255, stone_color[0] + r_offset)),
-                    max(0, min(255, stone_color[1] + g_offset)),
-                    max(0, min(255, stone_color[2] + b_offset))
-                )
-                
-                # Draw the stone
-                draw.rectangle(
-                    (x, y, x + stone_width, y + row_height),
-                    fill=this_stone_color
-                )
-                
-                # Add some texture to the stone
-                for _ in range(random.randint(3, 8)):
-                    tx = random.randint(x + 5, x + stone_width - 5)
-                    ty = random.randint(y + 5, y + row_height - 5)
-                    ts = random.randint(2, 5)
-                    
-                    # Texture is usually darker
-                    texture_color = (
-                        int(this_stone_color[0] * 0.8),
-                        int(this_stone_color[1] * 0.8),
-                        int(this_stone_color[2] * 0.8)
-                    )
-                    
-                    draw.ellipse((tx, ty, tx + ts, ty + ts), fill=texture_color)
-                
-                x += stone_width + random.randint(2, 5)  # Gap between stones
-            
-            y += row_height + random.randint(2, 5)  # Gap between rows
-        
-    elif material == "brick":
-        # Generate a brick wall
-        brick_color = (180, 60, 40)  # Traditional red brick
-        mortar_color = (200, 195, 190)  # Light gray for mortar
-        
-        # Fill with mortar color first
-        draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=mortar_color)
-        
-        # Brick dimensions
-        brick_width = 60
-        brick_height = 30
-        mortar_thickness = 5
-        
-        # Draw bricks in alternating rows
-        for row in range(0, TEXTURE_SIZE, brick_height + mortar_thickness):
-            # Offset every other row
-            offset = (brick_width + mortar_thickness) // 2 if row % (2 * (brick_height + mortar_thickness)) else 0
-            
-            for col in range(-offset, TEXTURE_SIZE, brick_width + mortar_thickness):
-                # Vary brick color slightly
-                r_offset = random.randint(-20, 20)
-                g_offset = random.randint(-10, 10)
-                b_offset = random.randint(-10, 10)
-                
-                this_brick_color = (
-                    max(0, min(255, brick_color[0] + r_offset)),
-                    max(0, min(255, brick_color[1] + g_offset)),
-                    max(0, min(255, brick_color[2] + b_offset))
-                )
-                
-                # Draw the brick
-                draw.rectangle(
-                    (col, row, col + brick_width, row + brick_height),
-                    fill=this_brick_color
-                )
-                
-                # Add some texture to the brick
-                for _ in range(random.randint(3, 8)):
-                    tx = random.randint(col + 5, col + brick_width - 5)
-                    ty = random.randint(row + 5, row + brick_height - 5)
-                    ts = random.randint(2, 5)
-                    
-                    # Texture is usually darker or lighter
-                    if random.random() < 0.5:
-                        texture_color = (
-                            int(this_brick_color[0] * 0.9),
-                            int(this_brick_color[1] * 0.9),
-                            int(this_brick_color[2] * 0.9)
-                        )
-                    else:
-                        texture_color = (
-                            min(255, int(this_brick_color[0] * 1.1)),
-                            min(255, int(this_brick_color[1] * 1.1)),
-                            min(255, int(this_brick_color[2] * 1.1))
-                        )
-                    
-                    draw.ellipse((tx, ty, tx + ts, ty + ts), fill=texture_color)
-    
-    # Add moss if requested
+def tileable_value_noise(size, cells, rng, octaves=1, persistence=0.5):
+    """Fractal value noise in the 0-1 range that tiles seamlessly at the given size"""
+    total = np.zeros((size, size), dtype=np.float32)
+    amplitude = 1.0
+    norm = 0.0
+
+    for octave in range(octaves):
+        count = min(cells * 2 ** octave, size)
+        grid = rng.random((count, count), dtype=np.float32)
+
+        # Smoothstep-interpolated lattice lookups, wrapping at the edges
+        coords = np.arange(size, dtype=np.float32) * np.float32(count / size)
+        cell = np.floor(coords)
+        t = coords - cell
+        t = t * t * (3.0 - 2.0 * t)
+        i0 = cell.astype(np.int32) % count
+        i1 = (i0 + 1) % count
+
+        rows = grid[i0] + (grid[i1] - grid[i0]) * t[:, None]
+        left = np.take(rows, i0, axis=1)
+        total += np.float32(amplitude) * (left + (np.take(rows, i1, axis=1) - left) * t[None, :])
+
+        norm += amplitude
+        amplitude *= persistence
+
+    return total / norm
+
+# Masonry bonds and their base dimensions in pixels at TEXTURE_SIZE
+# (course height and stone length include the mortar joint)
+MASONRY_BONDS = {
+    "running": {"course_height": 35, "stone_length": 65, "mortar_width": 5},
+    "flemish": {"course_height": 35, "stone_length": 65, "mortar_width": 5},
+    "ashlar": {"course_height": (22, 45), "stone_length": (32, 85), "mortar_width": 3.5},
+    "rubble": {"course_height": 42, "stone_length": 42, "mortar_width": 4},
+}
+
+def _course_joints(bond, course, size, params, rng):
+    """Return the sorted x positions of the vertical joints in one course"""
+    if bond == "running":
+        count = max(1, round(size / params["stone_length"]))
+        length = size / count
+        offset = length / 2.0 if course % 2 else 0.0
+        joints = np.arange(count) * length + offset
+
+    elif bond == "flemish":
+        # Alternating stretchers and headers, headers centred over the stretchers below
+        periods = max(1, round(size / (params["stone_length"] * 1.5)))
+        period = size / periods
+        stretcher = period * 2.0 / 3.0
+        offset = stretcher * 0.75 if course % 2 else 0.0
+        starts = np.arange(periods) * period
+        joints = np.concatenate([starts, starts + stretcher]) + offset
+
+    else:  # ashlar: random stone lengths, rescaled so each course wraps exactly
+        low, high = params["stone_length"]
+        count = max(1, round(size * 2.0 / (low + high)))
+        lengths = rng.uniform(low, high, count)
+        lengths *= size / lengths.sum()
+        joints = np.concatenate([[0.0], np.cumsum(lengths)[:-1]]) + rng.uniform(0, size)
+
+    return np.sort(np.mod(joints, size))
+
+def _coursed_layout(bond, size, params, rng):
+    """Course and stone maps plus joint distances for coursed bonds"""
+    # Course boundaries always sum to the texture height so the wall tiles
+    if bond == "ashlar":
+        low, high = params["course_height"]
+        count = max(1, round(size * 2.0 / (low + high)))
+        heights = rng.uniform(low, high, count)
+    else:
+        count = max(2, round(size / params["course_height"]))
+        count += count % 2  # Even course count keeps the bond offset tileable
+        heights = np.ones(count)
+    edges = np.concatenate([[0.0], np.cumsum(heights * size / heights.sum())])
+
+    centers = np.arange(size, dtype=np.float32) + 0.5
+    course_of_row = np.clip(np.searchsorted(edges, centers, side="right") - 1, 0, count - 1)
+    top_distance = centers - edges[course_of_row]
+    joint_dy = np.minimum(top_distance, edges[course_of_row + 1] - centers)
+    course_height = np.diff(edges)[course_of_row]
+
+    # One row of stone indices and joint distances per course, gathered per pixel row
+    stone_rows = []
+    joint_rows = []
+    max_stones = 1
+    for course in range(count):
+        joints = _course_joints(bond, course, size, params, rng)
+        index = np.searchsorted(joints, centers, side="right") - 1
+        left = np.where(index >= 0, joints[index], joints[-1] - size)
+        right_index = index + 1
+        right = np.where(right_index < len(joints), joints[np.minimum(right_index, len(joints) - 1)], joints[0] + size)
+        stone_rows.append(np.mod(index, len(joints)))
+        joint_rows.append(np.minimum(centers - left, right - centers))
+        max_stones = max(max_stones, len(joints))
+
+    stone_in_course = np.stack(stone_rows)[course_of_row]
+    joint_dx = np.stack(joint_rows)[course_of_row]
+
+    course_map = np.broadcast_to(course_of_row[:, None], (size, size)).astype(np.int32)
+    stone_id = (course_map * max_stones + stone_in_course).astype(np.int32)
+    edge_distance = np.minimum(joint_dx, joint_dy[:, None]).astype(np.float32)
+
+    # Upper edges of each stone, where water and debris collect
+    upper = np.clip(1.0 - top_distance / (0.3 * course_height), 0.0, 1.0)[:, None]
+    upper = np.broadcast_to(upper, (size, size)).astype(np.float32)
+
+    return course_map, stone_id, edge_distance, upper, count * max_stones
+
+def _rubble_layout(size, params, rng):
+    """Irregular stones from a tileable jittered-grid Voronoi diagram"""
+    cells = max(2, round(size / params["stone_length"]))
+    cell = size / cells
+    seeds = (np.stack(np.meshgrid(np.arange(cells), np.arange(cells)), axis=-1) + rng.uniform(0.15, 0.85, (cells, cells, 2))) * cell
+
+    centers = np.arange(size, dtype=np.float32) + 0.5
+    py = centers[:, None]
+    px = centers[None, :]
+    cx = np.floor(px / cell).astype(np.int32)
+    cy = np.floor(py / cell).astype(np.int32)
+
+    nearest = np.full((size, size), np.inf, dtype=np.float32)
+    second = np.full((size, size), np.inf, dtype=np.float32)
+    stone_id = np.zeros((size, size), dtype=np.int32)
+    seed_y = np.zeros((size, size), dtype=np.float32)
+    seeds = seeds.astype(np.float32)
+
+    # Track the nearest two seeds (squared distances) over the 3x3
+    # neighbourhood, wrapping at the edges
+    for oy in (-1, 0, 1):
+        for ox in (-1, 0, 1):
+            ny = cy + oy
+            nx = cx + ox
+            wy = np.mod(ny, cells)
+            wx = np.mod(nx, cells)
+            sx = seeds[wy, wx, 0] + (nx - wx) * np.float32(cell)
+            sy = seeds[wy, wx, 1] + (ny - wy) * np.float32(cell)
+            distance = (px - sx) ** 2
+            distance += (py - sy) ** 2
+
+            closer = distance < nearest
+            np.minimum(second, distance, out=second)
+            np.copyto(second, nearest, where=closer)
+            np.copyto(nearest, distance, where=closer)
+            np.copyto(stone_id, wy * cells + wx, where=closer)
+            np.copyto(seed_y, sy, where=closer)
+
+    edge_distance = (np.sqrt(second) - np.sqrt(nearest)) / 2.0
+    course_map = stone_id // cells
+
+    # Upper half of each stone, strongest close to its joints
+    upper = (py < seed_y) * np.clip(1.0 - edge_distance / (0.3 * cell), 0.0, 1.0)
+
+    return course_map.astype(np.int32), stone_id, edge_distance.astype(np.float32), upper.astype(np.float32), cells * cells
+
+def generate_masonry_maps(material="stone", moss_amount=0.3, bond=None, size=TEXTURE_SIZE, rng=None):
+    """Generate a masonry wall as albedo, mortar, height, moss and stone/course ID maps in one pass"""
+    if bond is None:
+        bond = "running" if material == "brick" else "ashlar"
+    if bond not in MASONRY_BONDS:
+        raise ValueError(f"Unknown masonry bond: {bond}")
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(32))
+
+    # Scale the bond's dimensions with the output size
+    scale = size / TEXTURE_SIZE
+    params = {}
+    for name, value in MASONRY_BONDS[bond].items():
+        params[name] = tuple(v * scale for v in value) if isinstance(value, tuple) else value * scale
+
+    if bond == "rubble":
+        course_map, stone_id, edge_distance, upper, num_ids = _rubble_layout(size, params, rng)
+    else:
+        course_map, stone_id, edge_distance, upper, num_ids = _coursed_layout(bond, size, params, rng)
+
+    # Mortar joints, anti-aliased against the distance to the nearest joint
+    mortar = np.clip(params["mortar_width"] / 2.0 - edge_distance + 0.5, 0.0, 1.0)
+
+    # Per-stone random values, looked up through the stone ID map
+    stone_level = rng.uniform(0.7, 1.0, num_ids).astype(np.float32)[stone_id]
+    if material == "brick":
+        stone_color = np.array((180, 60, 40), dtype=np.float32)  # Traditional red brick
+        mortar_color = np.array((200, 195, 190), dtype=np.float32)  # Light gray for mortar
+        jitter = rng.integers((-20, -10, -10), (21, 11, 11), (num_ids, 3))
+    else:
+        palette = base_generator.PALETTES["stone"]
+        stone_color = np.array(palette[rng.integers(len(palette))], dtype=np.float32)
+        mortar_color = np.array((180, 175, 165), dtype=np.float32)  # Light gray for mortar
+        # Mostly tonal variation between stones, with a slight tint
+        jitter = rng.integers(-20, 21, (num_ids, 1)) + rng.integers(-6, 7, (num_ids, 3))
+    stone_colors = np.clip(stone_color + jitter, 0, 255).astype(np.float32)[stone_id]
+
+    # Shared noise fields: fine grain for stone faces, coarse patches for moss
+    grain = tileable_value_noise(size, max(4, size // 8), rng, octaves=3)
+    patches = tileable_value_noise(size, 6, rng, octaves=4)
+
+    # Stone faces are bevelled towards their joints
+    bevel_width = params["mortar_width"] * 1.5
+    bevel = np.clip((edge_distance - params["mortar_width"] / 2.0) / bevel_width, 0.0, 1.0)
+    bevel = bevel * bevel * (3.0 - 2.0 * bevel)
+    height = (stone_level * bevel + (grain - 0.5) * 0.08) * (1.0 - mortar) + 0.15 * mortar
+
+    # Moss prefers mortar, the upper edges of stones and the top of the wall
     if moss_amount > 0:
-        # Create a moss layer
-        moss_img = Image.new("RGBA", (TEXTURE_SIZE, TEXTURE_SIZE), (0, 0, 0, 0))
-        moss_draw = ImageDraw.Draw(moss_img)
-        
-        # Moss color
-        moss_color = (80, 120, 40, int(100 * moss_amount))  # Semi-transparent green
-        
-        # Add moss patches
-        num_patches = int(30 * moss_amount)
-        for _ in range(num_patches):
-            x = random.randint(0, TEXTURE_SIZE - 1)
-            y = random.randint(0, TEXTURE_SIZE - 1)
-            size = random.randint(10, 40)
-            
-            # More moss at the top of the wall (where water collects)
-            if y > TEXTURE_SIZE // 2 and random.random() > 0.3:
+        top_of_wall = (1.0 - (np.arange(size, dtype=np.float32) + 0.5) / size)[:, None]
+        growth = 0.5 * mortar + 0.4 * upper + 0.5 * top_of_wall ** 2
+        clumps = np.clip((patches - 0.35) / 0.4, 0.0, 1.0)
+        moss = np.clip((clumps * growth - (1.0 - moss_amount) * 0.5) / 0.1, 0.0, 1.0)
+    else:
+        moss = np.zeros((size, size), dtype=np.float32)
+    height = np.clip(height + moss * 0.05, 0.0, 1.0)
+
+    # Albedo: speckled, bevel-shaded stones over mortar, with moss on top
+    stones = stone_colors * (0.85 + 0.3 * grain[..., None]) * (0.85 + 0.15 * bevel[..., None])
+    albedo = stones + (mortar_color * (0.9 + 0.2 * grain[..., None]) - stones) * mortar[..., None]
+    moss_color = np.array((80, 120, 40), dtype=np.float32) * (0.75 + 0.5 * patches[..., None])
+    albedo += (moss_color - albedo) * (moss * 0.85)[..., None]
+
+    return {
+        "albedo": np.clip(albedo + 0.5, 0, 255).astype(np.uint8),
+        "mortar": mortar.astype(np.float32),
+        "height": height.astype(np.float32),
+        "moss": moss.astype(np.float32),
+        "stone_id": stone_id,
+        "course": course_map,
+    }
+
+def generate_medieval_wall(material="stone", moss_amount=0.3, bond=None, size=TEXTURE_SIZE):
+    """Generate a medieval wall texture"""
+    maps = generate_masonry_maps(material, moss_amount, bond, size)
+    return Image.fromarray(maps["albedo"], "RGB")
+
+def generate_medieval_wall_variants(material="stone", count=4, moss_amount=0.3, bond=None, size=TEXTURE_SIZE):
+    """Generate a batch of wall variants for the enclosure from one reproducible seed sequence"""
+    seeds = np.random.SeedSequence(random.getrandbits(32)).spawn(count)
+    return [
+        generate_masonry_maps(material, moss_amount, bond, size, rng=np.random.default_rng(seed))
+        for seed in seeds
+    ]
+
+# Symbols are described once as vector paths in normalised (0-1) coordinates.
+# Each symbol is a list of layers painted in order; a layer is a colour role
+# ("primary", "background" or an explicit RGB tuple) and a list of closed paths.
+# Path commands: ("M", x, y), ("L", x, y), ("C", x1, y1, x2, y2, x, y) for
+# cubic Beziers and ("A", cx, cy, r, start_deg, end_deg) for circular arcs.
+SYMBOL_SUPERSAMPLE = 4
+SYMBOL_CACHE_SIZE = 64
+
+def _rect_path(x0, y0, x1, y1):
+    """Closed rectangle path"""
+    return [("M", x0, y0), ("L", x1, y0), ("L", x1, y1), ("L", x0, y1)]
+
+def _circle_path(cx, cy, r):
+    """Closed circle path"""
+    return [("A", cx, cy, r, 0.0, 360.0)]
+
+def _stroke_path(x0, y0, x1, y1, width):
+    """Closed path outlining a straight stroke of the given width"""
+    length = math.hypot(x1 - x0, y1 - y0) or 1.0
+    nx = -(y1 - y0) / length * width / 2.0
+    ny = (x1 - x0) / length * width / 2.0
+    return [("M", x0 + nx, y0 + ny), ("L", x1 + nx, y1 + ny), ("L", x1 - nx, y1 - ny), ("L", x0 - nx, y0 - ny)]
+
+def _build_symbol_paths():
+    """Describe every symbol as layered vector paths"""
+    c = 0.5
+    s = 1.0 / 3.0
+    symbols = {}
+
+    # Cross (symbol of Christianity)
+    symbols["cross"] = [
+        ("primary", [
+            _rect_path(c - 1.0 / 12.0, 1.0 / 8.0, c + 1.0 / 12.0, 7.0 / 8.0),
+            _rect_path(0.25, 1.0 / 3.0, 0.75, 0.5),
+        ]),
+    ]
+
+    # Fleur-de-lis (symbol of royalty and the Virgin Mary)
+    central_petal = [
+        ("M", c - s / 8, c),
+        ("C", c - s / 3, c - s / 2.5, c - s / 6, c - s * 0.8, c, c - s),
+        ("C", c + s / 6, c - s * 0.8, c + s / 3, c - s / 2.5, c + s / 8, c),
+    ]
+    left_petal = [
+        ("M", c - s / 10, c - s / 6),
+        ("C", c - s / 2, c - s * 0.7, c - s * 1.05, c - s * 0.55, c - s * 0.95, c + s * 0.05),
+        ("C", c - s * 0.85, c - s * 0.3, c - s / 2, c - s / 4, c - s / 10, c + s / 8),
+    ]
+    right_petal = [(cmd[0],) + tuple(1.0 - v if i % 2 == 0 else v for i, v in enumerate(cmd[1:])) for cmd in left_petal]
+    symbols["fleur_de_lis"] = [
+        ("primary", [
+            central_petal,
+            left_petal,
+            right_petal,
+            _rect_path(c - s / 8, c, c + s / 8, c + s),  # Stem
+            _rect_path(c - s / 2.5, c + s / 10, c + s / 2.5, c + s / 4),  # Band
+            [("M", c - s / 3, c + s), ("L", c + s / 3, c + s), ("L", c + s / 2, c + s * 1.2), ("L", c - s / 2, c + s * 1.2)],  # Base
+        ]),
+    ]
+
+    # Stylized rose (symbol of the Virgin Mary)
+    petals = [
+        _circle_path(c + s * 0.7 * math.cos(2 * math.pi * i / 8), c + s * 0.7 * math.sin(2 * math.pi * i / 8), s / 2)
+        for i in range(8)
+    ]
+    left_leaf = [
+        ("M", c, c + s * 0.8),
+        ("C", c - s / 6, c + s * 0.6, c - s / 3, c + s * 0.65, c - s / 3, c + s * 0.7),
+        ("C", c - s / 3, c + s * 0.85, c - s / 5, c + s, c, c + s * 0.8),
+    ]
+    right_leaf = [
+        ("M", c, c + s * 0.9),
+        ("C", c + s / 6, c + s * 0.7, c + s / 3, c + s * 0.75, c + s / 3, c + s * 0.8),
+        ("C", c + s / 3, c + s * 0.95, c + s / 5, c + s * 1.1, c, c + s * 0.9),
+    ]
+    symbols["rose"] = [
+        ("primary", petals),
+        ("background", [_circle_path(c, c, s / 3)]),  # Center
+        ((0, 100, 0), [_rect_path(c - s / 16, c + s / 2, c + s / 16, c + s * 1.2)]),  # Green stem
+        ((0, 120, 0), [left_leaf, right_leaf]),  # Leaves
+    ]
+
+    # Geometric lattice (common in Islamic and some Christian gardens)
+    width = 1.0 / 64.0
+    cell = 1.0 / 4.0
+    strokes = []
+    for i in range(5):
+        strokes.append(_stroke_path(0.0, i * cell, 1.0, i * cell, width))
+        strokes.append(_stroke_path(i * cell, 0.0, i * cell, 1.0, width))
+    for i in range(4):
+        for j in range(4):
+            strokes.append(_stroke_path(i * cell, j * cell, (i + 1) * cell, (j + 1) * cell, width))
+            strokes.append(_stroke_path((i + 1) * cell, j * cell, i * cell, (j + 1) * cell, width))
+    symbols["geometric"] = [("primary", strokes)]
+
+    return symbols
+
+SYMBOL_PATHS = _build_symbol_paths()
+
+def _flatten_path(commands, pixels):
+    """Flatten a path's lines, Beziers and arcs into a polygon (normalised coordinates)"""
+    points = []
+    # Enough segments that each stays around two pixels long at this size
+    for command in commands:
+        kind = command[0]
+        if kind in ("M", "L"):
+            points.append(command[1:3])
+        elif kind == "C":
+            x0, y0 = points[-1]
+            x1, y1, x2, y2, x3, y3 = command[1:]
+            length = math.hypot(x1 - x0, y1 - y0) + math.hypot(x2 - x1, y2 - y1) + math.hypot(x3 - x2, y3 - y2)
+            steps = max(4, int(length * pixels / 2))
+            t = np.linspace(0.0, 1.0, steps + 1)[1:, None]
+            curve = ((1 - t) ** 3 * (x0, y0) + 3 * (1 - t) ** 2 * t * (x1, y1)
+                     + 3 * (1 - t) * t ** 2 * (x2, y2) + t ** 3 * (x3, y3))
+            points.extend(map(tuple, curve))
+        elif kind == "A":
+            cx, cy, r, start, end = command[1:]
+            sweep = math.radians(end - start)
+            steps = max(8, int(abs(sweep) * r * pixels / 2))
+            angles = math.radians(start) + np.linspace(0.0, sweep, steps + 1)
+            points.extend(zip(cx + r * np.cos(angles), cy + r * np.sin(angles)))
+    return np.array(points, dtype=np.float64)
+
+@functools.lru_cache(maxsize=SYMBOL_CACHE_SIZE)
+def symbol_layer_masks(symbol_type, size=TEXTURE_SIZE, transform=(1.0, 0.0, 0.0, 0.0)):
+    """Rasterise a symbol's layers into anti-aliased coverage masks.
+
+    `transform` is (scale, rotation in degrees, x offset, y offset) about the
+    symbol's centre, in normalised units. Results are cached per
+    (symbol, size, transform); the returned masks are read-only.
+    """
+    scale, rotation, offset_x, offset_y = transform
+    cos_r = math.cos(math.radians(rotation)) * scale
+    sin_r = math.sin(math.radians(rotation)) * scale
+    pixels = size * SYMBOL_SUPERSAMPLE
+
+    layers = []
+    for role, paths in SYMBOL_PATHS[symbol_type]:
+        # Fill every path at the supersampled resolution, then box-filter down
+        # so each output pixel holds its fractional coverage
+        canvas = Image.new("L", (pixels, pixels), 0)
+        draw = ImageDraw.Draw(canvas)
+        for path in paths:
+            points = _flatten_path(path, size * scale) - 0.5
+            x = (points[:, 0] * cos_r - points[:, 1] * sin_r + 0.5 + offset_x) * pixels
+            y = (points[:, 0] * sin_r + points[:, 1] * cos_r + 0.5 + offset_y) * pixels
+            draw.polygon(list(zip(x.tolist(), y.tolist())), fill=255)
+
+        mask = np.asarray(canvas.reduce(SYMBOL_SUPERSAMPLE), dtype=np.float32) / 255.0
+        mask.setflags(write=False)
+        layers.append((role, mask))
+
+    return tuple(layers)
+
+def composite_symbol(image, symbol_type, color1, color2=None, position=(0, 0), size=None, transform=(1.0, 0.0, 0.0, 0.0)):
+    """Paint a cached symbol onto an RGB image at the given position and size"""
+    size = size or min(image.size)
+    pixels = np.asarray(image.convert("RGB"), dtype=np.float32).copy()
+
+    for role, mask in symbol_layer_masks(symbol_type, size, tuple(transform)):
+        if role == "primary":
+            color = color1
+        elif role == "background":
+            if color2 is None:
                 continue
-            
-            # Draw moss patch
-            for dx in range(-size, size + 1):
-                for dy in range(-size, size + 1):
-                    dist = math.sqrt(dx * dx + dy * dy)
-                    if dist <= size and x + dx >= 0 and x + dx < TEXTURE_SIZE and y + dy >= 0 and y + dy < TEXTURE_SIZE:
-                        # Fade out at the edges
-                        alpha = int(moss_color[3] * (1 - dist / size))
-                        moss_draw.point((x + dx, y + dy), fill=(moss_color[0], moss_color[1], moss_color[2], alpha))
-        
-        # Composite moss with the wall
-        img = Image.alpha_composite(img.convert("RGBA"), moss_img)
-        img = img.convert("RGB")
-    
-    # Add some weathering
-    img = add_texture_variation(img, variation_type="spots", intensity=0.3)
-    
-    return img
+            color = color2
+        else:
+            color = role
+        blend_mask_in_place(pixels, mask, position[0], position[1], color)
+
+    return Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), "RGB")
 
-def generate_symbolic_pattern(symbol_type="cross", color1=(180, 30, 30), color2=(255, 255, 255)):
+def generate_symbolic_pattern(symbol_type="cross", color1=(180, 30, 30), color2=(255, 255, 255), size=TEXTURE_SIZE):
     """Generate a symbolic pattern common in medieval religious gardens"""
-    img = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE))
-    draw = ImageDraw.Draw(img)
-    
     # Fill with background color
-    draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=color2)
-    
-    if symbol_type == "cross":
-        # Draw a cross (symbol of Christianity)
-        cross_width = TEXTURE_SIZE // 6
-        vertical_height = TEXTURE_SIZE * 3 // 4
-        horizontal_width = TEXTURE_SIZE // 2
-        
-        # Vertical part
-        draw.rectangle(
-            (TEXTURE_SIZE // 2 - cross_width // 2, 
-             TEXTURE_SIZE // 8, 
-             TEXTURE_SIZE // 2 + cross_width // 2, 
-             TEXTURE_SIZE // 8 + vertical_height),
-            fill=color1
-        )
-        
-        # Horizontal part
-        draw.rectangle(
-            (TEXTURE_SIZE // 2 - horizontal_width // 2, 
-             TEXTURE_SIZE // 3, 
-             TEXTURE_SIZE // 2 + horizontal_width // 2, 
-             TEXTURE_SIZE // 3 + cross_width),
-            fill=color1
-        )
-    
-    elif symbol_type == "fleur_de_lis":
-        # Draw a fleur-de-lis (symbol of royalty and the Virgin Mary)
-        center_x = TEXTURE_SIZE // 2
-        center_y = TEXTURE_SIZE // 2
-        size = TEXTURE_SIZE // 3
-        
-        # Draw the central petal
-        points = [
-            (center_x, center_y - size),
-            (center_x - size // 4, center_y - size // 2),
-            (center_x - size // 8, center_y),
-            (center_x + size // 8, center_y),
-            (center_x + size // 4, center_y - size // 2),
-        ]
-        draw.polygon(points, fill=color1)
-        
-        # Draw the left petal
-        points = [
-            (center_x, center_y),
-            (center_x - size // 2, center_y - size // 4),
-            (center_x - size, center_y - size // 2),
-            (center_x - size // 2, center_y + size // 4),
-        ]
-        draw.polygon(points, fill=color1)
-        
-        # Draw the right petal
-        points = [
-            (center_x, center_y),
-            (center_x + size // 2, center_y - size // 4),
-            (center_x + size, center_y - size // 2),
-            (center_x + size // 2, center_y + size // 4),
-        ]
-        draw.polygon(points, fill=color1)
-        
-        # Draw the stem
-        draw.rectangle(
-            (center_x - size // 8, center_y, center_x + size // 8, center_y + size),
-            fill=color1
-        )
-        
-        # Draw the base
-        points = [
-            (center_x - size // 3, center_y + size),
-            (center_x + size // 3, center_y + size),
-            (center_x + size // 2, center_y + size * 1.2),
-            (center_x - size // 2, center_y + size * 1.2),
-        ]
-        draw.polygon(points, fill=color1)
+    img = Image.new("RGB", (size, size), color2)
     
-    elif symbol_type == "rose":
-        # Draw a stylized rose (symbol of the Virgin Mary)
-        center_x = TEXTURE_SIZE // 2
-        center_y = TEXTURE_SIZE // 2
-        size = TEXTURE_SIZE // 3
-        
-        # Draw petals
-        num_petals = 8
-        for i in range(num_petals):
-            angle = 2 * math.pi * i / num_petals
-            petal_x = center_x + int(size * 0.7 * math.cos(angle))
-            petal_y = center_y + int(size * 0.7 * math.sin(angle))
-            petal_size = size // 2
-            
-            draw.ellipse(
-                (petal_x - petal_size, petal_y - petal_size, 
-                 petal_x + petal_size, petal_y + petal_size),
-                fill=color1
-            )
-        
-        # Draw center
-        draw.ellipse(
-            (center_x - size // 3, center_y - size // 3, 
-             center_x + size // 3, center_y + size // 3),
-            fill=color2
-        )
-        
-        # Draw stem
-        draw.rectangle(
-            (center_x - size // 16, center_y + size // 2, 
-             center_x + size // 16, center_y + size * 1.2),
-            fill=(0, 100, 0)  # Green stem
-        )
-        
-        # Draw leaves
-        leaf_size = size // 3
-        # Left leaf
-        points = [
-            (center_x, center_y + size * 0.8),
-            (center_x - leaf_size, center_y + size * 0.7),
-            (center_x - leaf_size // 2, center_y + size),
-        ]
-        draw.polygon(points, fill=(0, 120, 0))
-        
-        # Right leaf
-        points = [
-            (center_x, center_y + size * 0.9),
-            (center_x + leaf_size, center_y + size * 0.8),
-            (center_x + leaf_size // 2, center_y + size * 1.1),
-        ]
-        draw.polygon(points, fill=(0, 120, 0))
-    
-    elif symbol_type == "geometric":
-        # Draw a geometric pattern (common in Islamic and some Christian gardens)
-        # This is a simplified version of complex geometric patterns
-        
-        # Draw grid lines
-        line_width = TEXTURE_SIZE // 64
-        grid_size = 4
-        cell_size = TEXTURE_SIZE // grid_size
-        
-        for i in range(grid_size + 1):
-            # Horizontal lines
-            draw.line(
-                [(0, i * cell_size), (TEXTURE_SIZE, i * cell_size)],
-                fill=color1,
-                width=line_width
-            )
-            
-            # Vertical lines
-            draw.line(
-                [(i * cell_size, 0), (i * cell_size, TEXTURE_SIZE)],
-                fill=color1,
-                width=line_width
-            )
-        
-        # Draw diagonal lines
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Diagonal from top-left to bottom-right
-                draw.line(
-                    [(i * cell_size, j * cell_size), 
-                     ((i + 1) * cell_size, (j + 1) * cell_size)],
-                    fill=color1,
-                    width=line_width
-                )
-                
-                # Diagonal from top-right to bottom-left
-                draw.line(
-                    [((i + 1) * cell_size, j * cell_size), 
-                     (i * cell_size, (j + 1) * cell_size)],
-                    fill=color1,
-                    width=line_width
-                )
+    if symbol_type in SYMBOL_PATHS:
+        img = composite_symbol(img, symbol_type, color1, color2, size=size)
     
     # Add some texture and noise
-    img = add_noise(img, intensity=0.05)
+    pixels = np.asarray(img, dtype=np.float32).copy()
+    add_array_noise(pixels, 0.05, np.random.default_rng(random.getrandbits(32)))
     
-    return img
+    return Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), "RGB")
+
+def _paint_region(maps, coverage, color, level, water=0.0):
+    """Paint one fountain region into the albedo, height and water maps through its coverage"""
+    weight = np.asarray(coverage, dtype=np.float32)
+    maps["albedo"] += (np.asarray(color, dtype=np.float32) - maps["albedo"]) * weight[..., None]
+    maps["height"] += (np.asarray(level, dtype=np.float32) - maps["height"]) * weight
+    maps["water"] += (np.float32(water) - maps["water"]) * weight
+
+def _ring_coverage(distance, radius, width, size):
+    """Anti-aliased coverage of a ring of the given radius and width (normalised units)"""
+    return _coverage_from_distance(np.abs(distance - radius) - width / 2.0, size)
+
+def generate_fountain_maps(style="simple", size=TEXTURE_SIZE, rng=None):
+    """Generate a fountain (top-down view) as albedo, height and water mask maps.
+
+    Every style is a set of radial/angular (or, for wall fountains, vertical)
+    profile functions evaluated over the whole grid in one vectorised pass.
+    Height is 0-1 with the basin floor low and the rims high; the water mask
+    is 1 wherever the shader should treat the surface as water.
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(32))
 
-def generate_medieval_fountain(style="simple"):
-    """Generate a medieval fountain texture (top-down view)"""
-    img = Image.new("RGB", (TEXTURE_SIZE, TEXTURE_SIZE))
-    draw = ImageDraw.Draw(img)
-    
     # Background color (usually stone)
-    bg_color = random.choice(base_generator.PALETTES["stone"])
-    draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE), fill=bg_color)
-    
+    bg_color = np.array(random.choice(base_generator.PALETTES["stone"]), dtype=np.float32)
     # Water color
-    water_color = (80, 120, 180)  # Blue water
-    
+    water_color = np.array((80, 120, 180), dtype=np.float32)  # Blue water
+    def lighter(color, amount):
+        return np.minimum(color + amount, 255.0)
+
+    # Polar grid around the centre, in normalised units
+    coords = (np.arange(size, dtype=np.float32) + 0.5) / size
+    u = coords[None, :]
+    v = coords[:, None]
+    du = u - 0.5
+    dv = v - 0.5
+    radius = np.sqrt(du * du + dv * dv)
+    theta = np.mod(np.arctan2(dv, du), 2.0 * math.pi)
+    pixel = 1.0 / size
+
+    # Stone weathering, shared by every style
+    weathering = tileable_value_noise(size, 8, rng, octaves=4)
+
+    maps = {
+        "albedo": np.broadcast_to(bg_color, (size, size, 3)).copy(),
+        "height": np.full((size, size), 0.3, dtype=np.float32),
+        "water": np.zeros((size, size), dtype=np.float32),
+    }
+
     if style == "simple":
         # Simple circular fountain
-        center_x = TEXTURE_SIZE // 2
-        center_y = TEXTURE_SIZE // 2
-        outer_radius = TEXTURE_SIZE // 3
-        inner_radius = TEXTURE_SIZE // 4
-        
-        # Outer stone rim
-        draw.ellipse(
-            (center_x - outer_radius, center_y - outer_radius,
-             center_x + outer_radius, center_y + outer_radius),
-            fill=bg_color,
-            outline=(bg_color[0] - 20, bg_color[1] - 20, bg_color[2] - 20),
-            width=3
-        )
-        
-        # Inner water pool
-        draw.ellipse(
-            (center_x - inner_radius, center_y - inner_radius,
-             center_x + inner_radius, center_y + inner_radius),
-            fill=water_color
-        )
-        
+        outer_radius = 1.0 / 3.0
+        inner_radius = 1.0 / 4.0
+
+        # Outer stone rim with a rounded profile and a darker outline
+        rim = _coverage_from_distance(radius - outer_radius, size)
+        rim_t = np.clip((radius - inner_radius) / (outer_radius - inner_radius), 0.0, 1.0)
+        _paint_region(maps, rim, bg_color, 0.6 + 0.3 * np.sin(math.pi * rim_t))
+        _paint_region(maps, _ring_coverage(radius, outer_radius - 1.5 * pixel, 3 * pixel, size), bg_color * 0.88, 0.6)
+
+        # Inner water pool, deepest at the centre
+        pool = _coverage_from_distance(radius - inner_radius, size)
+        _paint_region(maps, pool, water_color, 0.1 + 0.1 * radius / inner_radius, water=1.0)
+
         # Add water ripples
+        ripples = np.zeros_like(radius)
         for i in range(3):
-            ripple_radius = inner_radius * (0.7 - i * 0.15)
-            draw.ellipse(
-                (center_x - ripple_radius, center_y - ripple_radius,
-                 center_x + ripple_radius, center_y + ripple_radius),
-                outline=(water_color[0] + 40, water_color[1] + 40, water_color[2] + 40),
-                width=2
-            )
-        
+            ripples = np.maximum(ripples, _ring_coverage(radius, inner_radius * (0.7 - i * 0.15), 2 * pixel, size))
+        _paint_region(maps, ripples * pool, lighter(water_color, 40), maps["height"] + 0.02, water=1.0)
+
         # Add central water jet
-        jet_width = TEXTURE_SIZE // 40
-        draw.ellipse(
-            (center_x - jet_width, center_y - jet_width,
-             center_x + jet_width, center_y + jet_width),
-            fill=(water_color[0] + 60, water_color[1] + 60, water_color[2] + 60)
-        )
-    
+        jet = _coverage_from_distance(radius - 1.0 / 40.0, size)
+        _paint_region(maps, jet, lighter(water_color, 60), 0.5, water=1.0)
+
     elif style == "ornate":
         # More complex ornate fountain with multiple basins
-        center_x = TEXTURE_SIZE // 2
-        center_y = TEXTURE_SIZE // 2
-        
-        # Outer stone structure (octagonal)
-        outer_radius = TEXTURE_SIZE // 3
-        points = []
-        for i in range(8):
-            angle = 2 * math.pi * i / 8
-            x = center_x + int(outer_radius * math.cos(angle))
-            y = center_y + int(outer_radius * math.sin(angle))
-            points.append((x, y))
-        
-        draw.polygon(points, fill=bg_color, outline=(bg_color[0] - 30, bg_color[1] - 30, bg_color[2] - 30), width=3)
-        
+        outer_radius = 1.0 / 3.0
+
+        # Outer stone structure (octagonal), as a radial edge function of the angle
+        sector = 2.0 * math.pi / 8
+        octagon_edge = outer_radius * math.cos(sector / 2) / np.cos(np.mod(theta, sector) - sector / 2)
+        octagon_distance = (radius - octagon_edge) * math.cos(sector / 2)
+        _paint_region(maps, _coverage_from_distance(octagon_distance, size), bg_color, 0.7)
+        outline = _coverage_from_distance(np.abs(octagon_distance + 1.5 * pixel) - 1.5 * pixel, size)
+        _paint_region(maps, outline, bg_color * 0.82, 0.75)
+
         # Middle basin (circular)
-        middle_radius = TEXTURE_SIZE // 4
-        draw.ellipse(
-            (center_x - middle_radius, center_y - middle_radius,
-             center_x + middle_radius, center_y + middle_radius),
-            fill=(bg_color[0] - 10, bg_color[1] - 10, bg_color[2] - 10)
-        )
-        
+        middle_radius = 1.0 / 4.0
+        _paint_region(maps, _coverage_from_distance(radius - middle_radius, size), bg_color * 0.93, 0.5)
+
         # Inner water pool
-        inner_radius = TEXTURE_SIZE // 5
-        draw.ellipse(
-            (center_x - inner_radius, center_y - inner_radius,
-             center_x + inner_radius, center_y + inner_radius),
-            fill=water_color
-        )
-        
+        inner_radius = 1.0 / 5.0
+        _paint_region(maps, _coverage_from_distance(radius - inner_radius, size), water_color,
+                      0.1 + 0.1 * radius / inner_radius, water=1.0)
+
         # Central pedestal
-        pedestal_radius = TEXTURE_SIZE // 12
-        draw.ellipse(
-            (center_x - pedestal_radius, center_y - pedestal_radius,
-             center_x + pedestal_radius, center_y + pedestal_radius),
-            fill=(bg_color[0] - 20, bg_color[1] - 20, bg_color[2] - 20)
-        )
-        
-        # Add water jets and ripples
-        for i in range(8):
-            angle = 2 * math.pi * i / 8
-            jet_x = center_x + int(inner_radius * 0.7 * math.cos(angle))
-            jet_y = center_y + int(inner_radius * 0.7 * math.sin(angle))
-            jet_size = TEXTURE_SIZE // 60
-            
-            # Small water jet
-            draw.ellipse(
-                (jet_x - jet_size, jet_y - jet_size,
-                 jet_x + jet_size, jet_y + jet_size),
-                fill=(water_color[0] + 60, water_color[1] + 60, water_color[2] + 60)
-            )
-            
-            # Ripples around jet
-            for r in range(2):
-                ripple_radius = jet_size * (3 + r * 2)
-                draw.ellipse(
-                    (jet_x - ripple_radius, jet_y - ripple_radius,
-                     jet_x + ripple_radius, jet_y + ripple_radius),
-                    outline=(water_color[0] + 40, water_color[1] + 40, water_color[2] + 40),
-                    width=1
-                )
-        
+        pedestal_radius = 1.0 / 12.0
+        _paint_region(maps, _coverage_from_distance(radius - pedestal_radius, size), bg_color * 0.88, 0.8)
+
+        # Water jets and ripples around the nearest of the eight jets
+        jet_index = np.round(theta / sector)
+        jet_u = 0.5 + inner_radius * 0.7 * np.cos(jet_index * sector)
+        jet_v = 0.5 + inner_radius * 0.7 * np.sin(jet_index * sector)
+        jet_distance = np.sqrt((u - jet_u) ** 2 + (v - jet_v) ** 2)
+        jet_size = 1.0 / 60.0
+        ripples = np.maximum(_ring_coverage(jet_distance, jet_size * 3, pixel, size),
+                             _ring_coverage(jet_distance, jet_size * 5, pixel, size))
+        _paint_region(maps, ripples * maps["water"], lighter(water_color, 40), maps["height"] + 0.02, water=1.0)
+        _paint_region(maps, _coverage_from_distance(jet_distance - jet_size, size), lighter(water_color, 60), 0.4, water=1.0)
+
         # Central water jet
-        center_jet_size = TEXTURE_SIZE // 30
-        draw.ellipse(
-            (center_x - center_jet_size, center_y - center_jet_size,
-             center_x + center_jet_size, center_y + center_jet_size),
-            fill=(water_color[0] + 70, water_color[1] + 70, water_color[2] + 70)
-        )
-    
+        _paint_region(maps, _coverage_from_distance(radius - 1.0 / 30.0, size), lighter(water_color, 70), 0.9, water=1.0)
+
     elif style == "wall":
-        # Wall fountain (common in medieval gardens)
-        # Background wall
-        wall_color = (bg_color[0] - 20, bg_color[1] - 20, bg_color[2] - 20)
-        draw.rectangle((0, 0, TEXTURE_SIZE, TEXTURE_SIZE * 2 // 3), fill=wall_color)
-        
-        # Basin at bottom
-        basin_height = TEXTURE_SIZE // 3
-        draw.rectangle((0, TEXTURE_SIZE * 2 // 3, TEXTURE_SIZE, TEXTURE_SIZE), fill=bg_color)
-        
+        # Wall fountain (common in medieval gardens), laid out along the vertical axis
+        wall_top = 2.0 / 3.0
+        basin_height = 1.0 / 3.0
+        water_top = wall_top + basin_height * 1.0 / 3.0
+
+        # Background wall and basin at bottom
+        _paint_region(maps, _coverage_from_distance(v - wall_top, size), bg_color * 0.88, 0.9)
+        _paint_region(maps, _coverage_from_distance(wall_top - v, size), bg_color, 0.45)
+
         # Water in basin
-        water_height = basin_height * 2 // 3
-        draw.rectangle((TEXTURE_SIZE // 8, TEXTURE_SIZE * 2 // 3 + basin_height - water_height, 
-                        TEXTURE_SIZE * 7 // 8, TEXTURE_SIZE), fill=water_color)
-        
+        water = np.minimum(_coverage_from_distance(water_top - v, size),
+                           _coverage_from_distance(np.abs(u - 0.5) - 3.0 / 8.0, size))
+        _paint_region(maps, water, water_color, 0.15, water=1.0)
+
         # Wall spout
-        spout_width = TEXTURE_SIZE // 10
-        spout_height = TEXTURE_SIZE // 15
-        spout_x = TEXTURE_SIZE // 2
-        spout_y = TEXTURE_SIZE * 2 // 3 - spout_height
-        
-        # Spout structure
-        draw.rectangle(
-            (spout_x - spout_width // 2, spout_y,
-             spout_x + spout_width // 2, spout_y + spout_height),
-            fill=(bg_color[0] - 40, bg_color[1] - 40, bg_color[2] - 40)
-        )
-        
+        spout_width = 1.0 / 10.0
+        spout_height = 1.0 / 15.0
+        spout_top = wall_top - spout_height
+        spout = np.minimum(_coverage_from_distance(np.abs(u - 0.5) - spout_width / 2, size),
+                           _coverage_from_distance(np.abs(v - (spout_top + spout_height / 2)) - spout_height / 2, size))
+        _paint_region(maps, spout, bg_color * 0.76, 1.0)
+
         # Water stream
-        stream_width = spout_width // 3
-        draw.rectangle(
-            (spout_x - stream_width // 2, spout_y + spout_height,
-             spout_x + stream_width // 2, TEXTURE_SIZE * 2 // 3 + basin_height - water_height),
-            fill=(water_color[0] + 30, water_color[1] + 30, water_color[2] + 30)
-        )
-        
-        # Add ripples where water hits the basin
-        ripple_y = TEXTURE_SIZE * 2 // 3 + basin_height - water_height
+        stream_width = spout_width / 3
+        stream = np.minimum(_coverage_from_distance(np.abs(u - 0.5) - stream_width / 2, size),
+                            _coverage_from_distance(np.abs(v - (wall_top + water_top) / 2) - (water_top - wall_top) / 2, size))
+        _paint_region(maps, stream, lighter(water_color, 30), 0.6, water=1.0)
+
+        # Add ripples where water hits the basin (flattened ellipses)
+        ellipse_distance = np.sqrt((u - 0.5) ** 2 + (4.0 * (v - water_top)) ** 2)
+        ripples = np.zeros_like(ellipse_distance)
         for i in range(3):
-            ripple_width = stream_width * (2 + i)
-            draw.ellipse(
-                (spout_x - ripple_width, ripple_y - ripple_width // 4,
-                 spout_x + ripple_width, ripple_y + ripple_width // 4),
-                outline=(water_color[0] + 50, water_color[1] + 50, water_color[2] + 50),
-                width=1
-            )
-        
-        # Decorative elements on wall
-        # Simple arch above spout
-        arch_width = spout_width * 2
-        arch_height = TEXTURE_SIZE // 8
-        draw.arc(
-            (spout_x - arch_width // 2, spout_y - arch_height,
-             spout_x + arch_width // 2, spout_y + arch_height),
-            180, 0,
-            fill=(bg_color[0] - 30, bg_color[1] - 30, bg_color[2] - 30),
-            width=2
-        )
-    
-    # Add some texture and weathering
-    img = add_texture_variation(img, variation_type="spots", intensity=0.2)
-    img = add_noise(img, intensity=0.05)
-    
-    return img
+            ripples = np.maximum(ripples, _ring_coverage(ellipse_distance, stream_width * (2 + i), pixel, size))
+        _paint_region(maps, ripples * water, lighter(water_color, 50), 0.17, water=1.0)
 
-def generate_all_medieval_textures():
-    """Generate all medieval textures and save them to the appropriate directories"""
-    print("Generating medieval garden elements...")
+        # Decorative elements on wall: simple arch above spout
+        arch_distance = np.sqrt(((u - 0.5) / spout_width) ** 2 + ((v - spout_top) / (1.0 / 8.0)) ** 2)
+        arch = _ring_coverage(arch_distance, 1.0, 2 * pixel / spout_width, size * spout_width) * (v < spout_top)
+        _paint_region(maps, arch, bg_color * 0.82, 0.95)
+
+    # Add some texture and weathering to the stone (water stays clean)
+    stone = 1.0 - maps["water"]
+    maps["albedo"] *= (1.0 + (weathering - 0.5) * 0.25 * stone)[..., None]
+    maps["height"] += (weathering - 0.5) * 0.04 * stone
+    add_array_noise(maps["albedo"], 0.05, rng)
+
+    maps["albedo"] = np.clip(maps["albedo"] + 0.5, 0, 255).astype(np.uint8)
+    maps["height"] = np.clip(maps["height"], 0.0, 1.0)
+    return maps
+
+def generate_medieval_fountain(style="simple", size=TEXTURE_SIZE):
+    """Generate a medieval fountain texture (top-down view)"""
+    maps = generate_fountain_maps(style, size)
+    return Image.fromarray(maps["albedo"], "RGB")
+
+# Every texture of the medieval garden pack, as
+# (category directory, file name, generator function, arguments); a generator
+# returns either an image or a dict of maps (see texture_maps)
+MEDIEVAL_TEXTURE_RECIPES = [
     # Garden elements
-    garden_herbs = generate_medieval_garden_bed("herbs")
-    garden_herbs.save(os.path.join(BASE_DIR, "garden_elements", "herb_bed.png"))
-    
-    garden_flowers = generate_medieval_garden_bed("flowers")
-    garden_flowers.save(os.path.join(BASE_DIR, "garden_elements", "flower_bed.png"))
-    
-    garden_vegetables = generate_medieval_garden_bed("vegetables")
-    garden_vegetables.save(os.path.join(BASE_DIR, "garden_elements", "vegetable_bed.png"))
-    
-    garden_mixed = generate_medieval_garden_bed("mixed")
-    garden_mixed.save(os.path.join(BASE_DIR, "garden_elements", "mixed_bed.png"))
-    
+    ("garden_elements", "herb_bed.png", generate_medieval_garden_bed, ("herbs",)),
+    ("garden_elements", "flower_bed.png", generate_medieval_garden_bed, ("flowers",)),
+    ("garden_elements", "vegetable_bed.png", generate_medieval_garden_bed, ("vegetables",)),
+    ("garden_elements", "mixed_bed.png", generate_medieval_garden_bed, ("mixed",)),
     # Paths
-    path_gravel = generate_medieval_path("gravel")
-    path_gravel.save(os.path.join(BASE_DIR, "garden_elements", "gravel_path.png"))
-    
-    path_earth = generate_medieval_path("earth")
-    path_earth.save(os.path.join(BASE_DIR, "garden_elements", "earth_path.png"))
-    
-    path_stone = generate_medieval_path("stone_dust")
-    path_stone.save(os.path.join(BASE_DIR, "garden_elements", "stone_path.png"))
-    
+    ("garden_elements", "gravel_path.png", generate_medieval_path, ("gravel",)),
+    ("garden_elements", "earth_path.png", generate_medieval_path, ("earth",)),
+    ("garden_elements", "stone_path.png", generate_medieval_path, ("stone_dust",)),
     # Geometric patterns
-    pattern_grid = generate_geometric_pattern("square_grid")
-    pattern_grid.save(os.path.join(BASE_DIR, "garden_elements", "square_grid_pattern.png"))
-    
-    pattern_cross = generate_geometric_pattern("cross")
-    pattern_cross.save(os.path.join(BASE_DIR, "garden_elements", "cross_pattern.png"))
-    
-    pattern_radial = generate_geometric_pattern("radial")
-    pattern_radial.save(os.path.join(BASE_DIR, "garden_elements", "radial_pattern.png"))
-    
-    pattern_knot = generate_geometric_pattern("knot_garden")
-    pattern_knot.save(os.path.join(BASE_DIR, "garden_elements", "knot_garden_pattern.png"))
-    
-    print("Generating medieval ornamental elements...")
+    ("garden_elements", "square_grid_pattern.png", generate_geometric_pattern, ("square_grid",)),
+    ("garden_elements", "cross_pattern.png", generate_geometric_pattern, ("cross",)),
+    ("garden_elements", "radial_pattern.png", generate_geometric_pattern, ("radial",)),
+    ("garden_elements", "knot_garden_pattern.png", generate_geometric_pattern, ("knot_garden",)),
     # Fountains
-    fountain_simple = generate_medieval_fountain("simple")
-    fountain_simple.save(os.path.join(BASE_DIR, "ornamental", "simple_fountain.png"))
-    
-    fountain_ornate = generate_medieval_fountain("ornate")
-    fountain_ornate.save(os.path.join(BASE_DIR, "ornamental", "ornate_fountain.png"))
-    
-    fountain_wall = generate_medieval_fountain("wall")
-    fountain_wall.save(os.path.join(BASE_DIR, "ornamental", "wall_fountain.png"))
-    
+    ("ornamental", "simple_fountain.png", generate_fountain_maps, ("simple",)),
+    ("ornamental", "ornate_fountain.png", generate_fountain_maps, ("ornate",)),
+    ("ornamental", "wall_fountain.png", generate_fountain_maps, ("wall",)),
     # Walls
-    wall_stone = generate_medieval_wall("stone")
-    wall_stone.save(os.path.join(BASE_DIR, "materials", "stone_wall.png"))
-    
-    wall_brick = generate_medieval_wall("brick")
-    wall_brick.save(os.path.join(BASE_DIR, "materials", "brick_wall.png"))
-    
-    wall_mossy = generate_medieval_wall("stone", 0.6)
-    wall_mossy.save(os.path.join(BASE_DIR, "materials", "mossy_wall.png"))
-    
-    print("Generating medieval symbolic elements...")
+    ("materials", "stone_wall.png", generate_masonry_maps, ("stone",)),
+    ("materials", "brick_wall.png", generate_masonry_maps, ("brick",)),
+    ("materials", "mossy_wall.png", generate_masonry_maps, ("stone", 0.6)),
     # Symbolic patterns
-    symbol_cross = generate_symbolic_pattern("cross")
-    symbol_cross.save(os.path.join(BASE_DIR, "symbolic", "cross_symbol.png"))
-    
-    symbol_fleur = generate_symbolic_pattern("fleur_de_lis")
-    symbol_fleur.save(os.path.join(BASE_DIR, "symbolic", "fleur_de_lis_symbol.png"))
-    
-    symbol_rose = generate_symbolic_pattern("rose")
-    symbol_rose.save(os.path.join(BASE_DIR, "symbolic", "rose_symbol.png"))
+    ("symbolic", "cross_symbol.png", generate_symbolic_pattern, ("cross",)),
+    ("symbolic", "fleur_de_lis_symbol.png", generate_symbolic_pattern, ("fleur_de_lis",)),
+    ("symbolic", "rose_symbol.png", generate_symbolic_pattern, ("rose",)),
+    ("symbolic", "geometric_symbol.png", generate_symbolic_pattern, ("geometric",)),
+]
+
+# Extra maps saved alongside a texture's albedo, as 8-bit greyscale PNGs in a
+# maps/ subdirectory, which keeps them out of the integrator's source listing.
+# A <stem>_maps.json record next to them holds the content hash of the albedo
+# they were saved with, so maps left stale by an edited albedo are ignored
+TEXTURE_MAP_NAMES = ("height", "mortar", "moss", "water")
+
+def texture_map_path(texture_path, name):
+    """Path of one of a texture's extra maps: <directory>/maps/<stem>_<name>.png"""
+    directory, filename = os.path.split(texture_path)
+    return os.path.join(directory, "maps", f"{os.path.splitext(filename)[0]}_{name}.png")
+
+def texture_maps_record_path(texture_path):
+    """Path of the record of the albedo a texture's extra maps were saved with"""
+    return os.path.splitext(texture_map_path(texture_path, "maps"))[0] + ".json"
+
+def texture_maps_current(texture_path, source_hash=None):
+    """Whether a texture's saved extra maps were saved with its current albedo"""
+    try:
+        with open(texture_maps_record_path(texture_path)) as f:
+            albedo_hash = json.load(f).get("albedo_hash")
+    except (OSError, ValueError):
+        return False
+    if source_hash is None:
+        source_hash = array_cache.file_hash(texture_path)
+    return albedo_hash == source_hash
+
+def texture_maps(generator, args):
+    """Run a recipe's generator, returning its maps: a uint8 RGB "albedo" plus any 0-1 float masks"""
+    result = generator(*args)
+    if isinstance(result, Image.Image):
+        return {"albedo": np.asarray(result.convert("RGB"))}
+    return result
+
+def texture_cache_key(source_hash):
+    """Array cache key of a saved texture's maps, from the content hash of its PNG"""
+    return array_cache.recipe_key("source", source_hash)
+
+def save_texture_maps(texture_path, maps):
+    """Save a texture's albedo, with its extra maps next to it; extra maps it no longer has are removed
+
+    The saved (uint8) arrays are also stored in the array cache under the
+    PNG's content hash, which is returned.
+    """
+    saved = {"albedo": np.asarray(maps["albedo"], dtype=np.uint8)}
+    Image.fromarray(saved["albedo"], "RGB").save(texture_path)
+    for name in TEXTURE_MAP_NAMES:
+        path = texture_map_path(texture_path, name)
+        if name in maps:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            saved[name] = np.clip(np.round(np.asarray(maps[name]) * 255), 0, 255).astype(np.uint8)
+            Image.fromarray(saved[name], "L").save(path)
+        elif os.path.exists(path):
+            os.remove(path)
     
-    symbol_geometric = generate_symbolic_pattern("geometric")
-    symbol_geometric.save(os.path.join(BASE_DIR, "symbolic", "geometric_symbol.png"))
+    source_hash = array_cache.file_hash(texture_path)
+    record_path = texture_maps_record_path(texture_path)
+    if len(saved) > 1:
+        with open(record_path, "w") as f:
+            json.dump({"albedo_hash": source_hash}, f)
+    elif os.path.exists(record_path):
+        os.remove(record_path)
+    key = texture_cache_key(source_hash)
+    for name, array in saved.items():
+        texture_cache.put(key, name, array)
+    return source_hash
+
+def load_texture_maps(texture_path, names=TEXTURE_MAP_NAMES, source_hash=None):
+    """Load a saved texture's albedo and the extra maps (of those in `names`) it has, as uint8 arrays
+
+    When the PNG's content hash is given, arrays are mapped from the array
+    cache, and ones that have to be decoded are stored there.  Extra maps on
+    disk that were saved with a different albedo (the texture was edited
+    since) are left out.
+    """
+    key = texture_cache_key(source_hash) if source_hash is not None else None
+    maps = {}
+    current = None
+    for name in ("albedo",) + tuple(names):
+        array = texture_cache.get(key, name) if key else None
+        if array is None:
+            path = texture_path if name == "albedo" else texture_map_path(texture_path, name)
+            if not os.path.exists(path):
+                continue
+            if name != "albedo":
+                if current is None:
+                    current = texture_maps_current(texture_path, source_hash)
+                if not current:
+                    continue
+            with Image.open(path) as img:
+                array = np.asarray(img if name == "albedo" else img.convert("L"))
+            if key:
+                texture_cache.put(key, name, array)
+        maps[name] = array
+    return maps
+
+CATEGORY_LABELS = {
+    "garden_elements": "garden elements",
+    "ornamental": "ornamental elements",
+    "materials": "materials",
+    "symbolic": "symbolic elements",
+}
+
+def generate_all_medieval_textures():
+    """Generate all medieval textures and save them to the appropriate directories"""
+    category = None
+    for directory, filename, generator, args in MEDIEVAL_TEXTURE_RECIPES:
+        if directory != category:
+            category = directory
+            print(f"Generating medieval {CATEGORY_LABELS[directory]}...")
+        save_texture_maps(os.path.join(BASE_DIR, directory, filename), texture_maps(generator, args))
     
     print("All medieval textures generated successfully!")
 
@@ -980,9 +1330,8 @@ if __name__ == "__main__":
             img.save(texture_path)
         
         elif texture_type == "fountain":
-            img = generate_medieval_fountain(variation)
             texture_path = os.path.join(BASE_DIR, "ornamental", f"{variation}_fountain.png")
-            img.save(texture_path)
+            save_texture_maps(texture_path, generate_fountain_maps(variation))
         
         elif texture_type == "wall":
             moss_amount = 0.3
@@ -990,9 +1339,8 @@ if __name__ == "__main__":
                 moss_amount = 0.6
                 variation = variation.replace("_mossy", "")
             
-            img = generate_medieval_wall(variation, moss_amount)
             texture_path = os.path.join(BASE_DIR, "materials", f"{variation}_wall.png")
-            img.save(texture_path)
+            save_texture_maps(texture_path, generate_masonry_maps(variation, moss_amount))
         
         elif texture_type == "symbol":
             img = generate_symbolic_pattern(variation)
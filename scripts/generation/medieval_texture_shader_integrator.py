@@ -1,7 +1,22 @@
 import os
 import sys
 import argparse
+import shutil
 import subprocess
+import json
+import struct
+import functools
+import hashlib
+import select
+import time
+import random
+import queue
+import threading
+import collections
+import ctypes
+import ctypes.util
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from PIL import Image, ImageFilter
 
 # Add the project root to the path so we can import our modules
@@ -10,6 +25,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import our texture generators
 import scripts.texture_generator as base_generator
 import scripts.medieval_texture_generator as medieval_generator
+import array_cache
 
 # Base directories
 BASE_TEXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
@@ -20,237 +36,1204 @@ OUTPUT_DIR = os.path.join(BASE_TEXTURE_DIR, "integrated_packs")
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def generate_normal_map(texture_path, strength=1.0):
-    """Generate a normal map from a texture using PIL"""
+# Manifest of integrated texture sets: source hash, parameters and outputs per set.
+# Sources are stored relative to the project root and outputs relative to
+# OUTPUT_DIR, so the manifest stays valid when the project is moved
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "texture_sets_manifest.json")
+
+# Decoded source arrays shared between stages, keyed by source content hash;
+# the generator fills the same cache as it saves textures
+ARRAY_CACHE_DIR = medieval_generator.ARRAY_CACHE_DIR
+intermediate_cache = medieval_generator.texture_cache
+
+# Bump when map derivation changes, so every set is rebuilt once
+INTEGRATION_VERSION = 1
+
+# Source directories of the medieval garden pack and their texture set prefixes
+TEXTURE_FAMILIES = [
+    ("garden_elements", "garden"),
+    ("ornamental", "ornamental"),
+    ("symbolic", "symbolic"),
+    ("materials", "material"),
+]
+
+# Derivative kernels for normal maps, as smoothing weights across the
+# derivative direction; all are normalised to the central-difference scale
+NORMAL_KERNELS = {
+    "central": (0, 1, 0),
+    "sobel": (1, 2, 1),
+    "scharr": (3, 10, 3),
+}
+
+def _shift(array, dy, dx, wrap=True):
+    """Return array[y + dy, x + dx], wrapping around or clamping at the edges"""
+    if wrap:
+        return np.roll(array, (-dy, -dx), axis=(0, 1))
+    height, width = array.shape
+    rows = np.clip(np.arange(height) + dy, 0, height - 1)
+    columns = np.clip(np.arange(width) + dx, 0, width - 1)
+    return array[np.ix_(rows, columns)]
+
+def normal_map_from_height(height, strength=1.0, kernel="sobel", scales=(1,), wrap=True,
+                           convention="opengl", dtype="uint8"):
+    """Compute a tangent-space normal map from a height array (0-255 units).
+
+    `scales` lists the pixel steps to differentiate over; several steps are
+    averaged to pick up broader shapes as well as fine detail.  `wrap`
+    treats the texture as tiling, otherwise edges are clamped.  The green
+    channel points up for "opengl" (Godot) and down for "directx".  Returns
+    an HxWx3 uint8 array, or unit normals in -1..1 for dtype "float16".
+    """
+    if kernel not in NORMAL_KERNELS:
+        raise ValueError(f"Unknown normal map kernel: {kernel}")
+    weights = np.array(NORMAL_KERNELS[kernel], dtype=np.float32)
+    weights /= weights.sum()
+    height = np.asarray(height, dtype=np.float32)
+
+    gx = np.zeros_like(height)
+    gy = np.zeros_like(height)
+    for step in scales:
+        for offset, weight in zip((-step, 0, step), weights):
+            if weight == 0:
+                continue
+            # Right minus left and bottom minus top, smoothed across the derivative
+            gx += (_shift(height, offset, step, wrap) - _shift(height, offset, -step, wrap)) * (weight / step)
+            gy += (_shift(height, step, offset, wrap) - _shift(height, -step, offset, wrap)) * (weight / step)
+    gx *= strength / len(scales)
+    gy *= strength / len(scales)
+
+    # Image rows run downwards, so OpenGL's up-pointing green is bottom minus top
+    if convention == "directx":
+        gy = -gy
+    elif convention != "opengl":
+        raise ValueError(f"Unknown normal map convention: {convention}")
+
+    length = np.sqrt(gx * gx + gy * gy + 1.0)
+    normals = np.stack((-gx / length, gy / length, 1.0 / length), axis=-1)
+
+    if dtype == "float16":
+        return normals.astype(np.float16)
+    return np.clip(np.round((normals * 0.5 + 0.5) * 255), 0, 255).astype(np.uint8)
+
+def generate_normal_map(texture_path, strength=1.0, kernel="sobel", scales=(1,), wrap=True,
+                        convention="opengl", dtype="uint8"):
+    """Generate a normal map from a texture, using its luminance as height.
+
+    Returns a PIL image for uint8 output, or a float16 array of unit normals.
+    """
     # Load the texture
     img = Image.open(texture_path).convert('L')  # Convert to grayscale
-    
-    # Get dimensions
-    width, height = img.size
-    
-    # Create a new RGB image for the normal map
-    normal_map = Image.new('RGB', (width, height), (128, 128, 255))
-    
-    # Calculate normals based on height differences
-    for y in range(1, height - 1):
-        for x in range(1, width - 1):
-            # Get surrounding pixel values
-            top = img.getpixel((x, y - 1))
-            bottom = img.getpixel((x, y + 1))
-            left = img.getpixel((x - 1, y))
-            right = img.getpixel((x + 1, y))
-            
-            # Calculate normal vector components (simplified)
-            nx = (left - right) * strength
-            ny = (bottom - top) * strength
-            nz = 1.0  # Fixed Z component
-            
-            # Normalize and convert to 0-255 range
-            length = (nx * nx + ny * ny + nz * nz) ** 0.5
-            nx = int(128 + 127 * nx / length)
-            ny = int(128 + 127 * ny / length)
-            nz = int(128 + 127 * nz / length)
-            
-            # Set the pixel in the normal map
-            normal_map.putpixel((x, y), (nx, ny, nz))
-    
-    return normal_map
 
-def generate_roughness_map(texture_path, base_roughness=0.7, variation=0.3):
-    """Generate a roughness map from a texture"""
+    normals = normal_map_from_height(np.asarray(img), strength, kernel, scales, wrap, convention, dtype)
+    if dtype == "float16":
+        return normals
+    return Image.fromarray(normals, 'RGB')
+
+# Per-material response curves, as (luminance 0-255, value 0-1) control
+# points interpolated linearly.  "medieval" reproduces the original
+# base_roughness=0.7, variation=0.3 mapping; a preset without a metallic
+# curve produces no metallic map.
+MATERIAL_PRESETS = {
+    "medieval": {
+        "roughness": ((0, 0.55), (255, 0.85)),
+    },
+    "stone": {
+        # Dark crevices stay rough, worn high points polish slightly
+        "roughness": ((0, 0.95), (96, 0.9), (255, 0.7)),
+    },
+    "earth": {
+        "roughness": ((0, 0.98), (255, 0.85)),
+    },
+    "foliage": {
+        # Waxy leaf highlights
+        "roughness": ((0, 0.8), (128, 0.65), (255, 0.5)),
+    },
+    "pigment": {
+        # Painted tempera on plaster: matte, non-metallic, pale grounds roughest
+        "roughness": ((0, 0.7), (255, 0.9)),
+    },
+    "gilded": {
+        # Bright illuminated areas are read as gold leaf
+        "roughness": ((0, 0.8), (160, 0.6), (255, 0.3)),
+        "metallic": ((0, 0.0), (160, 0.1), (255, 0.8)),
+    },
+    "metal": {
+        "roughness": ((0, 0.6), (255, 0.3)),
+        "metallic": ((0, 0.7), (255, 1.0)),
+    },
+}
+
+# Material preset used for each texture family of the medieval garden pack
+TEXTURE_FAMILY_PRESETS = {
+    "garden": "earth",
+    "ornamental": "stone",
+    # The symbols are painted pigment without gold leaf, so nothing is metallic
+    "symbolic": "pigment",
+    "material": "stone",
+}
+
+@functools.lru_cache(maxsize=64)
+def curve_lut(points):
+    """Return a 256-entry uint8 lookup table for a curve given as ((luminance, value), ...) points"""
+    inputs, values = zip(*sorted(points))
+    curve = np.clip(np.interp(np.arange(256), inputs, values), 0.0, 1.0)
+    lut = np.round(curve * 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+def apply_curve(gray, points):
+    """Map a uint8 luminance array through a material curve"""
+    return curve_lut(tuple(points))[np.asarray(gray, dtype=np.uint8)]
+
+def roughness_curve(preset=None, base_roughness=0.7, variation=0.3):
+    """Roughness curve points for a preset, or a linear curve around base_roughness"""
+    if preset is not None:
+        return MATERIAL_PRESETS[preset]["roughness"]
+    return ((0, base_roughness - 0.5 * variation), (255, base_roughness + 0.5 * variation))
+
+def metallic_curve(preset):
+    """Metallic curve points for a preset (flat zero if it defines none)"""
+    return MATERIAL_PRESETS[preset].get("metallic", ((0, 0.0), (255, 0.0)))
+
+def generate_roughness_map(texture_path, base_roughness=0.7, variation=0.3, preset=None):
+    """Generate a roughness map from a texture.
+
+    Uses the named preset's roughness curve, or a linear curve around
+    base_roughness with the given variation when no preset is given.
+    """
     # Load the texture
     img = Image.open(texture_path).convert('L')  # Convert to grayscale
+
+    points = roughness_curve(preset, base_roughness, variation)
+    return Image.fromarray(apply_curve(np.asarray(img), points), 'L')
+
+def generate_metallic_map(texture_path, preset="metal"):
+    """Generate a metallic map from a texture using the preset's metallic curve"""
+    img = Image.open(texture_path).convert('L')
+    return Image.fromarray(apply_curve(np.asarray(img), metallic_curve(preset)), 'L')
+
+def blur_height(height, radius, wrap=True):
+    """Box-blur a height array with separable running sums, wrapping or clamping at the edges"""
+    blurred = np.asarray(height, dtype=np.float64)
+    if radius < 1:
+        return blurred.astype(np.float32)
+    window = 2 * radius + 1
+    for axis in (0, 1):
+        padding = [(0, 0), (0, 0)]
+        padding[axis] = (radius + 1, radius)
+        padded = np.pad(blurred, padding, mode='wrap' if wrap else 'edge')
+        sums = np.cumsum(padded, axis=axis)
+        upper = np.take(sums, np.arange(window, sums.shape[axis]), axis=axis)
+        lower = np.take(sums, np.arange(0, sums.shape[axis] - window), axis=axis)
+        blurred = (upper - lower) / window
+    return blurred.astype(np.float32)
+
+def ambient_occlusion_from_height(height, radii=(2, 4, 8, 16), strength=1.0, wrap=True):
+    """Bake an ambient occlusion map (uint8, 255 = unoccluded) from a height array (0-255).
+
+    A pixel lying below the average height around it is partly shadowed
+    by its surroundings; this is measured at several radii, so both fine
+    cracks and broad hollows darken, and the results are averaged.
+    """
+    height = np.asarray(height, dtype=np.float32)
+    occlusion = np.zeros_like(height)
+    for radius in radii:
+        occlusion += np.clip(blur_height(height, radius, wrap) - height, 0.0, None)
+    occlusion *= 4.0 * strength / (255.0 * len(radii))
+    return np.clip(np.round((1.0 - np.clip(occlusion, 0.0, 1.0)) * 255), 0, 255).astype(np.uint8)
+
+def cavity_from_height(height, radius=2, strength=1.0, wrap=True):
+    """Bake a cavity map (uint8) from a height array: 128 is flat, darker in crevices, lighter on ridges"""
+    height = np.asarray(height, dtype=np.float32)
+    cavity = (height - blur_height(height, radius, wrap)) * (2.0 * strength / 255.0)
+    return np.clip(np.round((0.5 + np.clip(cavity, -0.5, 0.5)) * 255), 0, 255).astype(np.uint8)
+
+def texture_seed(name):
+    """Stable per-texture seed, so derived maps are reproducible between runs"""
+    return int.from_bytes(hashlib.sha1(name.encode("utf-8")).digest()[:4], "little")
+
+def generate_weathering_mask(gray, seed, edge_weight=0.5, noise_weight=0.3, height_weight=0.0,
+                             cavity_weight=0.2, edge_width=0.25):
+    """Generate a weathering mask (uint8) from a luminance array.
+
+    Combines a distance-to-border field (more weathering at edges and
+    corners), seeded coherent noise, and optional terms that weather low
+    areas (height) and local hollows (cavity).  The same seed always gives
+    the same mask.
+    """
+    gray = np.asarray(gray, dtype=np.float32)
+    height, width = gray.shape
+    terms = []
+
+    if edge_weight:
+        # Distance to the nearest border, reaching full strength within edge_width
+        rows = np.minimum(np.arange(height), height - 1 - np.arange(height))[:, None]
+        columns = np.minimum(np.arange(width), width - 1 - np.arange(width))[None, :]
+        distance = np.minimum(rows, columns) / (min(width, height) * edge_width)
+        terms.append((edge_weight, 1.0 - np.clip(distance, 0.0, 1.0)))
+
+    if noise_weight:
+        rng = np.random.default_rng(seed)
+        noise = medieval_generator.tileable_value_noise(max(width, height), 8, rng, octaves=4)
+        terms.append((noise_weight, noise[:height, :width]))
+
+    if height_weight:
+        # Water and dirt settle in low areas
+        terms.append((height_weight, 1.0 - gray / 255.0))
+
+    if cavity_weight:
+        # Pixels darker than their surroundings are hollows
+        blurred = blur_height(gray, 4)
+        terms.append((cavity_weight, np.clip((blurred - gray) / 64.0 + 0.5, 0.0, 1.0)))
+
+    total_weight = sum(weight for weight, _ in terms) or 1.0
+    mask = sum(weight * term for weight, term in terms) / total_weight
+    return np.clip(np.round(mask * 255), 0, 255).astype(np.uint8)
+
+def link_or_copy(source_path, output_path):
+    """Hardlink an unchanged file into place, copying when linking is not possible"""
+    if os.path.exists(output_path):
+        if os.path.samefile(source_path, output_path):
+            return
+        os.remove(output_path)
+    try:
+        os.link(source_path, output_path)
+    except OSError:
+        # Different filesystem or no hardlink support
+        shutil.copy2(source_path, output_path)
+
+def load_texture_buffers(texture_path, source_hash=None):
+    """Decode a texture once, returning the image, its height and its water mask (uint8 arrays)
+
+    The height is the map the generator saved with the texture where there
+    is one that is still current, and the texture's luminance otherwise; the
+    water mask is None for textures without a current one.  When the source's content hash is given,
+    the arrays are mapped from the intermediate array cache (filled by the
+    generator as it saves textures) instead of decoding the PNGs again.
+    """
+    maps = medieval_generator.load_texture_maps(texture_path, ("height", "water"), source_hash)
+    img = Image.fromarray(maps["albedo"])
+    gray = maps.get("height")
+    if gray is None:
+        gray = np.asarray(img.convert('L'))
+    return img, gray, maps.get("water")
+
+def derive_texture_set_maps(albedo_img, gray, output_name, shader_type="medieval", preset="medieval", packed=False,
+                            water=None):
+    """Derive every map of a texture set from decoded buffers.
+
+    `water` is the source's water mask (uint8), if it has one; it is passed
+    through as the set's _water map.  Returns a list of (key, file suffix,
+    array, PIL mode) ready to encode.
+    """
+    normal_map = normal_map_from_height(gray, strength=1.5)
+    roughness_map = apply_curve(gray, roughness_curve(preset))
+    metallic_map = apply_curve(gray, metallic_curve(preset)) if "metallic" in MATERIAL_PRESETS[preset] else None
+    occlusion_map = ambient_occlusion_from_height(gray)
+    cavity_map = cavity_from_height(gray)
     
-    # Get dimensions
-    width, height = img.size
+    # Shader-specific maps: the medieval shader uses a detail texture and a
+    # weathering mask (seeded by the set name, so it is reproducible)
+    detail_map = weathering_map = None
+    if shader_type == "medieval":
+        detail_map = np.asarray(albedo_img.filter(ImageFilter.FIND_EDGES).convert('L'))
+        weathering_map = generate_weathering_mask(gray, texture_seed(output_name))
     
-    # Create a new grayscale image for the roughness map
-    roughness_map = Image.new('L', (width, height))
+    maps = []
+    if packed:
+        maps.append(("normal", "normal_height", np.dstack((normal_map, gray)), 'RGBA'))
+        metallic = metallic_map if metallic_map is not None else np.zeros_like(gray)
+        maps.append(("orm", "orm", np.dstack((occlusion_map, roughness_map, metallic)), 'RGB'))
+        if shader_type == "medieval":
+            maps.append(("surface", "surface", np.dstack((weathering_map,) * 3 + (detail_map,)), 'RGBA'))
+    else:
+        maps.append(("normal", "normal", normal_map, 'RGB'))
+        maps.append(("roughness", "roughness", roughness_map, 'L'))
+        maps.append(("ao", "ao", occlusion_map, 'L'))
+        if metallic_map is not None:
+            maps.append(("metallic", "metallic", metallic_map, 'L'))
+        if shader_type == "medieval":
+            maps.append(("detail", "detail", detail_map, 'L'))
+            maps.append(("weathering", "weathering", weathering_map, 'L'))
     
-    # Calculate roughness based on texture details
-    for y in range(height):
-        for x in range(width):
-            # Get pixel value
-            pixel = img.getpixel((x, y))
-            
-            # Calculate roughness with variation based on pixel intensity
-            roughness = base_roughness + (pixel / 255.0 - 0.5) * variation
-            roughness = max(0.0, min(1.0, roughness))  # Clamp to 0-1
-            
-            # Set the pixel in the roughness map
-            roughness_map.putpixel((x, y), int(roughness * 255))
+    if water is not None:
+        maps.append(("water", "water", water, 'L'))
     
-    return roughness_map
+    # The cavity map is not bound by the shader, but is kept for authoring
+    maps.append(("cavity", "cavity", cavity_map, 'L'))
+    return maps
+
+def srgb_to_linear(values):
+    """Convert sRGB-encoded values (0-1) to linear light"""
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(values):
+    """Convert linear-light values (0-1) to sRGB encoding"""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1.0 / 2.4) - 0.055)
 
-def create_texture_set(base_texture_path, output_name, shader_type="medieval"):
-    """Create a complete texture set (albedo, normal, roughness) for use with shaders"""
+def _downsample(array):
+    """Average 2x2 blocks, repeating the last row/column of odd-sized levels"""
+    height, width = array.shape[:2]
+    if height % 2 or width % 2:
+        padding = [(0, height % 2), (0, width % 2)] + [(0, 0)] * (array.ndim - 2)
+        array = np.pad(array, padding, mode='edge')
+    return (array[0::2, 0::2] + array[1::2, 0::2] + array[0::2, 1::2] + array[1::2, 1::2]) * 0.25
+
+def _to_uint8(values):
+    return np.clip(np.round(values * 255), 0, 255).astype(np.uint8)
+
+def _toksvig_roughness(roughness, normal_length):
+    """Widen roughness by the normal variance a mip level averages away.
+
+    The shorter the averaged normal, the more its texels disagreed; that
+    variance, (1 - length) / length, is added to the squared GGX alpha.
+    """
+    length = np.clip(normal_length, 1e-4, 1.0)
+    alpha = roughness * roughness
+    return np.sqrt(np.sqrt(alpha * alpha + (1.0 - length) / length))
+
+def texture_set_mip_chains(maps):
+    """Build full mip chains (uint8 arrays, full size first) for (key, array) pairs of one texture set.
+
+    Albedo is filtered in linear light.  Normals are averaged as vectors and
+    renormalised per level, and roughness (alone or in the ORM green
+    channel) is widened Toksvig-style by the normal variance at each level.
+    Other maps are averaged linearly.
+    """
+    maps = dict(maps)
+    chains = {}
+
+    # Averaged normal vectors, kept unnormalised so their length measures variance
+    normal_lengths = None
+    if "normal" in maps:
+        data = maps["normal"].astype(np.float32) / 255.0
+        vectors = data[..., :3] * 2.0 - 1.0
+        extra = data[..., 3:]
+        levels = [maps["normal"]]
+        normal_lengths = [np.ones(vectors.shape[:2], dtype=np.float32)]
+        while max(vectors.shape[:2]) > 1:
+            vectors = _downsample(vectors)
+            extra = _downsample(extra)
+            length = np.sqrt(np.sum(vectors * vectors, axis=-1))
+            normal_lengths.append(length)
+            unit = vectors / np.maximum(length, 1e-6)[..., None]
+            levels.append(_to_uint8(np.concatenate((unit * 0.5 + 0.5, extra), axis=-1)))
+        chains["normal"] = levels
+
+    for key, array in maps.items():
+        if key == "normal":
+            continue
+        values = array.astype(np.float32) / 255.0
+        if key == "albedo":
+            values = np.concatenate((srgb_to_linear(values[..., :3]), values[..., 3:]), axis=-1)
+        levels = [array]
+        level = 0
+        while max(values.shape[:2]) > 1:
+            values = _downsample(values)
+            level += 1
+            stored = values
+            if key == "albedo":
+                stored = np.concatenate((linear_to_srgb(values[..., :3]), values[..., 3:]), axis=-1)
+            elif normal_lengths is not None and key in ("roughness", "orm"):
+                stored = values.copy()
+                if key == "roughness":
+                    stored = _toksvig_roughness(values, normal_lengths[level])
+                else:
+                    stored[..., 1] = _toksvig_roughness(values[..., 1], normal_lengths[level])
+            levels.append(_to_uint8(stored))
+        chains[key] = levels
+    return chains
+
+def save_dds(path, levels):
+    """Write a mip chain (uint8 arrays, full size first) as an uncompressed DDS file.
+
+    Single-channel maps are stored as 8-bit luminance, everything else as
+    RGBA8, which Godot loads directly with the mipmaps as stored.
+    """
+    base = levels[0]
+    height, width = base.shape[:2]
+    if base.ndim == 2:
+        # DDPF_LUMINANCE, 8 bits
+        pixel_format = struct.pack('<8I', 32, 0x20000, 0, 8, 0xff, 0, 0, 0)
+        pitch = width
+        payload = [np.ascontiguousarray(level).tobytes() for level in levels]
+    else:
+        # DDPF_RGB | DDPF_ALPHAPIXELS, 32 bits in R, G, B, A byte order
+        pixel_format = struct.pack('<8I', 32, 0x41, 0, 32, 0x000000ff, 0x0000ff00, 0x00ff0000, 0xff000000)
+        pitch = width * 4
+        payload = []
+        for level in levels:
+            if level.shape[2] == 3:
+                level = np.dstack((level, np.full(level.shape[:2], 255, dtype=np.uint8)))
+            payload.append(np.ascontiguousarray(level).tobytes())
+
+    # CAPS | HEIGHT | WIDTH | PITCH | PIXELFORMAT | MIPMAPCOUNT
+    flags = 0x1 | 0x2 | 0x4 | 0x8 | 0x1000 | 0x20000
+    # TEXTURE | MIPMAP | COMPLEX
+    caps = 0x1000 | 0x400000 | 0x8
+    header = struct.pack('<7I', 124, flags, height, width, pitch, 0, len(levels))
+    header += b'\0' * 44 + pixel_format + struct.pack('<5I', caps, 0, 0, 0, 0)
+
+    with open(path, 'wb') as f:
+        f.write(b'DDS ' + header)
+        for data in payload:
+            f.write(data)
+
+def write_texture_set(base_texture_path, output_name, maps, mipmaps=False, albedo_img=None):
+    """Link the albedo and encode derived maps into a texture set directory
+
+    With mipmaps=True every map, albedo included, is written as a DDS file
+    holding its precomputed mip chain (see texture_set_mip_chains).
+    """
     # Create output directory
     output_dir = os.path.join(OUTPUT_DIR, output_name)
     os.makedirs(output_dir, exist_ok=True)
     
-    # Get base texture name
-    base_texture_name = os.path.basename(base_texture_path)
+    if mipmaps:
+        if albedo_img is None:
+            albedo_img = Image.open(base_texture_path)
+        albedo_mode = 'RGBA' if 'A' in albedo_img.getbands() else 'RGB'
+        arrays = [("albedo", np.asarray(albedo_img.convert(albedo_mode)))]
+        arrays += [(key, array) for key, _, array, _ in maps]
+        chains = texture_set_mip_chains(arrays)
+        
+        texture_set = {}
+        for key, suffix in [("albedo", "albedo")] + [(key, suffix) for key, suffix, _, _ in maps]:
+            path = os.path.join(output_dir, f"{output_name}_{suffix}.dds")
+            save_dds(path, chains[key])
+            texture_set[key] = path
+        print(f"Created texture set in {output_dir}")
+        return texture_set
     
-    # Copy the base texture as albedo
+    # The albedo is the unchanged source, so link it rather than re-encode it
     albedo_path = os.path.join(output_dir, f"{output_name}_albedo.png")
-    albedo_img = Image.open(base_texture_path)
-    albedo_img.save(albedo_path)
+    link_or_copy(base_texture_path, albedo_path)
+    texture_set = {"albedo": albedo_path}
     
-    # Generate normal map
-    normal_map = generate_normal_map(base_texture_path, strength=1.5)
-    normal_path = os.path.join(output_dir, f"{output_name}_normal.png")
-    normal_map.save(normal_path)
-    
-    # Generate roughness map
-    roughness_map = generate_roughness_map(base_texture_path)
-    roughness_path = os.path.join(output_dir, f"{output_name}_roughness.png")
-    roughness_map.save(roughness_path)
-    
-    # Generate shader-specific maps based on shader type
-    if shader_type == "medieval":
-        # For medieval shader, create a detail texture
-        detail_path = os.path.join(output_dir, f"{output_name}_detail.png")
-        detail_img = albedo_img.copy()
-        detail_img = detail_img.filter(ImageFilter.FIND_EDGES)
-        detail_img = detail_img.convert('L')
-        detail_img.save(detail_path)
-        
-        # Create a weathering mask
-        weathering_path = os.path.join(output_dir, f"{output_name}_weathering.png")
-        weathering_img = Image.new('L', albedo_img.size)
-        
-        # Add some weathering patterns
-        width, height = weathering_img.size
-        for y in range(height):
-            for x in range(width):
-                # More weathering at edges and corners
-                edge_factor = min(x, y, width - x, height - y) / (min(width, height) * 0.25)
-                edge_factor = max(0.0, min(1.0, edge_factor))
-                
-                # Random variation
-                import random
-                random_factor = random.uniform(0.0, 1.0)
-                
-                # Combine factors
-                weathering = (edge_factor * 0.7 + random_factor * 0.3) * 255
-                weathering_img.putpixel((x, y), int(weathering))
-        
-        weathering_img.save(weathering_path)
+    for key, suffix, array, mode in maps:
+        path = os.path.join(output_dir, f"{output_name}_{suffix}.png")
+        Image.fromarray(array, mode).save(path)
+        texture_set[key] = path
     
     print(f"Created texture set in {output_dir}")
-    return {
-        "albedo": albedo_path,
-        "normal": normal_path,
-        "roughness": roughness_path
-    }
-
-def create_medieval_garden_texture_sets():
-    """Create texture sets for all medieval garden textures"""
-    # Process garden elements
-    garden_elements_dir = os.path.join(MEDIEVAL_TEXTURE_DIR, "garden_elements")
-    for filename in os.listdir(garden_elements_dir):
-        if filename.endswith(".png"):
-            texture_path = os.path.join(garden_elements_dir, filename)
-            output_name = os.path.splitext(filename)[0]
-            create_texture_set(texture_path, f"garden_{output_name}")
-    
-    # Process ornamental elements
-    ornamental_dir = os.path.join(MEDIEVAL_TEXTURE_DIR, "ornamental")
-    for filename in os.listdir(ornamental_dir):
-        if filename.endswith(".png"):
-            texture_path = os.path.join(ornamental_dir, filename)
-            output_name = os.path.splitext(filename)[0]
-            create_texture_set(texture_path, f"ornamental_{output_name}")
+    return texture_set
+
+def create_texture_set(base_texture_path, output_name, shader_type="medieval", material_preset=None, packed=False,
+                       mipmaps=False, source_hash=None):
+    """Create a complete texture set (albedo, normal, roughness, AO, cavity, water) for use with shaders
+
+    The source is decoded once and every map is derived from the same
+    buffers.  material_preset selects the roughness/metallic curves from
+    MATERIAL_PRESETS, defaulting to the shader type's own preset.
+
+    Ambient occlusion and cavity are baked from the height with wrapped
+    (tileable) blurs.  With packed=True the maps are written channel-packed
+    instead:
+        _normal_height.png  RGB normal, A height
+        _orm.png            R occlusion, G roughness, B metallic
+        _surface.png        RGB weathering mask, A detail (medieval shader only)
+
+    With mipmaps=True the maps are written as DDS files with normal-aware
+    mip chains instead of PNGs.  Passing the source's content hash lets the
+    decoded buffers come from the intermediate array cache.
+    """
+    preset = material_preset or (shader_type if shader_type in MATERIAL_PRESETS else "medieval")
     
-    # Process symbolic elements
-    symbolic_dir = os.path.join(MEDIEVAL_TEXTURE_DIR, "symbolic")
-    for filename in os.listdir(symbolic_dir):
-        if filename.endswith(".png"):
-            texture_path = os.path.join(symbolic_dir, filename)
-            output_name = os.path.splitext(filename)[0]
-            create_texture_set(texture_path, f"symbolic_{output_name}")
+    # Decode the source once, with its height map (or its luminance as height)
+    albedo_img, gray, water = load_texture_buffers(base_texture_path, source_hash)
     
-    # Process materials
-    materials_dir = os.path.join(MEDIEVAL_TEXTURE_DIR, "materials")
-    for filename in os.listdir(materials_dir):
-        if filename.endswith(".png"):
-            texture_path = os.path.join(materials_dir, filename)
-            output_name = os.path.splitext(filename)[0]
-            create_texture_set(texture_path, f"material_{output_name}")
-
-def generate_and_integrate_textures():
+    maps = derive_texture_set_maps(albedo_img, gray, output_name, shader_type, preset, packed, water)
+    return write_texture_set(base_texture_path, output_name, maps, mipmaps, albedo_img)
+
+def _convert_manifest_paths(manifest, convert):
+    """Copy of a manifest with convert(path, root) applied to every source and output path"""
+    converted = {}
+    for name, entry in manifest.items():
+        entry = dict(entry)
+        if "source" in entry:
+            entry["source"] = convert(entry["source"], PROJECT_ROOT)
+        if "outputs" in entry:
+            entry["outputs"] = [convert(path, OUTPUT_DIR) for path in entry["outputs"]]
+        converted[name] = entry
+    return converted
+
+def _stored_path(path, root):
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+def _resolved_path(path, root):
+    return os.path.normpath(os.path.join(root, path))
+
+def load_manifest():
+    """Load the texture set manifest with its paths resolved, or an empty one"""
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return _convert_manifest_paths(manifest, _resolved_path)
+
+def save_manifest(manifest):
+    """Write the texture set manifest atomically, with relative paths"""
+    temp_path = MANIFEST_PATH + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(_convert_manifest_paths(manifest, _stored_path), f, indent=2, sort_keys=True)
+    os.replace(temp_path, MANIFEST_PATH)
+
+def collect_texture_set_sources():
+    """Map each texture set name to its source PNG and material preset"""
+    sources = {}
+    for directory, family in TEXTURE_FAMILIES:
+        source_dir = os.path.join(MEDIEVAL_TEXTURE_DIR, directory)
+        if not os.path.isdir(source_dir):
+            continue
+        for filename in sorted(os.listdir(source_dir)):
+            if filename.endswith(".png"):
+                output_name = os.path.splitext(filename)[0]
+                sources[f"{family}_{output_name}"] = (os.path.join(source_dir, filename), TEXTURE_FAMILY_PRESETS[family])
+    return sources
+
+def texture_set_params(preset, packed, mipmaps=False):
+    """Integration parameters recorded in the manifest; a change forces a rebuild"""
+    return {"shader_type": "medieval", "material_preset": preset, "packed": packed, "mipmaps": mipmaps,
+            "version": INTEGRATION_VERSION}
+
+def _remove_outputs(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def record_texture_set(manifest, name, entry, outputs):
+    """Record a rebuilt set in the manifest, removing maps its previous build wrote but this one did not"""
+    previous = manifest.get(name, {}).get("outputs", [])
+    _remove_outputs(path for path in previous if path not in outputs)
+    manifest[name] = dict(entry, outputs=outputs)
+
+def remove_deleted_texture_sets(manifest, sources, names=None):
+    """Remove the sets of the manifest (of those in `names`) whose source is gone; returns their names"""
+    removed = [name for name in manifest if name not in sources and (names is None or name in names)]
+    for name in removed:
+        _remove_outputs(manifest.pop(name).get("outputs", []))
+        output_dir = os.path.join(OUTPUT_DIR, name)
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+    return removed
+
+def create_medieval_garden_texture_sets(packed=False, workers=None, force=False, mipmaps=False, names=None):
+    """Create texture sets for all medieval garden textures
+
+    Only sets whose source content or parameters changed since the last run
+    are rebuilt (all of them with force=True), in a process pool of
+    `workers` processes, or in this process with workers=0.  Sets whose
+    source was deleted are removed.  `names` restricts the run to those sets.
+    A set that fails to build is reported and left to be rebuilt next run;
+    the others are still recorded.  Returns the names of the rebuilt and
+    removed sets.
+    """
+    manifest = load_manifest()
+    sources = collect_texture_set_sources()
+    if names is not None:
+        sources = {name: source for name, source in sources.items() if name in names}
+
+    # Find the sets whose inputs changed
+    pending = {}
+    for name, (source_path, preset) in sources.items():
+        params = texture_set_params(preset, packed, mipmaps)
+        stat = os.stat(source_path)
+        entry = manifest.get(name)
+        if not force and entry and entry.get("params") == params and all(os.path.exists(path) for path in entry.get("outputs", [])):
+            # Unchanged size and modification time means unchanged content; otherwise compare hashes
+            if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+                continue
+            source_hash = array_cache.file_hash(source_path)
+            if entry.get("source_hash") == source_hash:
+                entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+                continue
+        else:
+            source_hash = array_cache.file_hash(source_path)
+        pending[name] = {"source": source_path, "source_hash": source_hash, "size": stat.st_size,
+                         "mtime": stat.st_mtime, "params": params}
+
+    failed = []
+    def build(submit):
+        futures = {
+            name: submit(create_texture_set, entry["source"], name,
+                         material_preset=entry["params"]["material_preset"], packed=packed,
+                         mipmaps=mipmaps, source_hash=entry["source_hash"])
+            for name, entry in pending.items()
+        }
+        for name, future in futures.items():
+            try:
+                outputs = sorted(future.result().values())
+            except Exception as e:
+                print(f"Failed to build texture set {name}: {e}")
+                failed.append(name)
+                # Keep only the outputs to clean up, so the next run rebuilds it
+                manifest[name] = {"outputs": manifest.get(name, {}).get("outputs", [])}
+                continue
+            record_texture_set(manifest, name, pending[name], outputs)
+
+    # Rebuild changed sets in parallel, or in this process where its caches are already warm
+    if pending and workers == 0:
+        build(_CompletedBuild)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(intermediate_cache.max_bytes,)) as executor:
+            build(executor.submit)
+
+    removed = remove_deleted_texture_sets(manifest, sources, names)
+    save_manifest(manifest)
+    rebuilt = sorted(name for name in pending if name not in failed)
+    print(f"Texture sets: {len(rebuilt)} rebuilt, {len(sources) - len(pending)} unchanged, "
+          f"{len(removed)} removed, {len(failed)} failed")
+    return rebuilt + removed
+
+def _init_worker(cache_limit):
+    """Pool worker initializer: apply the parent's cache limit and give the worker its own random stream"""
+    intermediate_cache.max_bytes = cache_limit
+    random.seed()
+
+class _CompletedBuild:
+    """Runs a build in this process and holds its outcome behind the Future interface"""
+
+    def __init__(self, func, *args, **kwargs):
+        self.value = self.error = None
+        try:
+            self.value = func(*args, **kwargs)
+        except Exception as e:
+            self.error = e
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+def generate_and_integrate_textures(packed=False, workers=None, stream=True, mipmaps=False):
     """Generate all medieval textures and create shader-compatible texture sets"""
+    if stream:
+        # Generate, derive and write in one pass, without re-reading the sources
+        print("Generating and integrating medieval textures...")
+        stream_generate_and_integrate(packed, workers, mipmaps=mipmaps)
+        print("All textures generated and integrated successfully!")
+        return
+    
     # First, generate all the medieval textures
     print("Generating medieval textures...")
     medieval_generator.generate_all_medieval_textures()
     
     # Then create texture sets for all the generated textures
     print("Creating shader-compatible texture sets...")
-    create_medieval_garden_texture_sets()
+    create_medieval_garden_texture_sets(packed, workers, mipmaps=mipmaps)
     
     print("All textures generated and integrated successfully!")
 
+def texture_set_buffers(maps):
+    """Albedo image, height and water mask (uint8, None if absent) of a generator's maps dict
+
+    Matches what load_texture_buffers and create_texture_set read back from
+    the saved texture, so streamed and two-pass builds derive the same maps.
+    """
+    albedo_img = Image.fromarray(maps["albedo"], "RGB")
+    if "height" in maps:
+        gray = _to_uint8(np.asarray(maps["height"]))
+    else:
+        gray = np.asarray(albedo_img.convert('L'))
+    water = _to_uint8(np.asarray(maps["water"])) if "water" in maps else None
+    return albedo_img, gray, water
+
+def _timed_texture_maps(generator, args):
+    """Run a recipe's generator, returning its maps and the seconds it took"""
+    started = time.perf_counter()
+    maps = medieval_generator.texture_maps(generator, args)
+    return maps, time.perf_counter() - started
+
+def stream_generate_and_integrate(packed=False, workers=None, derive_workers=2, writer_workers=2,
+                                  queue_size=4, mipmaps=False):
+    """Generate textures and create their texture sets in one streaming pipeline.
+
+    Recipes run in a pool of `workers` generator processes (in this process
+    with workers=0) and hand their maps (albedo, height and masks) to
+    derivation threads, which compute every texture set map from them;
+    writer threads save the source texture with its extra maps and the
+    texture set.  The bounded queues between stages, and a cap on recipes
+    in flight, limit the number of textures held in memory.  The manifest is
+    updated as in create_medieval_garden_texture_sets, including removing
+    stale maps and the sets of deleted sources.  Stage timings and queue
+    depths are printed at the end.
+    """
+    families = dict(TEXTURE_FAMILIES)
+    derive_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+
+    stats_lock = threading.Lock()
+    stats = {stage: {"busy": 0.0, "items": 0} for stage in ("generate", "derive", "write")}
+    depths = {"derive": [], "write": []}
+    errors = []
+    manifest = load_manifest()
+    done = object()
+
+    def record(stage, busy):
+        with stats_lock:
+            stats[stage]["busy"] += busy
+            stats[stage]["items"] += 1
+
+    def put(name, target, item):
+        target.put(item)
+        with stats_lock:
+            depths[name].append(target.qsize())
+
+    def generate(submit, window):
+        # Keep at most `window` recipes in flight, handing results over in order
+        in_flight = collections.deque()
+        def hand_over():
+            directory, filename, future = in_flight.popleft()
+            try:
+                maps, busy = future.result()
+            except Exception as e:
+                errors.append(e)
+                return
+            record("generate", busy)
+            put("derive", derive_queue, (directory, filename, maps))
+        for directory, filename, generator, args in medieval_generator.MEDIEVAL_TEXTURE_RECIPES:
+            in_flight.append((directory, filename, submit(_timed_texture_maps, generator, args)))
+            if len(in_flight) >= window:
+                hand_over()
+        while in_flight:
+            hand_over()
+
+    def derive():
+        while True:
+            item = derive_queue.get()
+            if item is done:
+                return
+            directory, filename, maps = item
+            started = time.perf_counter()
+            try:
+                family = families[directory]
+                output_name = f"{family}_{os.path.splitext(filename)[0]}"
+                preset = TEXTURE_FAMILY_PRESETS[family]
+                img, gray, water = texture_set_buffers(maps)
+                derived = derive_texture_set_maps(img, gray, output_name, "medieval", preset, packed, water)
+            except Exception as e:
+                errors.append(e)
+                continue
+            record("derive", time.perf_counter() - started)
+            put("write", write_queue, (directory, filename, maps, img, output_name, preset, derived))
+
+    def write():
+        while True:
+            item = write_queue.get()
+            if item is done:
+                return
+            directory, filename, maps, img, output_name, preset, derived = item
+            started = time.perf_counter()
+            try:
+                source_path = os.path.join(MEDIEVAL_TEXTURE_DIR, directory, filename)
+                os.makedirs(os.path.dirname(source_path), exist_ok=True)
+                # Saving also caches the maps, so later runs map them instead of decoding the PNGs
+                source_hash = medieval_generator.save_texture_maps(source_path, maps)
+                texture_set = write_texture_set(source_path, output_name, derived, mipmaps, img)
+                stat = os.stat(source_path)
+                entry = {"source": source_path, "source_hash": source_hash, "size": stat.st_size,
+                         "mtime": stat.st_mtime, "params": texture_set_params(preset, packed, mipmaps)}
+                with stats_lock:
+                    record_texture_set(manifest, output_name, entry, sorted(texture_set.values()))
+            except Exception as e:
+                errors.append(e)
+                continue
+            record("write", time.perf_counter() - started)
+
+    def start(target, count):
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    started = time.perf_counter()
+    writers = start(write, writer_workers)
+    derivers = start(derive, derive_workers)
+
+    # Generators are CPU-bound Python, so they run in separate processes
+    if workers == 0:
+        generator_workers = 1
+        generate(_CompletedBuild, 1)
+    else:
+        generator_workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=generator_workers, initializer=_init_worker,
+                                 initargs=(intermediate_cache.max_bytes,)) as executor:
+            generate(executor.submit, generator_workers + queue_size)
+
+    # Shut the stages down in order once the one before has drained
+    for _ in derivers:
+        derive_queue.put(done)
+    for thread in derivers:
+        thread.join()
+    for _ in writers:
+        write_queue.put(done)
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    removed = remove_deleted_texture_sets(manifest, collect_texture_set_sources())
+    save_manifest(manifest)
+
+    print(f"Streaming pipeline finished in {elapsed:.2f}s ({len(removed)} removed sets)")
+    for stage, count in (("generate", generator_workers), ("derive", derive_workers), ("write", writer_workers)):
+        busy = stats[stage]["busy"]
+        print(f"  {stage:<9} {stats[stage]['items']:3d} items, {busy:6.2f}s busy "
+              f"across {count} workers ({busy / count:.2f}s each)")
+    for name, samples in depths.items():
+        if samples:
+            print(f"  {name} queue depth: mean {sum(samples) / len(samples):.1f}, max {max(samples)} of {queue_size}")
+
+    if errors:
+        raise errors[0]
+
+# Godot project root, for res:// paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SHADER_RESOURCE_PATH = "res://scripts/shaders/medieval_shader_pack.gdshader"
+
+# Consolidated material library and its lookup index
+MATERIAL_LIBRARY_PATH = os.path.join(OUTPUT_DIR, "material_library.tres")
+MATERIAL_LIBRARY_INDEX_PATH = os.path.join(OUTPUT_DIR, "material_library.json")
+
+# Shader parameters shared by every material
+MATERIAL_PARAMETERS = [
+    ("base_color", "Color(1, 1, 1, 1)"),
+    ("roughness_value", "0.8"),
+    ("metallic_value", "0.0"),
+    ("normal_strength", "1.0"),
+    ("detail_strength", "0.5"),
+    ("weathering_amount", "0.3"),
+]
+
+# Shader uniform bound to each map of a texture set, in declaration order
+TEXTURE_UNIFORMS = [
+    ("albedo", "albedo_texture"),
+    ("normal", "normal_texture"),
+    ("roughness", "roughness_texture"),
+    ("ao", "ao_texture"),
+    ("metallic", "metallic_texture"),
+    ("orm", "orm_texture"),
+    ("detail", "detail_texture"),
+    ("surface", "surface_texture"),
+    ("water", "water_mask"),
+]
+
+PACKED_CHANNELS_COMMENT = """; Channel-packed texture set for medieval_shader_pack.gdshader (use_packed_maps):
+;   normal_texture   RGB tangent-space normal (OpenGL), A height
+;   orm_texture      R ambient occlusion, G roughness, B metallic
+;   surface_texture  RGB weathering mask (weathering, patina, moss), A detail"""
+
+# File name suffixes of texture set maps bound by the Godot resources
+MAP_SUFFIXES = [
+    ("_albedo", "albedo"),
+    ("_normal", "normal"),
+    ("_normal_height", "normal"),
+    ("_roughness", "roughness"),
+    ("_ao", "ao"),
+    ("_metallic", "metallic"),
+    ("_detail", "detail"),
+    ("_orm", "orm"),
+    ("_surface", "surface"),
+    ("_water", "water"),
+]
+
+def godot_resource_path(path):
+    """Convert a file path inside the project to a res:// path"""
+    return "res://" + os.path.relpath(path, PROJECT_ROOT).replace(os.sep, "/")
+
+def _texture_ext_resources(texture_set, first_id, prefix=""):
+    """ext_resource lines and ids for the maps of a texture set that the shader binds"""
+    lines = []
+    texture_ids = {}
+    for key, _ in TEXTURE_UNIFORMS:
+        if key in texture_set:
+            texture_ids[key] = f"{first_id + len(lines)}_{prefix}{key}"
+            lines.append(f'[ext_resource type="Texture2D" path="{godot_resource_path(texture_set[key])}" '
+                         f'id="{texture_ids[key]}"]')
+    return lines, texture_ids
+
+def _material_properties(texture_set, texture_ids):
+    """Property lines of a ShaderMaterial for a texture set"""
+    lines = ['shader = ExtResource("1_shader")']
+    lines += [f"shader_parameter/{name} = {value}" for name, value in MATERIAL_PARAMETERS]
+    if "orm" in texture_set:
+        lines.append("shader_parameter/use_packed_maps = true")
+    lines += [f'shader_parameter/{uniform} = ExtResource("{texture_ids[key]}")'
+              for key, uniform in TEXTURE_UNIFORMS if key in texture_ids]
+    return lines
+
 def create_godot_resource_file(texture_set, output_path, shader_type="medieval"):
     """Create a Godot resource file (.tres) for the texture set"""
-    # Basic template for a ShaderMaterial resource
-    resource_template = """[gd_resource type="ShaderMaterial" load_steps=6 format=3]
-
-[ext_resource type="Shader" path="res://scripts/shaders/medieval_shader_pack.gdshader" id="1_shader"]
-[ext_resource type="Texture2D" path="{albedo_path}" id="2_albedo"]
-[ext_resource type="Texture2D" path="{normal_path}" id="3_normal"]
-[ext_resource type="Texture2D" path="{roughness_path}" id="4_roughness"]
-[ext_resource type="Texture2D" path="{detail_path}" id="5_detail"]
-
-[resource]
-shader = ExtResource("1_shader")
-shader_parameter/base_color = Color(1, 1, 1, 1)
-shader_parameter/roughness_value = 0.8
-shader_parameter/metallic_value = 0.0
-shader_parameter/normal_strength = 1.0
-shader_parameter/detail_strength = 0.5
-shader_parameter/weathering_amount = 0.3
-shader_parameter/albedo_texture = ExtResource("2_albedo")
-shader_parameter/normal_texture = ExtResource("3_normal")
-shader_parameter/roughness_texture = ExtResource("4_roughness")
-shader_parameter/detail_texture = ExtResource("5_detail")
-"""
+    shader_line = f'[ext_resource type="Shader" path="{SHADER_RESOURCE_PATH}" id="1_shader"]'
+    texture_lines, texture_ids = _texture_ext_resources(texture_set, 2)
     
-    # Fill in the template with the texture paths
-    resource_content = resource_template.format(
-        albedo_path=texture_set["albedo"].replace(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res:"),
-        normal_path=texture_set["normal"].replace(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res:"),
-        roughness_path=texture_set["roughness"].replace(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res:"),
-        detail_path=texture_set["detail"].replace(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res:") if "detail" in texture_set else ""
-    )
+    # One load step per external resource, plus the material itself
+    sections = [f'[gd_resource type="ShaderMaterial" load_steps={len(texture_lines) + 2} format=3]']
+    if "orm" in texture_set:
+        sections.append(PACKED_CHANNELS_COMMENT)
+    sections.append("\n".join([shader_line] + texture_lines))
+    sections.append("\n".join(["[resource]"] + _material_properties(texture_set, texture_ids)))
     
     # Write the resource file
     with open(output_path, 'w') as f:
-        f.write(resource_content)
+        f.write("\n\n".join(sections) + "\n")
     
     print(f"Created Godot resource file: {output_path}")
 
-def create_godot_resources_for_texture_sets():
-    """Create Godot resource files for all texture sets"""
-    # Process all texture sets in the output directory
-    for texture_set_dir in os.listdir(OUTPUT_DIR):
-        texture_set_path = os.path.join(OUTPUT_DIR, texture_set_dir)
-        if os.path.isdir(texture_set_path):
-            # Collect texture paths
-            texture_set = {}
-            for filename in os.listdir(texture_set_path):
-                if filename.endswith("_albedo.png"):
-                    texture_set["albedo"] = os.path.join(texture_set_path, filename)
-                elif filename.endswith("_normal.png"):
-                    texture_set["normal"] = os.path.join(texture_set_path, filename)
-                elif filename.endswith("_roughness.png"):
-                    texture_set["roughness"] = os.path.join(texture_set_path, filename)
-                elif filename.endswith("_detail.png"):
-                    texture_set["detail"] = os.path.join(texture_set_path, filename)
+def create_godot_material_library(texture_sets, output_path=None, index_path=None):
+    """Write every texture set's material into one Godot resource, plus a JSON index.
+
+    The shader is declared once and each material is a ShaderMaterial
+    sub-resource, collected in the library's "materials" metadata:
+        var library = load("res://.../material_library.tres")
+        var material = library.get_meta("materials")["garden_herb_bed"]
+    """
+    output_path = output_path or MATERIAL_LIBRARY_PATH
+    index_path = index_path or MATERIAL_LIBRARY_INDEX_PATH
+    
+    ext_lines = [f'[ext_resource type="Shader" path="{SHADER_RESOURCE_PATH}" id="1_shader"]']
+    sub_resources = []
+    index = {}
+    for name in sorted(texture_sets):
+        texture_set = texture_sets[name]
+        texture_lines, texture_ids = _texture_ext_resources(texture_set, len(ext_lines) + 1, f"{name}_")
+        ext_lines += texture_lines
+        
+        material_id = f"ShaderMaterial_{name}"
+        sub_resources.append("\n".join([f'[sub_resource type="ShaderMaterial" id="{material_id}"]',
+                                        f'resource_name = "{name}"'] + _material_properties(texture_set, texture_ids)))
+        index[name] = {
+            "id": material_id,
+            "packed": "orm" in texture_set,
+            "maps": {key: godot_resource_path(texture_set[key]) for key, _ in TEXTURE_UNIFORMS if key in texture_set},
+        }
+    
+    materials = ",\n".join(f'"{name}": SubResource("{entry["id"]}")' for name, entry in index.items())
+    load_steps = len(ext_lines) + len(sub_resources) + 1
+    sections = [f'[gd_resource type="Resource" load_steps={load_steps} format=3]']
+    if any(entry["packed"] for entry in index.values()):
+        sections.append(PACKED_CHANNELS_COMMENT)
+    sections.append("\n".join(ext_lines))
+    sections += sub_resources
+    sections.append(f"[resource]\nresource_name = \"medieval_material_library\"\nmetadata/materials = {{\n{materials}\n}}")
+    
+    with open(output_path, 'w') as f:
+        f.write("\n\n".join(sections) + "\n")
+    
+    # Compact index for lookups by name without loading the library
+    with open(index_path, 'w') as f:
+        json.dump({"resource": godot_resource_path(output_path), "shader": SHADER_RESOURCE_PATH, "materials": index},
+                  f, separators=(",", ":"), sort_keys=True)
+    
+    print(f"Created Godot material library with {len(index)} materials: {output_path}")
+
+def _map_key(filename):
+    """Texture set key of a map file, or None for files the resources do not bind"""
+    stem, extension = os.path.splitext(filename)
+    if extension not in (".png", ".dds"):
+        return None
+    for suffix, key in MAP_SUFFIXES:
+        if stem.endswith(suffix):
+            return key
+    return None
+
+def collect_texture_sets():
+    """Map each texture set name to its bindable maps.
+
+    Uses the integration manifest when there is one, so no directories need
+    listing; otherwise scans OUTPUT_DIR.  DDS maps carry precomputed mip
+    chains and take precedence over PNGs.
+    """
+    manifest = load_manifest()
+    if manifest:
+        candidates = {name: entry.get("outputs", []) for name, entry in manifest.items()}
+    else:
+        candidates = {}
+        for texture_set_dir in os.listdir(OUTPUT_DIR):
+            texture_set_path = os.path.join(OUTPUT_DIR, texture_set_dir)
+            if os.path.isdir(texture_set_path):
+                candidates[texture_set_dir] = [os.path.join(texture_set_path, filename)
+                                               for filename in os.listdir(texture_set_path)]
+    
+    texture_sets = {}
+    for name, paths in candidates.items():
+        texture_set = {}
+        for path in paths:
+            key = _map_key(os.path.basename(path))
+            if key and (path.endswith(".dds") or key not in texture_set):
+                texture_set[key] = path
+        
+        # Only sets with the required textures get a material
+        if "albedo" in texture_set and "normal" in texture_set and ("roughness" in texture_set or "orm" in texture_set):
+            texture_sets[name] = texture_set
+    return texture_sets
+
+def create_godot_resources_for_texture_sets(library=False, names=None):
+    """Create Godot resource files for all texture sets
+
+    With library=True a single material library resource and JSON index are
+    written instead of one .tres per set.  `names` restricts the per-set
+    resources to those sets; the library always covers every set.
+    """
+    texture_sets = collect_texture_sets()
+    if library:
+        create_godot_material_library(texture_sets)
+        return
+    
+    for name, texture_set in texture_sets.items():
+        if names is not None and name not in names:
+            continue
+        resource_path = os.path.join(OUTPUT_DIR, name, f"{name}.tres")
+        create_godot_resource_file(texture_set, resource_path)
+
+# inotify event flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+def texture_set_name(path):
+    """Name of the texture set built from a source PNG, or None if the path is not a source"""
+    directory, filename = os.path.split(path)
+    family = dict(TEXTURE_FAMILIES).get(os.path.basename(directory))
+    if family is None or not filename.endswith(".png"):
+        return None
+    return f"{family}_{os.path.splitext(filename)[0]}"
+
+class InotifyWatcher:
+    """Reports source files written, moved or deleted in a set of directories, using Linux inotify"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Editors often save to a temporary file and rename it over the original
+        mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"Cannot watch {directory}")
+            self.directories[wd] = directory
+
+    def poll(self, timeout=None):
+        """Wait up to timeout seconds (forever if None) and return the set of changed paths"""
+        changed = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd in self.directories and name:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Reports changed PNGs in a set of directories by comparing size and modification time snapshots"""
+
+    def __init__(self, directories, interval=0.25):
+        self.directories = directories
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".png"):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout=None):
+        """Wait up to timeout seconds (forever if None) and return the set of changed paths"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(wait, 0))
+
+    def close(self):
+        pass
+
+def watch_texture_sources(packed=False, mipmaps=False, library=False, debounce=0.3, polling=False):
+    """Rebuild texture sets and resources whenever source textures change, until interrupted
+
+    Source directories are watched with inotify where available (polling
+    otherwise, or with polling=True).  Events are collected until no new
+    ones arrive for `debounce` seconds, then only the affected sets are
+    rebuilt, in this process so that imports and caches stay warm.
+    """
+    directories = [os.path.join(MEDIEVAL_TEXTURE_DIR, directory) for directory, _ in TEXTURE_FAMILIES]
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+    
+    watcher = None
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(directories)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling for changes instead")
+    if watcher is None:
+        watcher = PollingWatcher(directories)
+    
+    # Catch up with edits made while nothing was watching
+    create_medieval_garden_texture_sets(packed, mipmaps=mipmaps)
+    create_godot_resources_for_texture_sets(library)
+    print(f"Watching {MEDIEVAL_TEXTURE_DIR} for changes (Ctrl+C to stop)")
+    
+    try:
+        while True:
+            changed = watcher.poll()
+            # Let a burst of writes settle before rebuilding
+            while True:
+                more = watcher.poll(debounce)
+                if not more:
+                    break
+                changed |= more
+            names = {texture_set_name(path) for path in changed} - {None}
+            if not names:
+                continue
             
-            # Create resource file if we have the required textures
-            if "albedo" in texture_set and "normal" in texture_set and "roughness" in texture_set:
-                resource_path = os.path.join(texture_set_path, f"{texture_set_dir}.tres")
-                create_godot_resource_file(texture_set, resource_path)
+            start = time.perf_counter()
+            try:
+                updated = create_medieval_garden_texture_sets(packed, 0, mipmaps=mipmaps, names=names)
+                if updated:
+                    create_godot_resources_for_texture_sets(library, names=updated)
+            except (OSError, ValueError) as e:
+                # Usually a file caught mid-write; its next write triggers another rebuild
+                print(f"Rebuild failed: {e}")
+                continue
+            print(f"Updated {', '.join(updated) or 'nothing'} in {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Generate and integrate medieval textures with shaders')
@@ -258,23 +1241,39 @@ def main():
     parser.add_argument('--integrate', action='store_true', help='Create shader-compatible texture sets')
     parser.add_argument('--resources', action='store_true', help='Create Godot resource files')
     parser.add_argument('--all', action='store_true', help='Perform all operations')
+    parser.add_argument('--packed', action='store_true', help='Write channel-packed normal/height, ORM and surface maps')
+    parser.add_argument('--workers', type=int, help='Number of worker processes used to generate textures and create texture sets (0 works in this process)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every texture set, even if unchanged')
+    parser.add_argument('--mipmaps', action='store_true', help='Write DDS maps with precomputed normal-aware mip chains')
+    parser.add_argument('--library', action='store_true', help='Write one material library resource instead of a .tres per set')
+    parser.add_argument('--cache-limit', type=int, help='Size limit of the intermediate array cache in MB')
+    parser.add_argument('--no-stream', action='store_true', help='With --all, generate every texture before integrating them')
+    parser.add_argument('--watch', action='store_true', help='Rebuild texture sets and resources whenever source textures change')
+    parser.add_argument('--poll', action='store_true', help='With --watch, poll for changes instead of using inotify')
     
     args = parser.parse_args()
     
+    if args.cache_limit is not None:
+        intermediate_cache.max_bytes = args.cache_limit * 1024 * 1024
+        intermediate_cache.evict()
+    
     if args.all or (args.generate and args.integrate and args.resources):
         # Do everything
-        generate_and_integrate_textures()
-        create_godot_resources_for_texture_sets()
+        generate_and_integrate_textures(args.packed, args.workers, not args.no_stream, args.mipmaps)
+        create_godot_resources_for_texture_sets(args.library)
     else:
         # Do individual steps as requested
         if args.generate:
             medieval_generator.generate_all_medieval_textures()
         
         if args.integrate:
-            create_medieval_garden_texture_sets()
+            create_medieval_garden_texture_sets(args.packed, args.workers, args.force, args.mipmaps)
         
         if args.resources:
-            create_godot_resources_for_texture_sets()
+            create_godot_resources_for_texture_sets(args.library)
+    
+    if args.watch:
+        watch_texture_sources(args.packed, args.mipmaps, args.library, polling=args.poll)
     
     print("Done!")
 
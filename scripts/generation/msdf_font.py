@@ -0,0 +1,452 @@
+"""
+Multi-channel signed distance field (MSDF) font atlases for the Hortus Conclusus UI.
+
+Glyphs are rasterized with FreeType (through PIL) at a high oversampling.
+Their outlines are traced from that bitmap, split into edges at corners
+and the edges between corners coloured, so each of the red, green and blue
+channels holds the signed distance to the edges of its colours.  The
+median of the three channels reconstructs sharp corners at any scale;
+alpha holds the true signed distance (MTSDF), for outlines and glows.
+
+The atlas is written as a PNG with a BMFont text file, which Godot loads
+as a FontFile using multichannel signed distance field rendering.
+"""
+
+import os
+import functools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Printable ASCII
+DEFAULT_CHARSET = "".join(chr(code) for code in range(32, 127))
+
+# Em size of the glyphs in the atlas, and the width of the distance range, in atlas pixels
+DEFAULT_GLYPH_SIZE = 48
+DEFAULT_DISTANCE_RANGE = 6
+
+# Rasterization oversampling for outline tracing, limited for large glyphs
+# so the oversampled em stays within MAX_OVERSAMPLED_SIZE pixels
+OVERSAMPLE = 16
+MAX_OVERSAMPLED_SIZE = 768
+
+# Outline vertices turning by more than this are corners
+CORNER_ANGLE = np.radians(30)
+
+# Distance from the true edge, in pixels, beyond which interpolated channels may not change sign
+CLASH_MARGIN = 0.25
+
+# Edge colours as channel bit masks (red 1, green 2, blue 4)
+CYAN, MAGENTA, YELLOW, WHITE = 6, 5, 3, 7
+
+def _cross(a, b):
+    """z component of the cross product of 2D vectors"""
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def oversampling(size):
+    """Rasterization oversampling for glyphs of an em size"""
+    return max(1, min(OVERSAMPLE, MAX_OVERSAMPLED_SIZE // size))
+
+@functools.lru_cache(maxsize=8)
+def load_font(font_path, size):
+    """FreeType font at a pixel size, cached per process"""
+    return ImageFont.truetype(font_path, size)
+
+def trace_outlines(mask):
+    """Closed outlines of a binary mask in pixel units, with the inside to the right (y down)
+
+    Boundary edges between inside and outside pixels are chained into loops
+    and each loop is given by the midpoints of its edges, which cuts the
+    corners of the pixel staircase.
+    """
+    padded = np.pad(mask, 1)
+    inside = padded[1:-1, 1:-1]
+    ys, xs = np.nonzero(inside & ~padded[:-2, 1:-1])   # Top edges, left to right
+    starts = [np.stack([xs, ys], 1)]
+    ends = [np.stack([xs + 1, ys], 1)]
+    ys, xs = np.nonzero(inside & ~padded[2:, 1:-1])    # Bottom edges, right to left
+    starts.append(np.stack([xs + 1, ys + 1], 1))
+    ends.append(np.stack([xs, ys + 1], 1))
+    ys, xs = np.nonzero(inside & ~padded[1:-1, :-2])   # Left edges, upwards
+    starts.append(np.stack([xs, ys + 1], 1))
+    ends.append(np.stack([xs, ys], 1))
+    ys, xs = np.nonzero(inside & ~padded[1:-1, 2:])    # Right edges, downwards
+    starts.append(np.stack([xs + 1, ys], 1))
+    ends.append(np.stack([xs + 1, ys + 1], 1))
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+
+    # Successor of each edge: the edge starting where it ends.  Vertices where
+    # two loops touch diagonally have two; turn right (towards the inside) there
+    # so touching loops stay separate
+    stride = mask.shape[1] + 3
+    start_keys = starts[:, 1] * stride + starts[:, 0]
+    end_keys = ends[:, 1] * stride + ends[:, 0]
+    order = np.argsort(start_keys, kind='stable')
+    first = np.searchsorted(start_keys[order], end_keys, 'left')
+    ambiguous = np.searchsorted(start_keys[order], end_keys, 'right') - first > 1
+    successor = order[first]
+    if ambiguous.any():
+        directions = ends - starts
+        alternative = order[first[ambiguous] + 1]
+        incoming = directions[ambiguous]
+        turns_right = _cross(incoming, directions[alternative]) > _cross(incoming, directions[successor[ambiguous]])
+        successor[np.nonzero(ambiguous)[0][turns_right]] = alternative[turns_right]
+
+    midpoints = (starts + ends) / 2.0
+    successor = successor.tolist()
+    used = bytearray(len(successor))
+    loops = []
+    for edge in range(len(successor)):
+        if used[edge]:
+            continue
+        loop = []
+        while not used[edge]:
+            used[edge] = 1
+            loop.append(edge)
+            edge = successor[edge]
+        loops.append(midpoints[loop])
+    return loops
+
+def simplify_loop(points, tolerance):
+    """Ramer-Douglas-Peucker simplification of a closed polyline"""
+    if len(points) < 4:
+        return points
+    # Split at the point farthest from the first, then simplify both halves as open polylines
+    far = int(np.argmax(np.sum((points - points[0]) ** 2, axis=1)))
+    keep = np.zeros(len(points) + 1, dtype=bool)
+    closed = np.concatenate([points, points[:1]])
+    stack = [(0, far), (far, len(points))]
+    keep[[0, far, len(points)]] = True
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        chord = closed[last] - closed[first]
+        offsets = closed[first + 1:last] - closed[first]
+        length = np.hypot(*chord)
+        if length > 0:
+            distance = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / length
+        else:
+            distance = np.hypot(offsets[:, 0], offsets[:, 1])
+        index = int(np.argmax(distance))
+        if distance[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return points[keep[:-1]]
+
+def color_edges(loops):
+    """Split loops into segments and colour them; returns (starts, ends, colors, extend_start, extend_end)
+
+    Runs of segments between corners share a colour and neighbouring runs
+    differ, so every corner is the meeting of two channels.  The segments
+    at the ends of a run extend past their ends for pseudo-distances.
+    """
+    starts, ends, colors, extend_start, extend_end = [], [], [], [], []
+    for points in loops:
+        count = len(points)
+        if count < 3:
+            continue
+        following = np.roll(points, -1, axis=0)
+        directions = following - points
+        lengths = np.hypot(directions[:, 0], directions[:, 1])
+        directions = directions / np.maximum(lengths, 1e-9)[:, None]
+        # Turn at each vertex, from the incoming to the outgoing segment
+        incoming = np.roll(directions, 1, axis=0)
+        turn = np.arctan2(_cross(incoming, directions), np.sum(incoming * directions, axis=1))
+        corners = np.nonzero(np.abs(turn) > CORNER_ANGLE)[0]
+
+        loop_colors = np.full(count, WHITE)
+        run_start = np.zeros(count, dtype=bool)
+        run_end = np.zeros(count, dtype=bool)
+        if len(corners) == 1:
+            # Teardrop: split the loop into three runs from the corner
+            order = (np.arange(count) - corners[0]) % count
+            loop_colors = np.array([MAGENTA, WHITE, YELLOW])[np.minimum(3 * order // count, 2)]
+            run_start[corners[0]] = True
+            run_end[(corners[0] - 1) % count] = True
+        elif len(corners) > 1:
+            palette = [CYAN, MAGENTA, YELLOW]
+            for run, corner in enumerate(corners):
+                following_corner = corners[(run + 1) % len(corners)]
+                members = np.arange(corner, corner + ((following_corner - corner) % count or count)) % count
+                color = palette[run % 3]
+                if run == len(corners) - 1 and run % 3 == 0:
+                    # The last run meets the first one; give it a colour different from both neighbours
+                    color = palette[1]
+                loop_colors[members] = color
+                run_start[corner] = True
+                run_end[members[-1]] = True
+
+        starts.append(points)
+        ends.append(following)
+        colors.append(loop_colors)
+        extend_start.append(run_start)
+        extend_end.append(run_end)
+    if not starts:
+        empty = np.zeros((0, 2))
+        return empty, empty, np.zeros(0, dtype=int), np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+    return (np.concatenate(starts), np.concatenate(ends), np.concatenate(colors),
+            np.concatenate(extend_start), np.concatenate(extend_end))
+
+def _segment_distance(point, starts, ends):
+    """Distance from a point to each segment"""
+    direction = ends - starts
+    t = np.clip(np.sum((point - starts) * direction, axis=1) / np.maximum(np.sum(direction ** 2, axis=1), 1e-12), 0, 1)
+    nearest = starts + direction * t[:, None] - point
+    return np.hypot(nearest[:, 0], nearest[:, 1])
+
+def _channel_distances(points, segments):
+    """Per-channel signed pseudo-distances (N, 3) and unsigned true distances (N,) of points to segments"""
+    starts, ends, colors, extend_start, extend_end = segments
+    points = points[:, None, :]
+    direction = (ends - starts)[None]
+    length_squared = np.maximum(np.sum(direction ** 2, axis=-1), 1e-12)
+    offset = points - starts[None]
+    t = np.sum(offset * direction, axis=-1) / length_squared
+    nearest = offset - direction * np.clip(t, 0.0, 1.0)[..., None]
+    distance = np.hypot(nearest[..., 0], nearest[..., 1])
+    cross = _cross(direction, offset)
+    perpendicular = np.abs(cross) / np.sqrt(length_squared)
+    # Equally near segments (at a shared vertex) are told apart by how squarely the point faces them
+    orthogonality = perpendicular / np.maximum(distance, 1e-9)
+    key = distance + 1e-3 * (1.0 - orthogonality)
+    # Past an extendable end, the distance is measured to the segment's line
+    extended = ((t < 0) & extend_start[None]) | ((t > 1) & extend_end[None])
+    pseudo = np.where(extended, perpendicular, distance)
+    sign = np.where(cross > 0, 1.0, -1.0)
+
+    rows = np.arange(points.shape[0])
+    channels = []
+    for bit in (1, 2, 4):
+        member = (colors & bit) != 0
+        chosen = np.argmin(np.where(member[None], key, np.inf), axis=1)
+        channels.append(sign[rows, chosen] * pseudo[rows, chosen])
+    return np.stack(channels, 1), distance.min(axis=1)
+
+def msdf_from_segments(segments, inside, distance_range, block=16):
+    """Encode the multi-channel and true signed distances of each pixel as RGBA uint8
+
+    `inside` is the coverage test at the pixel centres; the segments are in
+    pixel units.  Pixels where the channel median disagrees with it are
+    replaced by the true distance in all channels.  The field is computed
+    in blocks of pixels, each against only the segments that can be nearest
+    to one of its pixels.
+    """
+    starts, ends, colors = segments[:3]
+    height, width = inside.shape
+    if len(starts) == 0:
+        return np.zeros((height, width, 4), dtype=np.uint8)
+
+    sign = np.where(inside, 1.0, -1.0)
+    field = np.empty((height, width, 3))
+    true_distance = np.empty((height, width))
+    members = [(colors & bit) != 0 for bit in (1, 2, 4)]
+    for top in range(0, height, block):
+        for left in range(0, width, block):
+            bottom, right = min(top + block, height), min(left + block, width)
+            center = np.array([(left + right) / 2.0, (top + bottom) / 2.0])
+            radius = np.hypot(right - left, bottom - top) / 2.0
+            center_distance = _segment_distance(center, starts, ends)
+            if center_distance.min() - radius > distance_range:
+                # Every pixel is beyond the encoded range, where only the sign matters
+                field[top:bottom, left:right] = sign[top:bottom, left:right, None] * distance_range
+                true_distance[top:bottom, left:right] = distance_range
+                continue
+            # The nearest segment to a pixel (overall and per channel) is at most
+            # one block diameter farther from the centre than the nearest to the centre
+            relevant = center_distance <= center_distance.min() + 2 * radius
+            for member in members:
+                if member.any():
+                    relevant |= member & (center_distance <= center_distance[member].min() + 2 * radius)
+            ys, xs = np.mgrid[top:bottom, left:right]
+            points = np.stack([xs.ravel() + 0.5, ys.ravel() + 0.5], 1)
+            channels, distance = _channel_distances(points, tuple(part[relevant] for part in segments))
+            field[top:bottom, left:right] = channels.reshape(bottom - top, right - left, 3)
+            true_distance[top:bottom, left:right] = distance.reshape(bottom - top, right - left)
+    field = field.reshape(-1, 3)
+    true_distance = (sign * true_distance).ravel()
+
+    # Error correction: fall back to the true distance where the median has the wrong sign
+    median = np.median(field, axis=1)
+    wrong = (median > 0) != inside.ravel()
+    field[wrong] = true_distance[wrong, None]
+
+    field = np.concatenate([field, true_distance[:, None]], 1).reshape(height, width, 4)
+
+    # Interpolating between neighbours must not cross edges the true distance does not have,
+    # which happens where channels of differently coloured edges meet (junctions, thin stems)
+    clash = np.zeros((height, width), dtype=bool)
+    for dy, dx in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        rows = slice(0, height - dy), slice(dy, height)
+        columns = slice(max(0, -dx), width - max(0, dx)), slice(max(0, dx), width - max(0, -dx))
+        first, second = field[rows[0], columns[0]], field[rows[1], columns[1]]
+        middle = (first + second) / 2.0
+        mismatch = ((np.median(middle[..., :3], axis=-1) > 0) != (middle[..., 3] > 0)) & (np.abs(middle[..., 3]) > CLASH_MARGIN)
+        clash[rows[0], columns[0]] |= mismatch
+        clash[rows[1], columns[1]] |= mismatch
+    field[clash, :3] = field[clash, 3:]
+    return np.clip((field / distance_range + 0.5) * 255.0 + 0.5, 0, 255).astype(np.uint8)
+
+def decoration_mask(size):
+    """Square frame with corner lozenges around a decorated initial, at `size` pixels"""
+    mask = Image.new("1", (size, size), 0)
+    draw = ImageDraw.Draw(mask)
+    ring = max(2, size // 24)
+    inset = size // 10
+    draw.rectangle([inset, inset, size - inset - 1, size - inset - 1], outline=1, width=ring)
+    draw.rectangle([inset + 3 * ring, inset + 3 * ring, size - inset - 3 * ring - 1, size - inset - 3 * ring - 1],
+                   outline=1, width=max(1, ring // 2))
+    lozenge = inset
+    for cx, cy in ((inset, inset), (size - inset, inset), (inset, size - inset), (size - inset, size - inset)):
+        draw.polygon([(cx, cy - lozenge), (cx + lozenge, cy), (cx, cy + lozenge), (cx - lozenge, cy)], fill=1)
+    return np.asarray(mask, dtype=bool)
+
+def bake_glyph(font_path, char, size, distance_range, decorated=False):
+    """Distance field and metrics of one glyph; pixel units of the atlas
+
+    Decorated glyphs are drawn centred in a square frame one and a half em
+    wide, which becomes part of the glyph's outline.
+    """
+    oversample = oversampling(size)
+    font = load_font(font_path, size * oversample)
+    advance = font.getlength(char) / oversample
+    padding = int(np.ceil(distance_range / 2)) + 1
+
+    if decorated:
+        box = int(round(size * 1.5))
+        ascent, _ = font.getmetrics()
+        left, top = 0, -int(round(ascent / oversample))
+        right, bottom = box, top + box
+        advance = box + size / 8
+    else:
+        bbox = font.getbbox(char, anchor="ls")
+        if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+            return char, None, {"xoffset": 0, "yoffset": 0, "xadvance": advance}
+        left, top = int(np.floor(bbox[0] / oversample)), int(np.floor(bbox[1] / oversample))
+        right, bottom = int(np.ceil(bbox[2] / oversample)), int(np.ceil(bbox[3] / oversample))
+
+    # Glyph cell with room for the distance range, in atlas pixels relative to the pen position
+    left, top, right, bottom = left - padding, top - padding, right + padding, bottom + padding
+    width, height = right - left, bottom - top
+    image = Image.new("L", (width * oversample, height * oversample), 0)
+    if decorated:
+        frame = decoration_mask(box * oversample)
+        offset = padding * oversample
+        pixels = np.array(image)
+        pixels[offset:offset + frame.shape[0], offset:offset + frame.shape[1]][frame] = 255
+        image = Image.fromarray(pixels)
+        draw = ImageDraw.Draw(image)
+        draw.text((width * oversample / 2, height * oversample / 2), char, font=font, fill=255, anchor="mm")
+    else:
+        draw = ImageDraw.Draw(image)
+        draw.text((-left * oversample, -top * oversample), char, font=font, fill=255, anchor="ls")
+    mask = np.asarray(image) >= 128
+
+    # Inside test at atlas pixel resolution, outlines in atlas pixel units
+    coverage = mask.reshape(height, oversample, width, oversample).mean(axis=(1, 3))
+    # Outlines are simplified to within 1/16 of an atlas pixel
+    loops = [simplify_loop(loop, oversample / 16) / oversample for loop in trace_outlines(mask)]
+    field = msdf_from_segments(color_edges(loops), coverage >= 0.5, distance_range)
+    return char, field, {"xoffset": left, "yoffset": top, "xadvance": advance}
+
+def pack_glyphs(fields, spacing=1):
+    """Shelf-pack glyph fields into a power-of-two wide atlas; returns (atlas, positions)"""
+    order = sorted((char for char in fields if fields[char] is not None),
+                   key=lambda char: -fields[char].shape[0])
+    area = sum((fields[char].shape[0] + spacing) * (fields[char].shape[1] + spacing) for char in order)
+    atlas_width = 64
+    while atlas_width * atlas_width < area * 1.2:
+        atlas_width *= 2
+    atlas_width = max(atlas_width, max((fields[char].shape[1] + spacing for char in order), default=1))
+
+    positions = {}
+    x = y = shelf = 0
+    for char in order:
+        height, width = fields[char].shape[:2]
+        if x + width > atlas_width:
+            x, y, shelf = 0, y + shelf + spacing, 0
+        positions[char] = (x, y)
+        x += width + spacing
+        shelf = max(shelf, height)
+
+    atlas_height = 1
+    while atlas_height < y + shelf:
+        atlas_height *= 2
+    atlas = np.zeros((atlas_height, atlas_width, 4), dtype=np.uint8)
+    for char, (x, y) in positions.items():
+        height, width = fields[char].shape[:2]
+        atlas[y:y + height, x:x + width] = fields[char]
+    return atlas, positions
+
+def kerning_pairs(font_path, charset, size):
+    """Kerning adjustments between characters in atlas pixels, from the font's kerning table"""
+    oversample = oversampling(size)
+    font = load_font(font_path, size * oversample)
+    advances = {char: font.getlength(char) for char in charset}
+    pairs = {}
+    for first in charset:
+        for second in charset:
+            amount = round((font.getlength(first + second) - advances[first] - advances[second]) / oversample)
+            if amount:
+                pairs[(first, second)] = amount
+    return pairs
+
+def write_bmfont(path, face, size, line_height, base, atlas_size, page_file, glyphs, positions, fields,
+                 distance_range, kernings=None):
+    """Write BMFont text metrics, with the distance field description Godot reads"""
+    with open(path, "w") as f:
+        f.write(f'info face="{face}" size={size} bold=0 italic=0 charset="" unicode=1 stretchH=100 '
+                f'smooth=1 aa=1 padding=0,0,0,0 spacing=1,1\n')
+        f.write(f'common lineHeight={line_height} base={base} scaleW={atlas_size[0]} scaleH={atlas_size[1]} '
+                f'pages=1 packed=0 alphaChnl=0 redChnl=0 greenChnl=0 blueChnl=0\n')
+        f.write(f'page id=0 file="{page_file}"\n')
+        f.write(f'distanceField fieldType=msdf distanceRange={distance_range}\n')
+        f.write(f'chars count={len(glyphs)}\n')
+        for char, metrics in glyphs.items():
+            x, y = positions.get(char, (0, 0))
+            height, width = fields[char].shape[:2] if fields[char] is not None else (0, 0)
+            f.write(f'char id={ord(char)} x={x} y={y} width={width} height={height} '
+                    f'xoffset={metrics["xoffset"]} yoffset={metrics["yoffset"] + base} '
+                    f'xadvance={round(metrics["xadvance"])} page=0 chnl=15\n')
+        kernings = kernings or {}
+        f.write(f'kernings count={len(kernings)}\n')
+        for (first, second), amount in kernings.items():
+            f.write(f'kerning first={ord(first)} second={ord(second)} amount={amount}\n')
+
+def bake_msdf_font(font_path, output_dir, name, charset=DEFAULT_CHARSET, size=DEFAULT_GLYPH_SIZE,
+                   distance_range=DEFAULT_DISTANCE_RANGE, decorated=False, workers=None):
+    """Bake an MSDF atlas (name.png) and BMFont metrics (name.fnt) for a TTF/OTF font
+
+    Glyphs are baked in parallel across `workers` processes.  With
+    decorated=True each glyph is framed as an illuminated initial.
+    Returns the path of the .fnt file.
+    """
+    oversample = oversampling(size)
+    font = load_font(font_path, size * oversample)
+    ascent, descent = font.getmetrics()
+    base = int(round(ascent / oversample))
+    line_height = base + int(round(descent / oversample))
+    charset = "".join(dict.fromkeys(charset))
+
+    count = len(charset)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(bake_glyph, [font_path] * count, charset, [size] * count,
+                                    [distance_range] * count, [decorated] * count, chunksize=4))
+    fields = {char: field for char, field, _ in results}
+    glyphs = {char: metrics for char, _, metrics in results}
+    if decorated:
+        line_height = max(line_height, max(field.shape[0] for field in fields.values() if field is not None))
+
+    atlas, positions = pack_glyphs(fields)
+    os.makedirs(output_dir, exist_ok=True)
+    page_file = f"{name}.png"
+    Image.fromarray(atlas, "RGBA").save(os.path.join(output_dir, page_file))
+
+    face = " ".join(font.getname())
+    kernings = None if decorated else kerning_pairs(font_path, charset, size)
+    fnt_path = os.path.join(output_dir, f"{name}.fnt")
+    write_bmfont(fnt_path, face, size, line_height, base, (atlas.shape[1], atlas.shape[0]), page_file,
+                 glyphs, positions, fields, distance_range, kernings)
+    return fnt_path
@@ -138,8 +138,21 @@ def add_texture_variation(image, variation_type="cracks", intensity=0.5):
     blended = Image.blend(image, texture_inverted, alpha=0.2 * intensity)
     return blended
 
-def add_medieval_border(image, border_width=20, color=(60, 30, 10)):
-    """Add a medieval-style border to the image"""
+# Width of the illuminated border on bordered parchment; one of the sizes
+# committed under assets/ui/illuminated_borders, so no bake is needed
+ILLUMINATED_BORDER_WIDTH = 32
+
+def add_medieval_border(image, border_width=20, color=(60, 30, 10), style=None):
+    """Add a medieval-style border to the image
+
+    With a `style` ("vine" or "knotwork"), composite the illuminated border
+    baked by illuminated_border_baker at `border_width` instead of the flat frame.
+    """
+    if style is not None:
+        # Imported here: the baker pulls in the UI asset and font tooling
+        import illuminated_border_baker
+        return illuminated_border_baker.composite_border(image, style, border_width)
+
     width, height = image.size
     bordered = Image.new("RGB", image.size, color)
     
@@ -1267,7 +1280,7 @@ def generate_all_textures():
     parchment.save(os.path.join(BASE_DIR, "decorative", "parchment.png"))
     
     # Add medieval border to some textures for decorative variants
-    parchment_bordered = add_medieval_border(parchment)
+    parchment_bordered = add_medieval_border(parchment, ILLUMINATED_BORDER_WIDTH, style="vine")
     parchment_bordered.save(os.path.join(BASE_DIR, "decorative", "parchment_bordered.png"))
     
     print("All textures generated successfully!")
@@ -1341,7 +1354,7 @@ if __name__ == "__main__":
             img.save(texture_path)
             
             # Also create a bordered version
-            bordered_img = add_medieval_border(img)
+            bordered_img = add_medieval_border(img, ILLUMINATED_BORDER_WIDTH, style="vine")
             bordered_path = os.path.join(BASE_DIR, "decorative", "parchment_bordered.png")
             bordered_img.save(bordered_path)
         
@@ -20,8 +20,13 @@ signal voice_requested
 @onready var voice_button = $ChatPanel/InputContainer/VoiceButton
 @onready var toggle_button = $ToggleButton
 @onready var ambrose_portrait = $PortraitContainer/AmbrosePortrait
+@onready var portrait_frame = $PortraitContainer/PortraitFrame
+@onready var output_container = $ChatPanel/OutputContainer
 @onready var status_label = $ChatPanel/StatusLabel
 
+# Nine-patch styles rendered at @1x/@2x/@3x by create_ui_assets.py
+const NINE_PATCH_INDEX = "res://assets/ui/medieval/nine_patches.json"
+
 # Private variables
 var _is_open: bool = false
 var _is_speaking: bool = false
@@ -29,6 +34,9 @@ var _conversation_history = []
 
 # Called when the node enters the scene tree for the first time
 func _ready():
+	# Use the panel styles rendered for the display scale
+	_apply_ui_scale()
+	
 	# Set up UI connections
 	chat_input.connect("text_submitted", Callable(self, "_on_chat_input_submitted"))
 	voice_button.connect("pressed", Callable(self, "_on_voice_button_pressed"))
@@ -116,6 +124,36 @@ func hide_chat():
 	_is_open = false
 	_update_chat_visibility()
 
+# Load the variant of a nine-patch style rendered closest to the screen's scale.
+# Variant margins are in their own texels and the canvas is not scaled, so
+# the @2x style draws its border twice as wide in physical pixels; picking it
+# by the window's content scale factor would scale it twice
+func _load_scaled_style(index: Dictionary, asset_name: String) -> StyleBox:
+	var factor = DisplayServer.screen_get_scale(get_window().current_screen)
+	var variants = index[asset_name]["variants"]
+	var best_scale = "1"
+	for variant_scale in variants:
+		if abs(float(variant_scale) - factor) < abs(float(best_scale) - factor):
+			best_scale = variant_scale
+	return load(variants[best_scale]["resource"])
+
+# Swap the scene's @1x panel styles for the variants matching the display scale
+func _apply_ui_scale():
+	if not FileAccess.file_exists(NINE_PATCH_INDEX):
+		return
+	var index = JSON.parse_string(FileAccess.get_file_as_string(NINE_PATCH_INDEX))
+	if index == null:
+		return
+	
+	# Buttons and inputs are too short for the panel's wide border
+	var button = _load_scaled_style(index, "parchment_button")
+	for control in [toggle_button, chat_input, voice_button]:
+		control.add_theme_stylebox_override("normal", button)
+	var parchment = _load_scaled_style(index, "parchment_panel")
+	for panel in [chat_panel, output_container]:
+		panel.add_theme_stylebox_override("panel", parchment)
+	portrait_frame.add_theme_stylebox_override("panel", _load_scaled_style(index, "portrait_frame_panel"))
+
 # Update the chat panel visibility based on state
 func _update_chat_visibility():
 	if chat_panel: